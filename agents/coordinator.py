@@ -3,12 +3,29 @@ Coordinator Agent which serves as the entry point
 and orchestrator for the research workflow.
 
 """
-# 从typing模块导入类型注解：Dict（字典）、Optional（可选类型）、Any（任意类型）
-from typing import Dict, Optional, Any
+# 导入re模块：用于从模型回复中匹配分类/意图标签
+import re
+# 从typing模块导入类型注解：Dict（字典）、Optional（可选类型）、Any（任意类型）、Tuple（元组）
+from typing import Dict, Optional, Any, Tuple
 # 从llm/base模块导入BaseLLM抽象基类，确保协调器使用的LLM符合统一接口
 from llm.base import BaseLLM
-# 从prompts/loader模块导入PromptLoader，用于加载预设的提示词模板
-from prompts.loader import PromptLoader
+# 从llm/cache模块导入CachedLLM：缓存低温度（确定性）调用的模型回复
+from llm.cache import CachedLLM
+# 从prompts/loader模块导入get_default_loader：获取进程级共享的提示词加载器
+from prompts.loader import get_default_loader
+# 从utils/json_utils模块导入extract_json，用于从模型回复中提取JSON结果
+from utils.json_utils import extract_json
+
+# 无需研究的简单查询类型（frozenset，O(1)成员判断）
+_SIMPLE_TYPES = frozenset({'GREETING', 'INAPPROPRIATE'})
+# 预编译的标签匹配：容忍前导空白/引号/加粗符号和尾随标点（如 "GREETING.\n"）
+_QUERY_TYPE_RE = re.compile(r'[\s"\'*`]*(GREETING|INAPPROPRIATE|RESEARCH)\b', re.IGNORECASE)
+_INTENT_RE = re.compile(r'[\s"\'*`]*(APPROVE|MODIFY|REJECT|QUESTION)\b', re.IGNORECASE)
+
+def _match_label(pattern: re.Pattern, text: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    """Return the upper-cased label at the start of text, or default."""
+    match = pattern.match(text) if text else None
+    return match.group(1).upper() if match else default
 
 class Coordinator:
     """
@@ -31,8 +48,10 @@ class Coordinator:
         Args:
             llm: Language model instance for processing
         """
-        self.llm = llm
-        self.prompt_loader = PromptLoader()
+        # 低温度调用命中磁盘缓存时跳过网络请求
+        self.llm = llm if isinstance(llm, CachedLLM) else CachedLLM(llm)
+        # 共享进程级的PromptLoader，模板只加载编译一次
+        self.prompt_loader = get_default_loader()
 
     def classify_query(self, user_query: str) -> str:
         """
@@ -45,20 +64,16 @@ class Coordinator:
             Query type: 'GREETING', 'INAPPROPRIATE', or 'RESEARCH'
         """
 
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
             'coordinator_classify_query',
             user_query = user_query
         )
+        prompt = prefix + suffix
         # 开发者添加的代码功能注释：解释llm.generate方法的作用——向大语言模型输入提示词并获取输出
         #.generate(prompt)：调用 llm 对象的 generate 方法，作用是向大语言模型输入 “提示词（prompt）”，并让模型生成对应输出
-        # 调用大语言模型生成分类结果，去除首尾空格并转为大写（统一格式）
-        query_type = self.llm.generate(prompt).strip().upper()
-
-        #validate classification
-        if query_type not in ['GREETING', 'INAPPROPRIATE', 'RESEARCH']:
-            query_type = 'RESEARCH'
-
-        return query_type
+        # 调用大语言模型生成分类结果，匹配开头的分类标签（统一转为大写）
+        #validate classification: 无法识别时默认为RESEARCH（temperature=0：确定性分类，可被CachedLLM缓存）
+        return _match_label(_QUERY_TYPE_RE, self.llm.generate(prompt, cache_prefix=prefix, temperature=0), 'RESEARCH')
     
     def handle_simple_query(self, user_query: str, query_type: str) -> str:
         """
@@ -71,15 +86,47 @@ class Coordinator:
         Returns:
             Direct response to the user
         """
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
             'coordinator_simple_response',
             user_query = user_query,
             query_type=query_type
         )
+        prompt = prefix + suffix
 
-        response = self.llm.generate(prompt).strip()
+        response = self.llm.generate(prompt, cache_prefix=prefix).strip()
         return response
-    
+
+    def classify_and_respond(self, user_query: str) -> Tuple[str, Optional[str]]:
+        """
+        Classify the user query and answer simple queries in a single LLM call.
+
+        Args:
+            user_query: User's input query
+
+        Returns:
+            Tuple of (query type, direct response or None for research queries)
+        """
+        prefix, suffix = self.prompt_loader.load_split(
+            'coordinator_classify_and_respond',
+            user_query=user_query
+        )
+        prompt = prefix + suffix
+
+        response = self.llm.generate(prompt, cache_prefix=prefix)
+        data = extract_json(response)
+
+        # 解析失败时退回到原有的分类调用
+        if data is None:
+            return self.classify_query(user_query), None
+
+        query_type = _match_label(_QUERY_TYPE_RE, str(data.get('type', '')), 'RESEARCH')
+
+        if query_type == 'RESEARCH':
+            return query_type, None
+
+        simple_response = str(data.get('response') or '').strip()
+        return query_type, simple_response or None
+
     def initialize_research(self, user_query: str, auto_approve: bool = False, output_format: str = "markdown") -> Dict[str, Any]:
         """
         Initialize a new research task.
@@ -92,7 +139,8 @@ class Coordinator:
         Returns:
             Initialized research state
         """
-        query_type = self.classify_query(user_query)
+        # 一次LLM调用同时完成分类和简单查询的回复
+        query_type, simple_response = self.classify_and_respond(user_query)
         # create initial state
         state = {
             'query': user_query,  # 存储用户原始研究查询
@@ -113,8 +161,9 @@ class Coordinator:
         }
 
         # handle simple queries directly
-        if query_type in ['GREETING', 'INAPPROPRIATE']:
-            state['simple_response'] = self.handle_simple_query(user_query, query_type)
+        if query_type in _SIMPLE_TYPES:
+            # 合并调用未返回回复时，才单独生成简单回复
+            state['simple_response'] = simple_response or self.handle_simple_query(user_query, query_type)
             state['current_step'] = 'completed'
             state['needs_more_research'] = False
 
@@ -135,13 +184,14 @@ class Coordinator:
         #store user feedback
         state['user_feedback'] = user_input
         #analyze user intent
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
             'coordinator_analyze_intent',
             user_input=user_input,
             current_step=state['current_step']
         )
+        prompt = prefix + suffix
 
-        intent = self.llm.generate(prompt).strip().upper()
+        intent = _match_label(_INTENT_RE, self.llm.generate(prompt, cache_prefix=prefix, temperature=0))
 
         #update state based on intent
         if intent == "APPROVE":
@@ -154,6 +204,8 @@ class Coordinator:
         elif intent == "REJECT":
             state['plan_approved'] = False
             state['research_plan'] = None
+            state['_plan_json'] = None  # 计划已清空，序列化缓存失效
+            state['_task_order'] = None
         # 代码注释：若意图为"QUESTION"（提问），不修改状态，由Planner后续处理
         # For QUESTION, we keep state as is and let Planner handle it
 
@@ -173,6 +225,19 @@ class Coordinator:
         state['current_step'] = 'planning'
         return state
     
+    async def adelegate_to_planner(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of delegate_to_planner.
+
+        Args:
+            state: Current research state
+
+        Returns:
+            Updated research state with delegation info
+        """
+        # 仅更新状态、不涉及I/O，直接在事件循环中执行
+        return self.delegate_to_planner(state)
+
     def handle_completion(self, state: Dict[str, Any]) -> Dict:
         """
         Handle workflow completion.
@@ -5,18 +5,36 @@ This module implements the Planner agent, which is responsible for
 creating and managing research plans.
 """
 
-# 导入json模块：用于解析和生成JSON格式数据（研究计划多为JSON结构）
-import json
+# 导入Executor：异步接口可指定执行阻塞调用的线程池
+from concurrent.futures import Executor
+# 导入itemgetter：以C实现的排序键替代lambda
+from operator import itemgetter
 # 从typing模块导入类型注解：
-# Dict[str, X]定义字典类型，List[X]定义列表类型，Optional[X]表示变量可为X类型或None
-from typing import Dict, List, Optional
+# List[X]定义列表类型，Optional[X]表示变量可为X类型或None
+from typing import List, Optional
 # 从workflow/state模块导入自定义状态类：
 # ResearchState（研究状态）、PlanStructure（计划结构）、SubTask（子任务），约束数据格式
 from workflow.state import ResearchState, PlanStructure, SubTask
 # 从llm/base模块导入BaseLLM抽象类：约束规划者使用的大语言模型需符合统一接口
 from llm.base import BaseLLM
-# 从prompts/loader模块导入PromptLoader类：用于加载预设的提示词模板
-from prompts.loader import PromptLoader
+# 从llm/cache模块导入CachedLLM：缓存低温度（确定性）调用的模型回复
+from llm.cache import CachedLLM
+# 从prompts/loader模块导入get_default_loader：获取进程级共享的提示词加载器
+from prompts.loader import get_default_loader
+# 从utils/json_utils模块导入extract_json：从模型回复中提取JSON格式的计划
+# dumps_indent：将计划序列化为带缩进的JSON文本（用于修改计划的提示词）
+from utils.json_utils import extract_json, dumps_indent
+# 从utils/async_utils模块导入run_in_executor：在指定线程池中执行阻塞调用
+from utils.async_utils import run_in_executor
+
+# 任务排序键：(优先级, 任务ID)，依赖_normalize_tasks保证字段存在
+_TASK_ORDER = itemgetter('priority', 'task_id')
+
+# 上下文充分性启发式阈值：覆盖率低于下限或结果条目过少时直接判定不充分，
+# 覆盖率达到上限时直接判定充分，只有介于两者之间才调用LLM判断
+_MIN_COVERAGE = 0.5
+_FULL_COVERAGE = 0.95
+_MIN_RESULT_ITEMS = 5
 
 class Planner:
     """
@@ -38,8 +56,10 @@ class Planner:
         Args:
             llm: Language model instance for planning
         """
-        self.llm = llm
-        self.prompt_loader = PromptLoader()
+        # 低温度调用命中磁盘缓存时跳过网络请求
+        self.llm = llm if isinstance(llm, CachedLLM) else CachedLLM(llm)
+        # 共享进程级的PromptLoader，模板只加载编译一次
+        self.prompt_loader = get_default_loader()
 
     def create_research_plan(self, state: ResearchState) -> ResearchState:
         """
@@ -53,34 +73,60 @@ class Planner:
         """
         query = state['query']
         user_feedback = state.get('user_feedback', '')  # 从研究状态中提取用户反馈（若存在则用于优化计划，默认空字符串）
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
             'planner_create_plan',
             query = query,
             user_feedback=user_feedback if user_feedback else None
         )
+        prompt = prefix + suffix
 
-        response = self.llm.generate(prompt, temperature=0.7)
-        try:
-            start = response.find('{') #json start position
-            end = response.rfind('}') + 1 #json end position, +1 make it including closing
-            if start != -1 and end >start:
-                json_str = response[start:end] #extract the pure json string
-                plan = json.loads(json_str) #parse to python dict
-            else:
-                plan = self._create_fallback_plan(query)
-
-            # 设置研究计划和最大迭代次数
-            state['research_plan'] = plan
-            state['max_iterations'] = plan.get('estimated_iterations', 3)
-            
-            # 为每个子任务设置状态
-            for task in plan.get('sub_task', []): # iterate（遍历）through the list of subtasks in the plan(or an empty list if there are none)
-                task['status'] = 'pending'
-        except json.JSONDecodeError:
+        response = self.llm.generate(prompt, cache_prefix=prefix, temperature=0.7)
+        plan = extract_json(response)  # 提取并解析JSON计划（失败返回None）
+        if plan is None:
             plan = self._create_fallback_plan(query)
-            state['research_plan'] = plan
+
+        # 设置研究计划和最大迭代次数
+        state['research_plan'] = plan
+        state['_plan_json'] = None  # 计划已替换，序列化缓存失效
+        state['_task_order'] = None  # 任务顺序随计划重建
+        state['max_iterations'] = plan.get('estimated_iterations', 3)
+
+        # 为每个子任务设置状态
+        for task in plan.get('sub_tasks', []): # iterate（遍历）through the list of subtasks in the plan(or an empty list if there are none)
+            task['status'] = 'pending'
+        self._normalize_tasks(plan)
 
         return state
+
+    async def acreate_research_plan(self, state: ResearchState, executor: Optional[Executor] = None) -> ResearchState:
+        """
+        Async variant of create_research_plan.
+
+        The LLM call runs in a worker thread, so the event loop stays free
+        for other graph nodes while the plan is generated.
+
+        Args:
+            state: Current research state
+            executor: Thread pool to run on (default: the event loop's default executor)
+
+        Returns:
+            Updated state with research plan
+        """
+        return await run_in_executor(executor, self.create_research_plan, state)
+
+    def _normalize_tasks(self, plan: PlanStructure) -> None:
+        """
+        Make sure every subtask has an integer priority, task_id and a status.
+
+        Args:
+            plan: Research plan (modified in place)
+        """
+        for i, task in enumerate(plan.get('sub_tasks', []), 1):
+            if not isinstance(task.get('priority'), int):
+                task['priority'] = 99  # 缺省为最低优先级
+            if not isinstance(task.get('task_id'), int):
+                task['task_id'] = i  # 缺省按计划中的顺序编号
+            task.setdefault('status', 'pending')
     
     def _create_fallback_plan(self, query: str) -> PlanStructure:
         """
@@ -120,29 +166,46 @@ class Planner:
             Updated state with modified plan
         """
         current_plan = state['research_plan']
-        prompt = self.prompt_loader.load(
+        # 复用上次序列化的计划文本，仅在计划变化后重新序列化
+        current_plan_json = state.get('_plan_json') or dumps_indent(current_plan)
+        prefix, suffix = self.prompt_loader.load_split(
             'planner_modify_plan',
-            current_plan=json.dumps(current_plan, indent=2),
+            current_plan=current_plan_json,
             modifications=modifications
         )
-
-        response = self.llm.generate(prompt, temperature=0.7)
-        try:
-            start = response.find('{')  # 定位JSON起始
-            end = response.rfind('}') + 1  # 定位JSON结束
-            if start != -1 and end > start:
-                json_str = response[start:end]  # 截取JSON片段
-                modified_plan = json.loads(json_str)  # 解析为修改后的计划
-                state['research_plan'] = modified_plan  # 更新状态中的计划
-        # 捕获JSON解析异常
-        except json.JSONDecodeError:
-            # 代码功能注释：解析失败时，保留当前计划不修改
-            # Keep current plan if parsing fails
-            pass
+        prompt = prefix + suffix
+
+        response = self.llm.generate(prompt, cache_prefix=prefix, temperature=0.7)
+        modified_plan = extract_json(response)  # 解析为修改后的计划
+        if modified_plan is not None:
+            self._normalize_tasks(modified_plan)
+            state['research_plan'] = modified_plan  # 更新状态中的计划
+            state['_plan_json'] = dumps_indent(modified_plan)
+            state['_task_order'] = None
+        else:
+            state['_plan_json'] = current_plan_json
+        # 代码功能注释：解析失败时，保留当前计划不修改
+        # Keep current plan if parsing fails
 
         # 返回更新后的研究状态（可能包含修改后计划或原计划）
         return state
 
+    async def amodify_plan(
+        self, state: ResearchState, modifications: str, executor: Optional[Executor] = None
+    ) -> ResearchState:
+        """
+        Async variant of modify_plan.
+
+        Args:
+            state: Current research state
+            modifications: User's modification requests
+            executor: Thread pool to run on (default: the event loop's default executor)
+
+        Returns:
+            Updated state with modified plan
+        """
+        return await run_in_executor(executor, self.modify_plan, state, modifications)
+
     def evaluate_context_sufficiency(self, state: ResearchState) -> bool:
         """
         Evaluate whether gathered context is sufficient.
@@ -163,18 +226,30 @@ class Planner:
             return False
         if not results:
             return False
-        
-        prompt = self.prompt_loader.load(
+
+        # 先用本地启发式判断（已完成子任务覆盖率 + 结果条目数），避免不必要的LLM调用
+        sub_tasks = plan.get('sub_tasks', ())
+        completed_tasks = sum(1 for t in sub_tasks if t.get('status') == 'completed')
+        coverage = completed_tasks / (len(sub_tasks) or 1)
+        # 计入已溢出到磁盘的结果（见WorkflowNodes._bound_results）
+        total_content = sum(len(r.get('results', ())) for r in results) + state.get('_spilled_items', 0)
+        if coverage < _MIN_COVERAGE or total_content < _MIN_RESULT_ITEMS:
+            return False
+        if coverage >= _FULL_COVERAGE:
+            return True
+
+        prefix, suffix = self.prompt_loader.load_split(
             'planner_evaluate_context',
             query=query,
             research_goal=plan.get('research_goal', query),  # 研究目标（无则用原始查询）
             completion_criteria=plan.get('completion_criteria', 'N/A'),  # 完成标准（无则标N/A）
-            results_count=len(results),  # 研究结果数量
+            results_count=len(results) + state.get('_spilled_count', 0),  # 研究结果数量（含已溢出的结果）
             current_iteration=iteration + 1,  # 当前迭代次数（+1是因为迭代从0开始计数，用户易理解）
             max_iterations=max_iterations
 
         )
-        response = self.llm.generate(prompt, temperature=0.3).strip().upper()
+        prompt = prefix + suffix
+        response = self.llm.generate(prompt, cache_prefix=prefix, temperature=0.3).strip().upper()
         return response == "YES"
 
     def get_next_task(self, state: ResearchState) -> Optional[SubTask]: #return sub tasks or None
@@ -190,17 +265,48 @@ class Planner:
         plan = state.get('research_plan')
         if not plan:
             return None
-        tasks = sorted(
-            plan.get('sub_tasks' , []),
-            key = lambda t: (t.get('priority' , 99), t.get('task_id', 0))
+        batch = self._pending_tasks(state, plan.get('sub_tasks', []), 1)
+        return batch[0] if batch else None
 
-        )
+    def get_next_batch(self, state: ResearchState, k: int) -> List[SubTask]:
+        """
+        Get up to k pending tasks that can be executed concurrently.
+
+        Subtasks carry their own search queries and sources, so pending
+        tasks are independent of each other.
+
+        Args:
+            state: Current research state
+            k: Maximum number of tasks to return
 
-        for task in tasks:
-            if task.get('status') =='pending':
-                return task
-            
-        return None
+        Returns:
+            Pending tasks ordered by (priority, task_id), at most k of them
+        """
+        plan = state.get('research_plan')
+        if not plan or k <= 0:
+            return []
+        return self._pending_tasks(state, plan.get('sub_tasks', []), k)
+
+    @staticmethod
+    def _pending_tasks(state: ResearchState, sub_tasks: List[SubTask], k: int) -> List[SubTask]:
+        # 子任务下标按(优先级, 任务ID)预排序，计划替换时（_task_order置None）重建一次；
+        # 游标之前的任务都已完成，每次只需从游标向后跳过已完成的任务，均摊O(1)
+        order = state.get('_task_order')
+        if order is None or len(order) != len(sub_tasks):
+            order = sorted(range(len(sub_tasks)), key=lambda i: _TASK_ORDER(sub_tasks[i]))
+            state['_task_order'] = order
+            state['_task_cursor'] = 0
+        cursor = state.get('_task_cursor', 0)
+        while cursor < len(order) and sub_tasks[order[cursor]].get('status') != 'pending':
+            cursor += 1
+        state['_task_cursor'] = cursor
+        batch = []
+        for i in order[cursor:]:
+            if len(batch) >= k:
+                break
+            if sub_tasks[i].get('status') == 'pending':
+                batch.append(sub_tasks[i])
+        return batch
 
     def format_plan_for_display(self, plan: PlanStructure) -> str:
         """
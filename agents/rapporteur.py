@@ -2,16 +2,94 @@
 Rapporteur Agent, for generating the final research report.
 
 """
-# 从typing模块导入类型注解：Dict（字典类型）、List（列表类型）
-from typing import Dict, List
-# 从datetime模块导入datetime类：用于生成报告的时间戳
-from datetime import datetime
+# 导入asyncio模块：将同步的报告生成放到线程中执行，提供异步接口
+import asyncio
+# 导入io模块：用StringIO缓冲区拼接大量短字符串
+import io
+# 导入os模块：底层文件描述符写入与原子替换
+import os
+# 导入re模块：预编译的代码围栏匹配
+import re
+# 导入threading模块：按线程设置单次报告生成的流式回调
+import threading
+# 导入Executor：异步接口可指定执行阻塞调用的线程池
+from concurrent.futures import Executor
+# 从itertools模块导入islice：惰性截断结果迭代，避免构建完整列表
+from itertools import islice
+# 从typing模块导入类型注解：Dict（字典类型）、List（列表类型）、Callable/Iterable/Iterator/Optional
+from typing import AsyncIterator, Dict, List, Callable, Iterable, Iterator, Optional, Tuple
+# 从datetime模块导入datetime类和timezone：用于生成带时区的报告时间戳
+from datetime import datetime, timezone
 # 从workflow/state模块导入ResearchState类：约束研究状态的数据格式
 from workflow.state import ResearchState
 # 从llm/base模块导入BaseLLM抽象类：约束报告生成使用的大语言模型需符合统一接口
 from llm.base import BaseLLM
-# 从prompts/loader模块导入PromptLoader类：用于加载报告生成相关的提示词模板
-from prompts.loader import PromptLoader
+# 从llm/cache模块导入CachedLLM：缓存低温度（确定性）调用的模型回复
+from llm.cache import CachedLLM
+# 从prompts/loader模块导入get_default_loader：获取进程级共享的提示词加载器（加载报告生成相关的提示词模板）
+from prompts.loader import get_default_loader
+# 从utils/json_utils模块导入extract_json：从模型回复中提取JSON格式的主题结构
+from utils.json_utils import extract_json
+# 从utils/async_utils模块导入run_in_executor：在指定线程池中执行阻塞调用
+from utils.async_utils import run_in_executor
+
+# 流式回调类型：接收(章节名, 文本片段)
+StreamCallback = Callable[[str, str], None]
+
+# 模型回复中包裹HTML的Markdown代码围栏（```html 或 ```）
+_HTML_FENCE = re.compile(r'```(?:html)?\s*(.*?)(?:```|\Z)', re.DOTALL)
+
+def _strip_code_fence_stream(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Incrementally strip a Markdown code fence (```html ... ```) from streamed text.
+
+    Text before an opening fence is dropped together with the fence line, and
+    everything from the closing fence onwards is discarded. Streams without an
+    opening fence are passed through unchanged.
+
+    Args:
+        chunks: Streamed text chunks
+
+    Yields:
+        Cleaned text chunks
+    """
+    buffer = ''
+    fenced = None  # None: 尚未确定是否有起始围栏；True/False: 已确定
+    for chunk in chunks:
+        buffer += chunk
+        if fenced is None:
+            fence = buffer.find('```')
+            tag = buffer.find('<')
+            if fence != -1 and (tag == -1 or fence < tag):
+                line_end = buffer.find('\n', fence)
+                if line_end == -1:
+                    continue  # 围栏行尚未接收完整
+                fenced = True
+                buffer = buffer[line_end + 1:].lstrip()
+            elif tag != -1:
+                fenced = False
+            else:
+                continue
+        if fenced:
+            end = buffer.find('```')
+            if end != -1:
+                yield buffer[:end].rstrip()
+                return
+            # 保留末尾2个字符，防止闭合围栏被拆分到两个片段中
+            if len(buffer) > 2:
+                yield buffer[:-2]
+                buffer = buffer[-2:]
+        else:
+            yield buffer
+            buffer = ''
+    if buffer:
+        yield buffer.rstrip() if fenced else buffer
+
+def _iter_findings(results: Iterable[Dict]) -> Iterator[Tuple[str, str]]:
+    """Yield (title, snippet) pairs of all result items, lazily."""
+    for result in results:
+        for item in result.get('results', ()):
+            yield item.get('title', 'No title'), item.get('snippet', '')[:300]
 
 class Rapporteur:
     """
@@ -24,15 +102,60 @@ class Rapporteur:
     - Format citations and references
     - Ensure report coherence and readability
     """
-    def __init__(self, llm: BaseLLM):
+    def __init__(self, llm: BaseLLM, stream_callback: Optional[StreamCallback] = None):
         """
         Initialize the Rapporteur.
 
         Args:
             llm: Language model instance for report generation
+            stream_callback: Optional callback receiving (section, chunk) while
+                             report sections are streamed from the LLM
         """
-        self.llm = llm
-        self.prompt_loader = PromptLoader()
+        # 低温度调用命中磁盘缓存时跳过网络请求
+        self.llm = llm if isinstance(llm, CachedLLM) else CachedLLM(llm)
+        # 共享进程级的PromptLoader，模板只加载编译一次
+        self.prompt_loader = get_default_loader()
+        # 设置回调后，各章节改为流式生成并实时推送片段
+        self.stream_callback = stream_callback
+        # 单次报告生成的回调（由agenerate_report_stream在工作线程中设置），优先于stream_callback
+        self._local = threading.local()
+
+    def _callback(self) -> Optional[StreamCallback]:
+        return getattr(self._local, 'callback', None) or self.stream_callback
+
+    def _generate_section(
+        self,
+        section: str,
+        prompt: str,
+        cache_prefix: Optional[str] = None,
+        sanitize_fences: bool = False,
+        **kwargs
+    ) -> str:
+        """
+        Generate one report section, streaming it when a callback is set.
+
+        Args:
+            section: Section name passed to the stream callback
+            prompt: Input prompt
+            cache_prefix: Static leading part of the prompt
+            sanitize_fences: Strip a surrounding code fence on the fly
+            **kwargs: Additional generating parameters
+
+        Returns:
+            Full section text
+        """
+        callback = self._callback()
+        if callback is None:
+            return self.llm.generate(prompt, cache_prefix=cache_prefix, **kwargs)
+
+        chunks = self.llm.stream_generate(prompt, cache_prefix=cache_prefix, **kwargs)
+        if sanitize_fences:
+            chunks = _strip_code_fence_stream(chunks)
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            callback(section, chunk)
+        return ''.join(parts)
 
     def generate_report(self, state: ResearchState) -> ResearchState:
         """
@@ -49,9 +172,22 @@ class Rapporteur:
         results = state.get('research_results', [])  # 研究结果列表（无则空列表）
         output_format = state.get('output_format', 'markdown')  # 报告输出格式（默认Markdown）
 
-        summary = self._summarize_findings(query, results)
+        # 一次遍历结果，提取摘要与深度分析共用的标题/片段
+        findings, key_snippets = self._collect_content(results)
+
+        # 一次LLM调用同时生成摘要、主题和深度分析；缺失的部分再单独生成
+        fused = self._generate_full_analysis(query, results, findings) or {}
+        summary = fused.get('summary') or self._summarize_findings(query, results, findings)
         # Organize information
-        organized_info = self._organize_information(summary, results)
+        if fused.get('themes'):
+            organized_info = {'themes': fused['themes']}
+        else:
+            organized_info = self._organize_information(summary, results)
+        # 主题列表只取一次，两种报告构建器直接复用
+        themes = organized_info.get('themes', [])
+        analysis = fused.get('analysis') or self._generate_synthesized_analysis(
+            query, summary, organized_info, results, key_snippets
+        )
 
         #generate report based on format
         if output_format == 'html':
@@ -60,7 +196,9 @@ class Rapporteur:
                 plan=plan,
                 summary=summary,
                 organized_info=organized_info,
-                results=results
+                results=results,
+                analysis=analysis,
+                themes=themes
             )
 
         else:
@@ -70,7 +208,9 @@ class Rapporteur:
                 plan=plan,
                 summary=summary,
                 organized_info=organized_info,
-                results=results
+                results=results,
+                analysis=analysis,
+                themes=themes
             )
              # Update state
         state['final_report'] = report  # 将最终报告存入状态
@@ -78,31 +218,173 @@ class Rapporteur:
 
         return state
     
-    def _summarize_findings(self, query: str, results: List[Dict]) -> str:
+    async def agenerate_report(self, state: ResearchState, executor: Optional[Executor] = None) -> ResearchState:
+        """
+        Async variant of generate_report.
+
+        Args:
+            state: Current research state with all research results
+            executor: Thread pool to run on (default: the event loop's default executor)
+
+        Returns:
+            Updated state with final report
+        """
+        # 报告生成包含多次LLM调用（可能伴随流式回调），整体放到线程中执行
+        return await run_in_executor(executor, self.generate_report, state)
+
+    async def agenerate_report_stream(
+        self, state: ResearchState, executor: Optional[Executor] = None
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Generate the report while yielding its sections as they stream in.
+
+        The report is generated in a worker thread with streaming enabled
+        for this call only; chunks are handed back to the event loop as the
+        LLM produces them. When the iterator is exhausted, state holds the
+        final report exactly as generate_report would have left it.
+
+        Args:
+            state: Current research state with all research results
+            executor: Thread pool to run on (default: the event loop's default executor)
+
+        Yields:
+            (section, chunk) pairs, e.g. ("summary", "...")
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def callback(section: str, chunk: str) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, (section, chunk))
+
+        def run() -> ResearchState:
+            self._local.callback = callback
+            try:
+                return self.generate_report(state)
+            finally:
+                self._local.callback = None
+
+        task = asyncio.ensure_future(run_in_executor(executor, run))
+        # 完成回调在事件循环中执行，排在工作线程推送的所有片段之后
+        task.add_done_callback(lambda _: queue.put_nowait(done))
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+        await task  # 传播报告生成中的异常
+
+    def _collect_content(self, results: List[Dict]) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """
+        Collect prompt content from the leading results.
+
+        Args:
+            results: List of research results
+
+        Returns:
+            Tuple of (title/snippet pairs of the first 30 items,
+            snippets of the top 3 items of the first 10 results)
+        """
+        # islice惰性截断：只生成前30条标题/片段，不展开全部结果
+        findings = list(islice(_iter_findings(results), 30))  # limit to 30 items
+        key_snippets = [
+            item.get('snippet', '')[:300]
+            for result in islice(results, 10)  # Limit to first 10 results
+            for item in islice(result.get('results', ()), 3)  # Top 3 per result
+        ]
+        return findings, key_snippets
+
+    def _generate_full_analysis(
+        self,
+        query: str,
+        results: List[Dict],
+        findings: Optional[List[Tuple[str, str]]] = None
+    ) -> Optional[Dict]:
+        """
+        Generate summary, themes and synthesized analysis in one LLM call.
+
+        Args:
+            query: Research query
+            results: List of research results
+            findings: Precollected title/snippet pairs (collected if None)
+
+        Returns:
+            Dict with the valid fields among 'summary', 'themes' and 'analysis',
+            or None if the response could not be parsed
+        """
+        prefix, suffix = self.prompt_loader.load_split(
+            'rapporteur_full_analysis',
+            query=query,
+            research_findings=self._format_findings(findings if findings is not None else self._collect_content(results)[0])
+        )
+        prompt = prefix + suffix
+
+        data = extract_json(self.llm.generate(prompt, cache_prefix=prefix, temperature=0.5, max_tokens=5000))
+        if data is None:
+            return None
+
+        # 只保留格式正确的字段，其余字段由原有方法单独生成
+        fused = {}
+        for key in ('summary', 'analysis'):
+            value = data.get(key)
+            if isinstance(value, str) and value.strip():
+                fused[key] = value.strip()
+        themes = data.get('themes')
+        if isinstance(themes, list) and all(isinstance(t, dict) and 'name' in t for t in themes):
+            fused['themes'] = themes
+
+        # 合并调用无法逐片段流式输出，生成后整体推送给回调
+        callback = self._callback()
+        if callback is not None:
+            for key in ('summary', 'analysis'):
+                if key in fused:
+                    callback(key, fused[key])
+        return fused
+
+    def _format_findings(self, findings: List[Tuple[str, str]]) -> str:
+        """
+        Format title/snippet pairs as a bullet list.
+
+        Args:
+            findings: Title/snippet pairs
+
+        Returns:
+            Formatted findings text
+        """
+        buf = io.StringIO()
+        for i, (title, snippet) in enumerate(findings):
+            if i:
+                buf.write('\n')
+            buf.write(f"- {title}: {snippet}")  # 按格式写入缓冲区
+        return buf.getvalue()
+
+    def _summarize_findings(
+        self,
+        query: str,
+        results: List[Dict],
+        findings: Optional[List[Tuple[str, str]]] = None
+    ) -> str:
         """
         Summarize all research findings.
 
         Args:
             query: Research query
             results: List of research results
+            findings: Precollected title/snippet pairs (collected if None)
 
         Returns:
             Summary of findings
         """
-        all_content = []
-        for result in results: #Each result is a collection of outcomes from a single search.
-            for item in result.get('results', []): #Each item is a specific search result
-                title = item.get('title', 'No title')
-                snippet = item.get('snippet', '')[:300]
-                all_content.append(f"- {title}: {snippet}")  # 按格式添加到列
-        content_text = '\n'.join(all_content[:30]) #limit to 30 items
-        prompt = self.prompt_loader.load(
+        if findings is None:
+            findings = self._collect_content(results)[0]
+        prefix, suffix = self.prompt_loader.load_split(
             'rapporteur_summarize',  # 提示词模板名称（用于总结研究发现）
             query=query,  # 传入用户查询（明确总结目标）
-            research_findings=content_text  # 传入整理后的结果片段
+            research_findings=self._format_findings(findings)  # 传入整理后的结果片段
         )
+        prompt = prefix + suffix
 
-        summary = self.llm.generate(prompt, temperature= 0.5, max_tokens=2000)
+        summary = self._generate_section('summary', prompt, cache_prefix=prefix, temperature= 0.5, max_tokens=2000)
         return summary
     
     def _organize_information(self, summary: str, results: List[Dict]) -> Dict:
@@ -116,25 +398,18 @@ class Rapporteur:
         Returns:
             Organized information structure
         """
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
             'rapporteur_organize_info', 
             summary=summary  # 传入研究摘要（提取主题的依据）
         )
+        prompt = prefix + suffix
 
-        response = self.llm.generate(prompt, temperature=0.5)
+        response = self.llm.generate(prompt, cache_prefix=prefix, temperature=0.5)
 
-        import json
-        try:
-            start = response.find('{')  # 找到第一个"{"（JSON起始）
-            end = response.rfind('}') + 1  # 找到最后一个"}"并+1（包含闭合符号）
-            # 若成功定位JSON边界，解析为Python字典
-            if start != -1 and end > start:
-                json_str = response[start:end]  # 截取纯JSON字符串
-                organized = json.loads(json_str)  # 解析为结构化字典
-                return organized  # 返回解析后的结构化信息
-        # 捕获JSON解析异常（如模型返回格式错误）
-        except json.JSONDecodeError:
-            pass  # 解析失败则跳过，使用后续备用结构
+        organized = extract_json(response)  # 解析为结构化字典（失败返回None）
+        if organized is not None:
+            return organized  # 返回解析后的结构化信息
+        # 解析失败则使用后续备用结构
 
         return{
             'themes': [  # 主题列表（仅1个基础主题）
@@ -150,7 +425,9 @@ class Rapporteur:
         plan: Dict,
         summary: str,
         organized_info: Dict,
-        results: List[Dict]
+        results: List[Dict],
+        analysis: Optional[str] = None,
+        themes: Optional[List[Dict]] = None
     ) -> str:
         # 方法文档字符串：说明方法功能（生成Markdown报告）、参数和返回值
         """
@@ -162,6 +439,8 @@ class Rapporteur:
             summary: Research summary
             organized_info: Organized information
             results: Research results
+            analysis: Precomputed synthesized analysis (generated if None)
+            themes: Precomputed theme list (taken from organized_info if None)
 
         Returns:
             Markdown formatted report
@@ -172,49 +451,51 @@ class Rapporteur:
 
         # 代码功能注释：1. 添加报告标题（一级标题，基于用户查询）
         # Title
-        sections.append(f"# Research Report: {query}\n")
+        sections.append(f"# Research Report: {query}\n\n")
 
         # 代码功能注释：2. 添加报告元数据（生成时间、研究目标、信息来源数量）
         # Metadata
-        # 生成当前时间戳（格式：年-月-日 时:分:秒）
-        sections.append(f"**Generating Time** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        # 生成当前UTC时间戳（ISO 8601格式，带时区，精确到秒）
+        sections.append(f"**Generating Time** {datetime.now(timezone.utc).isoformat(timespec='seconds')}\n\n")
         # 提取研究计划中的研究目标（无则用用户查询）
-        sections.append(f"**Research Goal: ** {plan.get('research_goal', query) if plan else query}\n")
+        sections.append(f"**Research Goal: ** {plan.get('research_goal', query) if plan else query}\n\n")
         # 统计信息来源数量（研究结果列表的长度）
-        sections.append(f"**Information Sources: ** {len(results)}\n")
+        sections.append(f"**Information Sources: ** {len(results)}\n\n")
 
         # 代码功能注释：3. 添加执行摘要章节（二级标题+研究摘要）
         # Executive Summary
-        sections.append("\n## Executive Summary\n")
-        sections.append(summary)
+        sections.append("## Executive Summary\n\n")
+        sections.append(f"{summary}\n\n")
 
         # 代码功能注释：4. 添加核心发现章节（按主题组织，二级标题+主题列表）
         # Key Findings (organized by themes)
-        sections.append("\n## Key Findings\n")
-        # 遍历结构化信息中的主题列表（无则空列表）
-        for theme in organized_info.get('themes', []):
-            sections.append(f"\n### {theme['name']}\n")  # 主题名称（三级标题）
-            # 遍历当前主题的核心要点（无则空列表），按列表项格式添加
-            for point in theme.get('key_points', []):
-                sections.append(f"- {point}\n")
+        sections.append("## Key Findings\n\n")
+        if themes is None:
+            themes = organized_info.get('themes', [])
+        # 遍历主题列表：主题名称（三级标题）+ 核心要点（列表项，一次拼接）
+        for theme in themes:
+            sections.append(f"### {theme['name']}\n\n")
+            sections.append(''.join(f"- {point}\n" for point in theme.get('key_points', [])) + '\n')
 
         # 代码功能注释：5. 添加深度分析章节（调用私有方法生成整合分析）
         # Synthesized Analysis (NEW: generate integrated analysis instead of simple listing)
-        sections.append("\n## Synthesized Analysis\n")
-        sections.append(self._generate_synthesized_analysis(query, summary, organized_info, results))
+        sections.append("## Synthesized Analysis\n\n")
+        if analysis is None:
+            analysis = self._generate_synthesized_analysis(query, summary, organized_info, results)
+        sections.append(f"{analysis}\n\n")
 
         # 代码功能注释：6. 添加参考资料章节（调用私有方法格式化引用）
         # References
-        sections.append("\n## References\n")
-        sections.append(self._format_citations(results))
+        sections.append("## References\n\n")
+        sections.append(f"{self._format_citations(results)}\n\n")
 
         # 代码功能注释：7. 添加结论章节（调用私有方法生成结论）
         # Conclusion
-        sections.append("\n## Conclusion\n")
-        sections.append(self._generate_conclusion(query, summary))
+        sections.append("## Conclusion\n\n")
+        sections.append(f"{self._generate_conclusion(query, summary)}\n")
 
-        # 将所有章节拼接为完整Markdown字符串，返回报告
-        return '\n'.join(sections)
+        # 每个章节自带换行（段落后空一行），直接拼接为完整Markdown字符串
+        return ''.join(sections)
     def _format_detailed_results(self, results: List[Dict]) -> str:
         """
         Format detailed results section.
@@ -225,27 +506,30 @@ class Rapporteur:
         Returns:
             Formatted results string
         """
-        formatted = []
+        buf = io.StringIO()
+        write = buf.write  # 绑定方法，避免循环内重复属性查找
         result_num = 1
-        for result in results:
-            source = result.get('source', 'Unknown')
+        for i, result in enumerate(results):
+            source_cap = result.get('source', 'Unknown').capitalize()  # 每个来源只计算一次
             query = result.get('query', 'N/A')
-            formatted.append(f"\n### Source: {source.capitalize()}\n")
-            formatted.append(f"**Query:** {query}\n")
-            for item in result.get('results', [])[:5]:  # Top 5 per source
+            if i:
+                write('\n')  # 与上一来源的最后一行分隔
+            write(f"\n### Source: {source_cap}\n\n")
+            write(f"**Query:** {query}\n")
+            for item in result.get('results', ())[:5]:  # Top 5 per source
                 title = item.get('title', 'No title')  # 条目标题（无则"No title"）
                 snippet = item.get('snippet', 'No description')  # 条目摘要（无则"No description"）
                 url = item.get('url', '')  # 条目链接（无则空字符串）
 
-                formatted.append(f"{result_num}. **{title}**")  # 带编号的标题（加粗）
+                write(f"\n{result_num}. **{title}**")  # 带编号的标题（加粗）
                 if url:  # 若有链接，添加链接信息
-                    formatted.append(f"   - URL: {url}")
+                    write(f"\n   - URL: {url}")
                 # 添加摘要（截取前450字符，避免过长）
-                formatted.append(f"   - {snippet[:450]}...\n")
+                write(f"\n   - {snippet[:450]}...\n")
                 result_num += 1  # 编号自增
 
-        # 将格式化结果列表拼接为字符串，返回
-        return '\n'.join(formatted)
+        # 返回缓冲区中的格式化结果
+        return buf.getvalue()
     
     def _format_citations(self, results: List[Dict]) -> str:
         """
@@ -257,31 +541,38 @@ class Rapporteur:
         Returns:
             Formatted citations
         """
-        citations = []
+        buf = io.StringIO()
+        write = buf.write  # 绑定方法，避免循环内重复属性查找
         citation_num = 1
         for result in results:
+            # 信息来源（无则"Unknown"），对同一结果的所有条目不变，提到内层循环外
+            source_cap = result.get('source', 'Unknown').capitalize()
             # 遍历当前来源的每个结果条目（每个条目对应一个引用）
-            for item in result.get('results', []):
+            for item in result.get('results', ()):
+                # 最多显示50条（避免引用过长）
+                if citation_num > 50:  # Limit to 50 citations
+                    return buf.getvalue()
                 title = item.get('title', 'Untitled')  # 条目标题（无则"Untitled"）
                 url = item.get('url', '')  # 条目链接（无则空字符串）
-                source = result.get('source', 'Unknown')  # 信息来源（无则"Unknown"）
 
-                # 按格式添加引用：有链接则生成Markdown超链接，无链接则仅文本
+                if citation_num > 1:
+                    write('\n')
+                # 按格式写入引用：有链接则生成Markdown超链接，无链接则仅文本
                 if url:
-                    citations.append(f"{citation_num}. {title} - {source.capitalize()} - [{url}]({url})")
+                    write(f"{citation_num}. {title} - {source_cap} - [{url}]({url})")
                 else:
-                    citations.append(f"{citation_num}. {title} - {source.capitalize()}")
+                    write(f"{citation_num}. {title} - {source_cap}")
 
                 citation_num += 1  # 编号自增
 
-        # 拼接引用列表为字符串，最多显示50条（避免引用过长），返回
-        return '\n'.join(citations[:50])  # Limit to 50 citations
+        return buf.getvalue()
     def _generate_synthesized_analysis(
         self,
         query: str,
         summary: str,
         organized_info: Dict,
-        results: List[Dict]
+        results: List[Dict],
+        key_snippets: Optional[List[str]] = None
     ) -> str:
         """
         Generate synthesized analysis that integrates all findings.
@@ -291,26 +582,26 @@ class Rapporteur:
             summary: Research summary
             organized_info: Organized themes
             results: Research results
+            key_snippets: Precollected key snippets (collected if None)
 
         Returns:
             Integrated analysis text
         """
         # Extract key content from results
-        key_content = []
-        for result in results[:10]:  # Limit to first 10 results
-            for item in result.get('results', [])[:3]:  # Top 3 per result
-                key_content.append(f"- {item.get('snippet', '')[:300]}")
+        if key_snippets is None:
+            key_snippets = self._collect_content(results)[1]
 
-        content_text = '\n'.join(key_content)
+        content_text = '\n'.join(f"- {snippet}" for snippet in key_snippets)
 
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
             'rapporteur_synthesized_analysis',
             query=query,
             summary=summary[:1500],
             key_content=content_text
         )
+        prompt = prefix + suffix
 
-        analysis = self.llm.generate(prompt, temperature=0.6, max_tokens=2000)
+        analysis = self._generate_section('analysis', prompt, cache_prefix=prefix, temperature=0.6, max_tokens=2000)
         return analysis
     
     def _generate_conclusion(self, query: str, summary: str) -> str:
@@ -324,12 +615,13 @@ class Rapporteur:
         Returns:
             Conclusion text
         """
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
         'rapporteur_conclusion',
         query=query,
         summary=summary[:1500]
     )
-        conclusion = self.llm.generate(prompt, temperature=0.5, max_tokens = 800)
+        prompt = prefix + suffix
+        conclusion = self._generate_section('conclusion', prompt, cache_prefix=prefix, temperature=0.5, max_tokens = 800)
 
         return conclusion 
     
@@ -339,7 +631,9 @@ class Rapporteur:
         plan: Dict,
         summary: str,
         organized_info: Dict,
-        results: List[Dict]
+        results: List[Dict],
+        analysis: Optional[str] = None,
+        themes: Optional[List[Dict]] = None
     ) -> str:
         """
         Generate a structured HTML report.
@@ -350,28 +644,31 @@ class Rapporteur:
             summary: Research summary
             organized_info: Organized information
             results: Research results
+            analysis: Precomputed synthesized analysis (generated if None)
+            themes: Precomputed theme list (taken from organized_info if None)
 
         Returns:
             HTML formatted report
         """
-        analysis = self._generate_synthesized_analysis(query, summary,organized_info, results)
+        if analysis is None:
+            analysis = self._generate_synthesized_analysis(query, summary,organized_info, results)
         conclusion = self._generate_conclusion(query, summary)
+        if themes is None:
+            themes = organized_info.get('themes', [])
         # Format themes as HTML-friendly text
-        themes_text = ""  # 初始化HTML主题内容字符串
-        # 遍历主题列表（无则空列表）
-        for theme in organized_info.get('themes', []):
-            # 主题名称使用<h3>标签
-            themes_text += f"<h3>{theme['name']}</h3>\n<ul>\n"
-            # 核心要点使用无序列表<ul><li>标签
-            for point in theme.get('key_points', []):
-                themes_text += f"<li>{point}</li>\n"
-            themes_text += "</ul>\n"  # 闭合无序列表标签
+        # 主题名称使用<h3>标签，核心要点使用无序列表<ul><li>标签（一次拼接，避免字符串反复+=）
+        themes_text = ''.join(
+            f"<h3>{theme['name']}</h3>\n<ul>\n"
+            + ''.join(f"<li>{point}</li>\n" for point in theme.get('key_points', []))
+            + "</ul>\n"
+            for theme in themes
+        )
 
         # 代码功能注释：第三步——格式化参考资料（调用已有私有方法）
         # Format citations
         citations = self._format_citations(results)
         # Generate HTML using LLM
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
             'rapporteur_generate_html',  # 提示词模板名称（用于生成HTML）
             query=query,  # 用户查询（用于标题）
             research_goal=plan.get('research_goal', query) if plan else query,  # 研究目标（无则用查询）
@@ -381,13 +678,20 @@ class Rapporteur:
             citations=citations,  # 参考资料
             conclusion=conclusion  # 结论
         )
-        html_report = self.llm.generate(prompt, temperature=0.3, max_tokens=4000)
+        prompt = prefix + suffix
+        if self._callback() is not None:
+            # 流式生成时围栏已在片段流中逐步去除
+            return self._generate_section(
+                'html', prompt, cache_prefix=prefix, sanitize_fences=True,
+                temperature=0.3, max_tokens=4000
+            ).strip()
+
+        html_report = self.llm.generate(prompt, cache_prefix=prefix, temperature=0.3, max_tokens=4000)
         # Clean up the HTML (remove markdown code blocks if LLM added them)
-        if '```html' in html_report:
-            html_report = html_report.split('```html')[1].split('```')[0].strip()
-    # 若包含通用```标记，同样提取中间部分
-        elif '```' in html_report:
-            html_report = html_report.split('```')[1].split('```')[0].strip()
+        # 一次正则扫描提取```html/```围栏内的内容（缺少闭合围栏时取到末尾）
+        match = _HTML_FENCE.search(html_report)
+        if match:
+            html_report = match.group(1).strip()
 
         # 返回最终清理后的HTML报告
         return html_report
@@ -403,16 +707,30 @@ class Rapporteur:
         Returns:
             True if successful, False otherwise
         """
+        data = report.encode('utf-8')  # 一次性整体编码
+        tmp_path = filepath + '.tmp'
         try:
-        # 以写模式、UTF-8编码打开文件，写入报告内容
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(report)
+            # 先写入临时文件再原子替换，避免中途崩溃留下残缺报告
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                view = memoryview(data)
+                while view:
+                    # os.write可能只写入部分字节，循环直到写完
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, filepath)
             # 成功则返回True
             return True
     # 捕获所有可能的异常
         except Exception as e:
         # 打印错误信息（包含异常详情）
             print(f"Error saving report: {e}")
+            # 清理残留的临时文件
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
             # 失败则返回False
             return False
 
@@ -2,8 +2,34 @@
 Researcher Agent, which is responsible for 
 executing information retrieval tasks.
 """
-# 从typing模块导入类型注解：Dict（字典）、List（列表）、Optional（可选类型）
-from typing import Dict, List, Optional
+# 延迟求值类型注解：内置泛型与 X | None 写法
+from __future__ import annotations
+# 导入asyncio模块：批量执行MCP异步搜索
+import asyncio
+# 导入threading模块：在后台守护线程中运行常驻事件循环
+import threading
+# 导入time模块：搜索结果缓存的过期判断
+import time
+# 从collections导入OrderedDict（实现LRU淘汰顺序）和defaultdict（分组计数）
+from collections import OrderedDict, defaultdict
+# 从itertools导入islice：惰性截断结果条目
+from itertools import islice
+# 从concurrent.futures导入线程池：并发执行I/O密集的搜索请求
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+# 导入hashlib模块：为信息摘要缓存计算内容指纹
+import hashlib
+# 导入logging模块：语义缓存不可用时给出警告
+import logging
+# 导入math模块：计算嵌入向量的范数
+import math
+# 从collections.abc导入抽象容器类型（用于类型注解）；其余注解使用内置泛型(PEP 585/604)
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+try:
+    # numpy为可选依赖：结果数量很大时用于向量化统计
+    import numpy as np
+except ImportError:
+    np = None
 # 从workflow/state模块导入自定义状态类：
 # ResearchState（研究状态）、SubTask（子任务）、SearchResult（搜索结果）
 from workflow.state import ResearchState, SubTask, SearchResult
@@ -12,10 +38,41 @@ from workflow.state import ResearchState, SubTask, SearchResult
 from tools.tavily_search import TavilySearch
 from tools.arxiv_search import ArxivSearch
 from tools.mcp_client import MCPClient
+# 从tools/errors模块导入瞬时错误判断：决定失败的搜索是否重试
+from tools.errors import is_transient_error
 # 从llm/base模块导入BaseLLM抽象类：约束研究者使用的大语言模型需符合统一接口
 from llm.base import BaseLLM
 # 从prompts/loader模块导入PromptLoader类：用于加载研究者相关的提示词模板
-from prompts.loader import PromptLoader
+from prompts.loader import PromptLoader, get_default_loader
+# 从utils/async_utils模块导入run_in_executor：在指定线程池中执行阻塞调用
+from utils.async_utils import run_in_executor
+
+# 单个任务并发搜索的最大线程数
+_MAX_SEARCH_WORKERS = 16
+# 单次MCP调用（含批量gather）的等待超时（秒）
+_MCP_TIMEOUT = 60
+# 单次搜索的最大尝试次数（瞬时失败时重试）及首次重试前的退避时间（秒）
+_SEARCH_ATTEMPTS = 2
+_RETRY_BACKOFF = 0.25
+# 搜索结果LRU缓存的容量与有效期（秒）
+_SEARCH_CACHE_SIZE = 256
+_SEARCH_CACHE_TTL = 3600
+# 信息摘要缓存的容量
+_SUMMARY_CACHE_SIZE = 64
+# 结果数超过该值且numpy可用时，aggregate_results改用numpy统计
+_NUMPY_MIN_RESULTS = 512
+# 语义缓存默认的余弦相似度阈值
+_SEMANTIC_THRESHOLD = 0.92
+
+# 研究者的日志名称（与utils.logger.LoggerMixin的命名一致）
+_LOGGER_NAME = "Personal_Deepresearch_Agent.Researcher"
+
+# 提示词中单个搜索结果条目的格式
+_RESULT_TEMPLATE = "\n{i}. [{source}] {title}\n   URL: {url}\n   {snippet}..."
+
+# 查询嵌入函数类型：文本 -> 向量
+EmbedFn = Callable[[str], Sequence[float]]
+
 class Researcher:
     # 类文档字符串：详细说明研究者的定位和核心职责
     """
@@ -33,9 +90,12 @@ class Researcher:
     def __init__(
         self,
         llm: BaseLLM,
-        tavily_api_key: Optional[str] = None,
-        mcp_server_url: Optional[str] = None,
-        mcp_api_key: Optional[str] = None
+        tavily_api_key: str | None = None,
+        mcp_server_url: str | None = None,
+        mcp_api_key: str | None = None,
+        semantic_cache: bool = False,
+        embed_fn: EmbedFn | None = None,
+        similarity_threshold: float = _SEMANTIC_THRESHOLD
     ):
         # 构造方法的文档字符串：说明初始化参数的含义和用途
         """
@@ -46,6 +106,9 @@ class Researcher:
             tavily_api_key: Tavily API key (optional)
             mcp_server_url: MCP server URL (optional)
             mcp_api_key: MCP API key (optional)
+            semantic_cache: Also serve cached results for near-duplicate queries
+            embed_fn: Query embedding function (default: llm.embed, if the LLM has one)
+            similarity_threshold: Minimum cosine similarity for a semantic cache hit
         """
         # 保存传入的大语言模型实例到类属性：用于后续信息提取和总结
         self.llm = llm
@@ -55,8 +118,42 @@ class Researcher:
         self.arxiv = ArxivSearch()
         # 初始化MCPClient工具：若提供服务地址则创建实例，否则为None
         self.mcp = MCPClient(mcp_server_url, mcp_api_key) if mcp_server_url else None
-        # 创建PromptLoader实例并保存到类属性：用于加载研究者相关的提示词模板
-        self.prompt_loader = PromptLoader()
+        # 数据源分发表：只登记已初始化的数据源，_search按来源名直接查表
+        self._dispatch: dict[str, Callable[[str], SearchResult]] = {'arxiv': self.arxiv.search}
+        if self.tavily:
+            self._dispatch['tavily'] = self.tavily.search
+        if self.mcp:
+            # MCP为异步，提交到常驻事件循环执行
+            self._dispatch['mcp'] = lambda query: self._run_mcp(self.mcp.search(query))
+        # 共享进程级的PromptLoader，模板只加载编译一次
+        self.prompt_loader: PromptLoader = get_default_loader()
+        # MCP常驻事件循环（首次使用时创建），避免每次调用asyncio.run重建事件循环
+        self._mcp_loop: asyncio.AbstractEventLoop | None = None
+        self._mcp_loop_lock = threading.Lock()
+        # 搜索结果LRU缓存：(source, 规范化query) -> (写入时间, 结果)
+        self._search_cache: OrderedDict[tuple[str, str], tuple[float, SearchResult]] = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        # 在途请求表：(source, 规范化query) -> Future，合并并发的重复搜索
+        self._inflight: dict[tuple[str, str], Future] = {}
+        self._inflight_lock = threading.Lock()
+        # 信息摘要缓存：(查询, 结果条目)指纹 -> LLM摘要
+        self._summary_cache: OrderedDict[bytes, str] = OrderedDict()
+        self._summary_cache_lock = threading.Lock()
+        # 语义缓存：无可用嵌入函数时关闭并给出警告
+        self._embed_fn = (embed_fn or getattr(llm, 'embed', None)) if semantic_cache else None
+        if semantic_cache and self._embed_fn is None:
+            logging.getLogger(_LOGGER_NAME).warning(
+                "semantic_cache is enabled but no embed_fn was given and %s has no embed(); "
+                "falling back to exact-match caching", type(llm).__name__
+            )
+        self.similarity_threshold = similarity_threshold
+        # 缓存键 -> 单位化的查询嵌入（与_search_cache同步增删）
+        self._search_embeddings: dict[tuple[str, str], list[float]] = {}
+        # 规范化query -> 单位化嵌入，避免同一查询在查缓存和写缓存时重复计算
+        self._embedding_memo: OrderedDict[str, list[float] | None] = OrderedDict()
+        # 来源 -> 缓存嵌入的(键, 写入时间, 向量矩阵)视图，嵌入变化时失效；版本号用于丢弃构建期间过期的视图
+        self._embedding_views: dict[str, tuple[list[tuple[str, str]], list[float], Any]] = {}
+        self._embedding_version = 0
 
     # 定义任务执行方法：接收当前研究状态和待执行任务，返回更新后的状态
     def execute_task(self, state: ResearchState, task: SubTask) -> ResearchState:
@@ -71,19 +168,40 @@ class Researcher:
         Returns:
             Updated state with research results
         """
-        # 初始化空列表，用于存储本次任务的搜索结果
-        results = []
+        return self.execute_tasks(state, [task])
 
-        # 代码功能注释：遍历任务中的每个搜索关键词和每个指定数据源，执行搜索
+    def execute_tasks(self, state: ResearchState, tasks: Sequence[SubTask]) -> ResearchState:
+        """
+        Execute several independent research tasks concurrently.
+
+        The searches of all tasks run in one concurrent batch, so the wall
+        time is that of the slowest search rather than the sum over tasks.
+        Results are appended in task order, as if the tasks ran one by one.
+
+        Args:
+            state: Current research state
+            tasks: Tasks to execute
+
+        Returns:
+            Updated state with research results
+        """
+        # 代码功能注释：组合每个任务中的每个搜索关键词和每个指定数据源，所有任务的搜索一起并发执行
         # Execute searches for each query
-        for query in task.get('search_queries', []):  # 遍历任务中的搜索关键词列表（无则空列表）
-            for source in task.get('sources', []):  # 遍历任务中的数据源列表（无则空列表）
-                # 调用私有方法_search执行搜索，传入关键词和数据源
-                result = self._search(query, source)
-                # 若搜索成功（result非空），添加任务ID并加入结果列表
-                if result:
-                    result['task_id'] = task['task_id']  # 标记结果所属任务ID
-                    results.append(result)
+        pairs = []
+        owners = []  # 与pairs一一对应的任务ID
+        for task in tasks:
+            task_id = task['task_id']
+            for query in task.get('search_queries', []):  # 任务中的搜索关键词列表（无则空列表）
+                for source in task.get('sources', []):  # 任务中的数据源列表（无则空列表）
+                    pairs.append((query, source))
+                    owners.append(task_id)
+        # 若搜索成功（result非空），复制一份并标记所属任务ID后加入结果列表
+        # （不修改工具返回的字典：它可能同时存放在缓存中或被其他任务共享）
+        results = [
+            {**result, 'task_id': task_id}
+            for task_id, result in zip(owners, self._run_searches(pairs))
+            if result
+        ]
 
         # 代码功能注释：将本次任务的搜索结果添加到研究状态中
         # Add results to state
@@ -98,16 +216,372 @@ class Researcher:
         # Mark task as completed
         # 若状态中存在研究计划
         if state.get('research_plan'):
-            # 遍历计划中的所有子任务
-            for t in state['research_plan'].get('sub_tasks', []):
-                # 找到与当前任务ID匹配的子任务
-                if t.get('task_id') == task['task_id']:
-                    t['status'] = 'completed'  # 将其状态更新为"completed"
-                    break  # 找到后立即退出循环
+            for task in tasks:
+                self._mark_completed(state, task['task_id'])
 
         # 返回包含新搜索结果的更新状态
         return state
-    def _search(self, query: str, source: str) -> Optional[SearchResult]:
+
+    async def aexecute_task(
+        self, state: ResearchState, task: SubTask, executor: Executor | None = None
+    ) -> ResearchState:
+        """
+        Async variant of execute_task.
+
+        Args:
+            state: Current research state
+            task: Task to execute
+            executor: Thread pool to run on (default: the event loop's default executor)
+
+        Returns:
+            Updated state with research results
+        """
+        return await self.aexecute_tasks(state, [task], executor)
+
+    async def aexecute_tasks(
+        self, state: ResearchState, tasks: Sequence[SubTask], executor: Executor | None = None
+    ) -> ResearchState:
+        """
+        Async variant of execute_tasks.
+
+        The searches still run on the search thread pool; the calling event
+        loop only waits for the batch to finish.
+
+        Args:
+            state: Current research state
+            tasks: Tasks to execute
+            executor: Thread pool to run on (default: the event loop's default executor)
+
+        Returns:
+            Updated state with research results
+        """
+        return await run_in_executor(executor, self.execute_tasks, state, tasks)
+
+    @staticmethod
+    def _mark_completed(state: ResearchState, task_id: int) -> None:
+        sub_tasks = state['research_plan'].get('sub_tasks', [])
+        # str(task_id) -> 子任务下标的索引：存下标而非对象引用，经检查点序列化后依然有效
+        # （键用字符串，状态可以按JSON原样往返）
+        index = state.get('_task_index') or {}
+        pos = index.get(str(task_id))
+        if pos is None or pos >= len(sub_tasks) or sub_tasks[pos].get('task_id') != task_id:
+            # 索引缺失或计划已被替换/修改：重建一次
+            index = {}
+            for i, t in enumerate(sub_tasks):
+                index.setdefault(str(t.get('task_id')), i)
+            state['_task_index'] = index
+            pos = index.get(str(task_id))
+        # 找到与当前任务ID匹配的子任务
+        if pos is not None:
+            sub_tasks[pos]['status'] = 'completed'  # 将其状态更新为"completed"
+            state['_plan_json'] = None  # 计划内容已变化，序列化缓存失效
+
+    def _run_mcp(self, coro):
+        """
+        Run a coroutine on the persistent MCP event loop and wait for it.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            Coroutine result
+        """
+        with self._mcp_loop_lock:
+            if self._mcp_loop is None or self._mcp_loop.is_closed():
+                loop = asyncio.new_event_loop()
+
+                def run_loop(loop=loop):
+                    loop.run_forever()
+                    loop.close()  # stop()之后在循环线程内关闭
+
+                threading.Thread(target=run_loop, name='mcp-loop', daemon=True).start()
+                self._mcp_loop = loop
+            loop = self._mcp_loop
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout=_MCP_TIMEOUT)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        """Close the MCP connection pool and stop the persistent event loop, if started."""
+        with self._mcp_loop_lock:
+            loop, self._mcp_loop = self._mcp_loop, None
+        if loop is not None and not loop.is_closed():
+            if self.mcp:
+                # 连接池绑定在该事件循环上，需在循环内关闭
+                try:
+                    asyncio.run_coroutine_threadsafe(self.mcp.aclose(), loop).result(timeout=5)
+                except Exception:
+                    pass
+            loop.call_soon_threadsafe(loop.stop)
+
+    def __del__(self):
+        # 解释器退出阶段属性可能已被清理，忽略所有异常
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _run_searches(self, pairs: list[tuple[str, str]]) -> list[SearchResult | None]:
+        """
+        Run (query, source) searches concurrently.
+
+        Args:
+            pairs: List of (query, source) pairs
+
+        Returns:
+            Search results in the same order as pairs (None for skipped sources)
+        """
+        slots: list[SearchResult | None] = [None] * len(pairs)
+
+        # 先查缓存，再合并重复请求：同一(source, query)只发起一次，
+        # 本次调用内的重复项复用结果，其他线程正在执行的请求则等待其Future
+        mcp_indices = []
+        other_indices = []
+        owned: dict[tuple[str, str], Future] = {}  # 本次调用负责执行的请求
+        duplicates: list[tuple[int, int]] = []  # (下标, 同键首次出现的下标)
+        waiting: list[tuple[int, Future]] = []  # (下标, 其他调用的在途请求)
+        first_index: dict[tuple[str, str], int] = {}
+        if self._embed_fn is not None:
+            # 语义缓存：先并发计算未精确命中的查询嵌入，避免在下面的循环中逐个串行请求
+            self._prefetch_embeddings(pairs)
+        for i, (query, source) in enumerate(pairs):
+            slots[i] = self._cache_get(query, source)
+            if slots[i] is not None:
+                continue
+            key = self._cache_key(query, source)
+            if key in first_index:
+                duplicates.append((i, first_index[key]))
+                continue
+            first_index[key] = i
+            with self._inflight_lock:
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    owned[key] = self._inflight[key] = Future()
+            if inflight is not None:
+                waiting.append((i, inflight))
+            elif source == 'mcp' and self.mcp:
+                mcp_indices.append(i)
+            else:
+                other_indices.append(i)
+
+        try:
+            if mcp_indices or other_indices:
+                workers = min(_MAX_SEARCH_WORKERS, len(other_indices) + (1 if mcp_indices else 0))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {executor.submit(self._search, *pairs[i]): i for i in other_indices}
+                    mcp_future = (
+                        executor.submit(self._search_mcp_batch, [pairs[i][0] for i in mcp_indices])
+                        if mcp_indices else None
+                    )
+                    # 按提交顺序回填结果，保证结果顺序与串行执行一致
+                    for future, i in futures.items():
+                        slots[i] = future.result()
+                    if mcp_future is not None:
+                        for i, result in zip(mcp_indices, mcp_future.result()):
+                            slots[i] = result
+
+                for i in other_indices + mcp_indices:
+                    self._cache_put(*pairs[i], slots[i])
+        finally:
+            # 无论成功与否都要释放在途请求，避免等待方永久阻塞
+            with self._inflight_lock:
+                for key in owned:
+                    self._inflight.pop(key, None)
+            for key, future in owned.items():
+                future.set_result(slots[first_index[key]])
+
+        # 结果对象在多个请求方之间共享（调用方不修改结果，见execute_task）
+        for i, future in waiting:
+            slots[i] = future.result()
+        for i, first in duplicates:
+            slots[i] = slots[first]
+        return slots
+
+    @staticmethod
+    def _cache_key(query: str, source: str) -> tuple[str, str]:
+        return source, ' '.join(query.split()).lower()
+
+    def _cache_get(self, query: str, source: str) -> SearchResult | None:
+        """Return a fresh cached result, or None on miss."""
+        key = self._cache_key(query, source)
+        with self._search_cache_lock:
+            result = self._cache_lookup(key)
+        if result is None and self._embed_fn is not None:
+            # 精确匹配未命中时，按嵌入相似度查找同一来源的近似查询
+            vector = self._embed(key[1])
+            if vector is not None:
+                best_key = self._most_recent_similar(source, vector)
+                if best_key is not None:
+                    with self._search_cache_lock:
+                        result = self._cache_lookup(best_key)
+        return result
+
+    def _embedding_view(self, source: str) -> tuple[list[tuple[str, str]], list[float], Any]:
+        """
+        Return (keys, stored_at times, vectors) of one source's cached embeddings.
+
+        The vectors are a stacked numpy matrix when numpy is available. The
+        view is rebuilt only after the source's embeddings change.
+        """
+        with self._search_cache_lock:
+            view = self._embedding_views.get(source)
+            if view is not None:
+                return view
+            version = self._embedding_version
+            keys = [key for key in self._search_embeddings if key[0] == source]
+            stored_ats = [self._search_cache[key][0] for key in keys]
+            vectors = [self._search_embeddings[key] for key in keys]
+        # 矩阵在锁外构建，查找期间不阻塞其他线程读写缓存
+        view = (keys, stored_ats, np.asarray(vectors, dtype=float) if np is not None and vectors else vectors)
+        with self._search_cache_lock:
+            # 构建期间嵌入有变化时不保存（下次查找重新构建）
+            if version == self._embedding_version:
+                self._embedding_views[source] = view
+        return view
+
+    def _most_recent_similar(self, source: str, vector: list[float]) -> tuple[str, str] | None:
+        # 相似度达到阈值的条目中取写入时间最新的一条（在锁外计算相似度）
+        keys, stored_ats, vectors = self._embedding_view(source)
+        if not keys:
+            return None
+        threshold = self.similarity_threshold
+        if np is not None:
+            sims = vectors @ np.asarray(vector, dtype=float)
+            candidates = np.flatnonzero(sims >= threshold)
+            if candidates.size == 0:
+                return None
+            return keys[max(candidates.tolist(), key=stored_ats.__getitem__)]
+        best, best_stored_at = None, -math.inf
+        for i, cached_vector in enumerate(vectors):
+            if stored_ats[i] > best_stored_at and sum(a * b for a, b in zip(vector, cached_vector)) >= threshold:
+                best, best_stored_at = i, stored_ats[i]
+        return keys[best] if best is not None else None
+
+    def _prefetch_embeddings(self, pairs: list[tuple[str, str]]) -> None:
+        """
+        Embed the exact-miss queries of a search batch concurrently.
+
+        Embedding is usually a network round trip; computing the vectors up
+        front on the search pool means the per-pair semantic lookups (and
+        the later cache writes) only read the embedding memo.
+        """
+        keys = [self._cache_key(query, source) for query, source in pairs]
+        now = time.monotonic()
+        with self._search_cache_lock:
+            cache, memo = self._search_cache, self._embedding_memo
+            # 精确命中（且未过期）的查询无需嵌入
+            queries = list(dict.fromkeys(
+                key[1] for key in keys
+                if key[1] not in memo and (key not in cache or now - cache[key][0] > _SEARCH_CACHE_TTL)
+            ))
+        if len(queries) > 1:
+            with ThreadPoolExecutor(max_workers=min(_MAX_SEARCH_WORKERS, len(queries))) as executor:
+                list(executor.map(self._embed, queries))
+        elif queries:
+            self._embed(queries[0])
+
+    def _cache_lookup(self, key: tuple[str, str]) -> SearchResult | None:
+        # 调用方需持有_search_cache_lock
+        entry = self._search_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > _SEARCH_CACHE_TTL:
+            del self._search_cache[key]
+            self._drop_embedding(key)
+            return None
+        self._search_cache.move_to_end(key)
+        return result
+
+    def _embed(self, normalized_query: str) -> list[float] | None:
+        """Return the unit-length embedding of a query, or None if it cannot be embedded."""
+        with self._search_cache_lock:
+            if normalized_query in self._embedding_memo:
+                return self._embedding_memo[normalized_query]
+        try:
+            vector = [float(x) for x in self._embed_fn(normalized_query)]
+            norm = math.sqrt(sum(x * x for x in vector))
+            vector = [x / norm for x in vector] if norm else None
+        except Exception:
+            # 嵌入失败不影响搜索，仅退化为精确匹配
+            vector = None
+        with self._search_cache_lock:
+            self._embedding_memo[normalized_query] = vector
+            while len(self._embedding_memo) > _SEARCH_CACHE_SIZE:
+                self._embedding_memo.popitem(last=False)
+        return vector
+
+    def _cache_put(self, query: str, source: str, result: SearchResult | None) -> None:
+        """Cache a successful search result, evicting the least recently used."""
+        # 未执行的搜索(None)和失败结果(含error)不缓存，下次仍会重试
+        if not result or result.get('error'):
+            return
+        key = self._cache_key(query, source)
+        vector = self._embed(key[1]) if self._embed_fn is not None else None
+        with self._search_cache_lock:
+            self._search_cache[key] = (time.monotonic(), result)
+            self._search_cache.move_to_end(key)
+            if vector is not None:
+                self._search_embeddings[key] = vector
+                self._embedding_changed(source)
+            while len(self._search_cache) > _SEARCH_CACHE_SIZE:
+                evicted, _ = self._search_cache.popitem(last=False)
+                self._drop_embedding(evicted)
+
+    def _drop_embedding(self, key: tuple[str, str]) -> None:
+        # 调用方需持有_search_cache_lock
+        if self._search_embeddings.pop(key, None) is not None:
+            self._embedding_changed(key[0])
+
+    def _embedding_changed(self, source: str) -> None:
+        # 调用方需持有_search_cache_lock：该来源的相似度矩阵失效
+        self._embedding_version += 1
+        self._embedding_views.pop(source, None)
+
+    def _search_mcp_batch(self, queries: list[str]) -> list[SearchResult]:
+        """
+        Run several MCP searches as one batch on the persistent event loop.
+
+        Args:
+            queries: Search queries
+
+        Returns:
+            Search results in the same order as queries
+        """
+        outcomes: list = [None] * len(queries)
+        pending = list(range(len(queries)))
+        for attempt in range(_SEARCH_ATTEMPTS):
+            if attempt:
+                time.sleep(_RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                # 单个查询的失败已由MCPClient转换为错误结果，这里只兜底整批失败
+                batch = self._run_mcp(self.mcp.batch_search([queries[i] for i in pending]))
+            except Exception as e:
+                batch = [e] * len(pending)
+            for i, outcome in zip(pending, batch):
+                outcomes[i] = outcome
+            # 只重试瞬时失败（超时/连接错误）的查询
+            pending = [i for i in pending if self._is_transient(outcomes[i])]
+            if not pending:
+                break
+        # 异常转换为与_search一致的错误结果结构
+        return [
+            {'query': query, 'source': 'mcp', 'results': [], 'error': str(outcome)}
+            if isinstance(outcome, BaseException) else outcome
+            for query, outcome in zip(queries, outcomes)
+        ]
+
+    @staticmethod
+    def _is_transient(outcome) -> bool:
+        """Check whether a search outcome (result or exception) is a retryable failure."""
+        if isinstance(outcome, BaseException):
+            return is_transient_error(outcome)
+        return bool(outcome and outcome.get('transient'))
+
+    def _search(self, query: str, source: str) -> SearchResult | None:
         # 方法文档字符串：说明方法功能（执行特定来源的搜索）、参数和返回值
         """
         Perform search using specified source.
@@ -119,31 +593,32 @@ class Researcher:
         Returns:
             Search results or None
         """
-        # 使用try-except捕获搜索过程中的异常
-        try:
-            # 若数据源为'tavily'且tavily工具已初始化，执行tavily搜索
-            if source == 'tavily' and self.tavily:
-                return self.tavily.search(query)
-            # 若数据源为'arxiv'，执行arxiv搜索
-            elif source == 'arxiv':
-                return self.arxiv.search(query)
-            # 若数据源为'mcp'且mcp工具已初始化，执行mcp搜索（MCP为异步，需用asyncio.run调用）
-            elif source == 'mcp' and self.mcp:
-                import asyncio  # 局部导入asyncio模块
-                return asyncio.run(self.mcp.search(query))
-            # 若数据源不支持或工具未初始化，返回None
-            else:
-                return None
-        # 捕获所有可能的异常
-        except Exception as e:
-            # 异常情况下返回包含错误信息的字典（仍保持SearchResult基本结构）
-            return {
-                'query': query,  # 搜索关键词
-                'source': source,  # 数据源
-                'results': [],  # 空结果列表
-                'error': str(e)  # 错误详情字符串
-            }
-    def aggregate_results(self, results: List[SearchResult]) -> Dict:
+        # 若数据源不支持或工具未初始化，返回None
+        search = self._dispatch.get(source)
+        if search is None:
+            return None
+        # 瞬时失败（超时/连接错误）按指数退避重试，其余错误直接返回
+        for attempt in range(_SEARCH_ATTEMPTS):
+            if attempt:
+                time.sleep(_RETRY_BACKOFF * 2 ** (attempt - 1))
+            # 使用try-except捕获搜索过程中的异常
+            try:
+                result = search(query)
+            except Exception as e:
+                if attempt + 1 < _SEARCH_ATTEMPTS and is_transient_error(e):
+                    continue
+                # 异常情况下返回包含错误信息的字典（仍保持SearchResult基本结构）
+                return {
+                    'query': query,  # 搜索关键词
+                    'source': source,  # 数据源
+                    'results': [],  # 空结果列表
+                    'error': str(e)  # 错误详情字符串
+                }
+            # 工具内部已转换为错误结果的瞬时失败同样重试
+            if not (result and result.get('transient')) or attempt + 1 == _SEARCH_ATTEMPTS:
+                return result
+        return result
+    def aggregate_results(self, results: list[SearchResult]) -> dict:
         # 方法文档字符串：说明方法功能（聚合搜索结果）、参数和返回值
         """
         Aggregate and organize search results.
@@ -154,18 +629,19 @@ class Researcher:
         Returns:
             Aggregated results summary
         """
-        # 代码功能注释：按数据源对结果进行分组
+        # 代码功能注释：一次遍历，按数据源累计搜索次数和结果条目数
         # Group results by source
-        by_source = {}  # 用于存储按来源分组的结果字典
-        for result in results:
-            source = result.get('source', 'unknown')  # 获取来源（无则"unknown"）
-            if source not in by_source:
-                by_source[source] = []  # 若该来源首次出现，创建空列表
-            by_source[source].append(result)  # 将结果添加到对应来源的列表中
-
-        # 代码功能注释：计算总体统计信息（结果总数）
-        # Calculate statistics
-        total_results = sum(len(r.get('results', [])) for r in results)
+        if np is not None and len(results) > _NUMPY_MIN_RESULTS:
+            by_source, total_results = self._aggregate_with_numpy(results)
+        else:
+            by_source = defaultdict(lambda: [0, 0])  # 来源 -> [搜索次数, 结果条目数]
+            total_results = 0
+            for result in results:
+                n = len(result.get('results', ()))
+                slot = by_source[result.get('source', 'unknown')]  # 获取来源（无则"unknown"）
+                slot[0] += 1
+                slot[1] += n
+                total_results += n
 
         # 返回包含聚合统计的字典：总搜索次数、总结果数、按来源的详细统计
         return {
@@ -173,13 +649,39 @@ class Researcher:
             'total_results': total_results,  # 所有搜索返回的结果条目总数
             'by_source': {  # 按来源的详细统计
                 source: {
-                    'count': len(source_results),  # 该来源的搜索次数
-                    'total_items': sum(len(r.get('results', [])) for r in source_results)  # 该来源返回的结果条目总数
+                    'count': count,  # 该来源的搜索次数
+                    'total_items': total_items  # 该来源返回的结果条目总数
                 }
-                for source, source_results in by_source.items()
+                for source, (count, total_items) in by_source.items()
             }
         }
     
+    @staticmethod
+    def _aggregate_with_numpy(results: list[SearchResult]) -> tuple[dict[str, list[int]], int]:
+        """
+        Count searches and result items per source with NumPy.
+
+        Args:
+            results: List of search results
+
+        Returns:
+            Tuple of (source -> [search count, item count], total item count)
+        """
+        n = len(results)
+        source_ids: dict[str, int] = {}  # 来源 -> 连续整数编号（按首次出现顺序）
+        ids = np.fromiter(
+            (source_ids.setdefault(r.get('source', 'unknown'), len(source_ids)) for r in results),
+            dtype=np.intp, count=n
+        )
+        counts = np.fromiter((len(r.get('results', ())) for r in results), dtype=np.int64, count=n)
+        searches = np.bincount(ids, minlength=len(source_ids))
+        items = np.bincount(ids, weights=counts, minlength=len(source_ids))
+        by_source = {
+            source: [int(searches[i]), int(items[i])]
+            for source, i in source_ids.items()
+        }
+        return by_source, int(counts.sum())
+
     def extract_relevant_info(self, state: ResearchState) -> str:
         # 方法文档字符串：说明方法功能（提取相关信息）、参数和返回值
         """
@@ -198,56 +700,70 @@ class Researcher:
         if not results:
             return "No research results available."
 
-        # 代码功能注释：整理所有搜索结果条目，提取关键字段
-        # Compile all search results
-        all_items = []  # 用于存储所有结果条目的列表
-        for result in results:
-            for item in result.get('results', []):
-                all_items.append({
-                    'source': result.get('source'),  # 数据来源
-                    'query': result.get('query'),  # 搜索关键词
-                    'title': item.get('title'),  # 条目标题
-                    'snippet': item.get('snippet'),  # 条目摘要
-                    'url': item.get('url')  # 条目链接
-                })
+        # 代码功能注释：惰性遍历搜索结果条目（数据来源, 条目），取满20条即停止
+        # Compile search results (limit to top 20 results)
+        top_items = islice(
+            ((result.get('source'), item) for result in results for item in result.get('results', ())),
+            20
+        )
+
+        search_results = self._format_results_for_prompt(top_items)
+
+        # 相同查询和相同结果条目的摘要直接复用，跳过LLM调用
+        # （按提示词内容取指纹，不含CURRENT_TIME）
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(state['query'].encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(search_results.encode('utf-8'))
+        key = digest.digest()
+        with self._summary_cache_lock:
+            summary = self._summary_cache.get(key)
+            if summary is not None:
+                self._summary_cache.move_to_end(key)
+                return summary
 
         # 代码功能注释：调用大语言模型提取并总结相关信息
         # Use LLM to extract and summarize
         # 加载名为"researcher_extract_info"的提示词模板，传入研究问题和格式化的结果条目（限制前20条）
-        prompt = self.prompt_loader.load(
+        prefix, suffix = self.prompt_loader.load_split(
             'researcher_extract_info',
             query=state['query'],
-            search_results=self._format_results_for_prompt(all_items[:20])  # Limit to top 20 results
+            search_results=search_results
         )
+        prompt = prefix + suffix
 
         # 调用大语言模型生成信息摘要，temperature=0.5（平衡创造性与准确性）
-        summary = self.llm.generate(prompt, temperature=0.5)
+        summary = self.llm.generate(prompt, cache_prefix=prefix, temperature=0.5)
+        if summary:
+            with self._summary_cache_lock:
+                self._summary_cache[key] = summary
+                while len(self._summary_cache) > _SUMMARY_CACHE_SIZE:
+                    self._summary_cache.popitem(last=False)
         # 返回生成的信息摘要
         return summary
-    def _format_results_for_prompt(self, items: List[Dict]) -> str:
+    def _format_results_for_prompt(self, items: Iterable[tuple[str | None, dict]]) -> str:
         # 方法文档字符串：说明方法功能（格式化结果用于提示词）、参数和返回值
         """
         Format search results for LLM prompt.
 
         Args:
-            items: List of search result items
+            items: (source, search result item) pairs
 
         Returns:
             Formatted string
         """
-        # 初始化空列表，用于存储格式化后的结果条目
-        formatted = []
-        # 遍历结果条目并编号（从1开始）
-        for i, item in enumerate(items, 1):
-            # 添加带编号的来源和标题
-            formatted.append(f"\n{i}. [{item.get('source')}] {item.get('title', 'No title')}")
-            # 添加链接（无则显示"N/A"）
-            formatted.append(f"   URL: {item.get('url', 'N/A')}")
-            # 添加摘要（截取前300字符，无则显示"No snippet"）
-            formatted.append(f"   {item.get('snippet', 'No snippet')[:300]}...")
-
-        # 将格式化列表拼接为单个字符串，返回
-        return '\n'.join(formatted)
+        # 每个条目：带编号的来源和标题、链接（无则"N/A"）、摘要（截取前300字符，无则"No snippet"）
+        # 字段值为None时同样使用默认值，避免对None切片出错
+        return '\n'.join(
+            _RESULT_TEMPLATE.format(
+                i=i,
+                source=source,
+                title=item.get('title') or 'No title',
+                url=item.get('url') or 'N/A',
+                snippet=(item.get('snippet') or 'No snippet')[:300]
+            )
+            for i, (source, item) in enumerate(items, 1)
+        )
     
     def __repr__(self) -> str:
         """String representation."""
@@ -9,30 +9,33 @@ import argparse  # 用于解析命令行参数
 import json      # 用于处理配置文件的JSON格式
 import os        # 用于环境变量操作和文件路径处理
 import sys       # 用于系统级操作（如标准输出/错误流、程序退出）
-from dataclasses import dataclass  # 用于定义CLI配置的数据类
+import stat      # 用于读取原配置文件的权限位
+import tempfile  # 用于在配置文件同目录下创建临时文件（原子写入）
+import time      # 用于生成报告的时间戳
+from dataclasses import dataclass, field  # 用于定义CLI配置的数据类
+from functools import lru_cache    # 用于缓存配置文件的解析结果
 from pathlib import Path           # 用于更便捷的文件路径处理
-from typing import Any, Dict, Tuple# 用于类型注解
-from datetime import datetime      # 用于生成报告的时间戳
+from typing import Any, Dict, Optional, Tuple# 用于类型注解
 
 # 导入第三方库：dotenv（加载.env环境变量）、rich（美化CLI输出）
 from dotenv import load_dotenv
 from rich.console import Console
+from rich.markup import escape
 from rich.panel import Panel
-from rich.markdown import Markdown
+from rich.text import Text
 
-# 导入项目内部模块：配置、日志、LLM工厂、智能体、工作流
+# 导入项目内部模块：配置、日志
+# （LLM工厂、智能体、工作流较重，延迟到execute_research中导入；--version和菜单操作无需加载）
 from utils.config import load_config_from_env
+from utils.json_utils import dumps_indent_bytes
 from utils.logger import setup_logger
-from llm.factory import LLMFactory
-from agents.coordinator import Coordinator
-from agents.planner import Planner
-from agents.researcher import Researcher
-from agents.rapporteur import Rapporteur
-from workflow.graph import ResearchWorkflow
 
 console = Console()
 
-@dataclass
+# Python 3.10+ 的dataclass支持slots：固定属性布局、无实例__dict__；更早版本退化为普通dataclass
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_SLOTS)
 class CLIConfig:
     provider: str="deepseek"
     model: str = "deepseek-chat"     # 模型名称（默认deepseek-chat）
@@ -41,20 +44,52 @@ class CLIConfig:
     output_dir: str = "./outputs"    # 报告输出目录（默认./outputs）
     show_steps: bool = False         # 是否显示详细执行步骤（默认关闭）
     output_format: str = "markdown"  # 报告输出格式（markdown/html，默认markdown）
+    # 已创建的输出目录（会话内缓存，output_dir修改时清空；不参与展示和比较）
+    _resolved_output_dir: Optional[Path] = field(default=None, repr=False, compare=False)
+
+def ensure_output_dir(config: CLIConfig) -> Path:
+    """返回输出目录，每个会话只在首次使用时执行mkdir"""
+    if config._resolved_output_dir is None:
+        output_dir = Path(config.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        config._resolved_output_dir = output_dir
+    return config._resolved_output_dir
 
 CONFIG_FILE = Path(__file__).parent.parent.parent / "config.json" # 定义配置文件路径：项目根目录下的config.json（用于持久化保存配置）
 
+# 配置文件是否存在（会话内缓存；None表示尚未检查）
+_CONFIG_EXISTS: Optional[bool] = None
+
+def _config_exists() -> bool:
+    global _CONFIG_EXISTS
+    if _CONFIG_EXISTS is None:
+        _CONFIG_EXISTS = CONFIG_FILE.exists()
+    return _CONFIG_EXISTS
+
 def load_config_from_file() -> Dict[str, Any]:
-    if CONFIG_FILE.exists():
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            console.print(f"[yellow]⚠ config file load failed：{e}，use default config[/yellow]")
+    global _CONFIG_EXISTS
+    # 只stat一次：文件未修改（mtime不变）时直接复用上次的解析结果，同时记录文件是否存在
+    try:
+        mtime_ns = CONFIG_FILE.stat().st_mtime_ns
+    except OSError:
+        _CONFIG_EXISTS = False
+        return {}
+    _CONFIG_EXISTS = True
+    # 返回副本：调用方可以修改而不影响缓存
+    return dict(_load_config_file_cached(mtime_ns))
+
+@lru_cache(maxsize=1)
+def _load_config_file_cached(mtime_ns: int) -> Dict[str, Any]:
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        console.print(f"[yellow]⚠ config file load failed：{escape(str(e))}，use default config[/yellow]")
 
     return {}
 
 def save_config_to_file(config: CLIConfig) -> None:
+    global _CONFIG_EXISTS
     try:
         config_data ={
             "provider": config.provider,
@@ -65,26 +100,74 @@ def save_config_to_file(config: CLIConfig) -> None:
             "show_steps": config.show_steps,
             "output_format": config.output_format,
         }
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config_data, f, indent=2, ensure_ascii=False)
+        # 先写同目录下的临时文件，再原子替换，避免崩溃或并发调用截断配置文件
+        tmp = tempfile.NamedTemporaryFile(
+            "wb", dir=CONFIG_FILE.parent, prefix=".config.", suffix=".tmp",
+            delete=False
+        )
+        try:
+            with tmp:
+                # 一次性序列化为UTF-8字节（orjson可用时走C实现）后整体写入
+                tmp.write(dumps_indent_bytes(config_data))
+                if os.getenv("PDA_FSYNC_CONFIG", "").lower() in ("1", "true", "yes"):
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+            # NamedTemporaryFile以0600创建：沿用原配置文件的权限，首次保存时按umask取默认权限
+            try:
+                mode = stat.S_IMODE(os.stat(CONFIG_FILE).st_mode)
+            except FileNotFoundError:
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+            os.chmod(tmp.name, mode)
+            os.replace(tmp.name, CONFIG_FILE)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+        _load_config_file_cached.cache_clear()
+        _CONFIG_EXISTS = True
         console.print("[green]OK config saved[/green]")
     except Exception as e:
         # 红色错误：提示配置保存失败
-        console.print(f"[red]X config saving failed：{e}[/red]")
+        console.print(f"[red]X config saving failed：{escape(str(e))}[/red]")
+@dataclass(frozen=True)
+class ProviderInfo:
+    env: str            # API密钥对应的环境变量
+    default_model: str  # 默认模型名称
+
+# LLM提供商表：环境变量、默认模型和命令行可选项都从这里派生（dict：O(1)成员判断，保持定义顺序）
+_PROVIDERS: Dict[str, ProviderInfo] = {
+    "deepseek": ProviderInfo("DEEPSEEK_API_KEY", "deepseek-chat"),
+    "openai": ProviderInfo("OPENAI_API_KEY", "gpt-4"),
+    "claude": ProviderInfo("CLAUDE_API_KEY", "claude-3-5-sonnet-20241022"),
+    "gemini": ProviderInfo("GEMINI_API_KEY", "gemini-pro"),
+}
+_PROVIDER_CHOICES = tuple(_PROVIDERS)
+
+# 交互输入校验用的常量集合（frozenset：O(1)成员判断，不在每次调用时重建列表）
+_YES = frozenset({"y", "yes", "是"})
+_NO = frozenset({"n", "no", "否"})
+_FMT = frozenset({"markdown", "md", "html"})
+
+@lru_cache(maxsize=8)
 def get_api_key_for_provider(provider: str) -> str | None:
-    provider_env_map = {
-        "deepseek": "DEEPSEEK_API_KEY",
-        "openai": "OPENAI_API_KEY",
-        "claude": "CLAUDE_API_KEY",
-        "gemini": "GEMINI_API_KEY",
-    }
+    # 结果按提供商缓存；切换提供商后由configure_settings调用cache_clear()刷新
+    info = _PROVIDERS.get(provider.lower())
+    return os.getenv(info.env) if info else None
+
+@lru_cache(maxsize=1)
+def _logger():
+    # 日志处理器每个进程只创建一次，交互模式下多次执行研究时复用
+    return setup_logger()
 
-    env_var = provider_env_map.get(provider.lower())
-    return os.getenv(env_var) if env_var else None
+@lru_cache(maxsize=8)
+def _separator_text(char: str, length: int) -> Text:
+    # 预先构造好样式的Text对象，打印时无需再解析markup
+    return Text(char * length, style="cyan")
 
 def print_separator(char: str = "-", length: int = 70) -> None:
     """打印分隔线（用于美化CLI界面，区分不同模块）"""
-    console.print(f"[cyan]{char * length}[/cyan]")
+    console.print(_separator_text(char, length), highlight=False)
 
 def print_header(text: str) -> None:
     """打印标题（使用rich的Panel组件，带青色边框和加粗文字）"""
@@ -101,20 +184,24 @@ def print_welcome() -> None:
     console.print("[yellow]Welcome to the multi-agent research system based on LangGraph！[/yellow]")
 
     # 显示配置文件状态：存在则绿色提示，不存在则青色说明
-    if CONFIG_FILE.exists():
+    if _config_exists():
         console.print(f"[green]OK config file loaded: {CONFIG_FILE.name}[/green]")
     else:
         console.print("[cyan]i use default config (max_iterations=5, auto_approve=False)[/cyan]")
     console.print()  # 空行分隔
 
+# 主菜单文本在导入时拼好，每次绘制只需一次console.print（一次写入stdout）
+_MENU = (
+    "\n[bold cyan]Main Menu：[/bold cyan]\n\n"  # 菜单标题
+    "  [green]1.[/green] Execute Research Task\n"  # 选项1：执行研究
+    "  [green]2.[/green] Check Available Models\n"  # 选项2：查看模型列表
+    "  [green]3.[/green] Configuration settings\n"      # 选项3：修改系统配置
+    "  [green]4.[/green] Check the current configuration\n"  # 选项4：显示当前配置
+    "  [green]5.[/green] Exit\n"      # 选项5：退出系统（末尾换行即空行分隔）
+)
+
 def print_menu() -> None:
-    console.print("\n[bold cyan]Main Menu：[/bold cyan]\n")  # 菜单标题
-    console.print("  [green]1.[/green] Execute Research Task")  # 选项1：执行研究
-    console.print("  [green]2.[/green] Check Available Models")  # 选项2：查看模型列表
-    console.print("  [green]3.[/green] Configuration settings")      # 选项3：修改系统配置
-    console.print("  [green]4.[/green] Check the current configuration")  # 选项4：显示当前配置
-    console.print("  [green]5.[/green] Exit")      # 选项5：退出系统
-    console.print()  # 空行分隔
+    console.print(_MENU, highlight=False)
 
 def show_models(provider: str) -> None:
     """显示指定LLM提供商的可用模型列表"""
@@ -159,7 +246,7 @@ def configure_settings(config: CLIConfig) -> None:
 
     # 1. 修改LLM提供商（仅支持预定义的4个选项）
     provider_input = input(f"LLM Providers (deepseek/openai/claude/gemini) [{config.provider}]: ").strip().lower()
-    if provider_input and provider_input in ["deepseek", "openai", "claude", "gemini"]:
+    if provider_input and provider_input in _PROVIDERS:
         # 仅当输入与当前值不同时才处理
         if provider_input != config.provider:
             # 检查新提供商对应的API密钥是否存在
@@ -171,17 +258,12 @@ def configure_settings(config: CLIConfig) -> None:
             else:
                 # 更新提供商，并自动调整默认模型
                 config.provider = provider_input
-                model_defaults = {
-                    'deepseek': 'deepseek-chat',
-                    'openai': 'gpt-4',
-                    'claude': 'claude-3-5-sonnet-20241022',
-                    'gemini': 'gemini-pro'
-                }
-                config.model = model_defaults.get(provider_input, config.model)
+                config.model = _PROVIDERS[provider_input].default_model
                 config_changed = True  # 标记配置已修改
+                get_api_key_for_provider.cache_clear()  # 提供商已切换，刷新密钥缓存
                 # 绿色提示：更新成功
                 console.print(f"[green]OK updated provider to {provider_input}，model changed to {config.model}[/green]")
-    elif provider_input and provider_input not in ["deepseek", "openai", "claude", "gemini"]:
+    elif provider_input and provider_input not in _PROVIDERS:
         # 红色错误：提示输入无效提供商
         console.print("[red]X Invalid provider[/red]")
 
@@ -193,9 +275,10 @@ def configure_settings(config: CLIConfig) -> None:
         console.print(f"[green]OK Updated model to {model_input}[/green]")
 
     # 3. 修改最大迭代次数（需输入正整数）
-    try:
-        max_iter_input = input(f"Max Iterations [{config.max_iterations}]: ").strip()
-        if max_iter_input:
+    max_iter_input = input(f"Max Iterations [{config.max_iterations}]: ").strip()
+    if max_iter_input:
+        # 先检查是否全为数字，非数字输入不再走int()抛ValueError的异常路径
+        if max_iter_input.isdecimal():
             new_max_iter = int(max_iter_input)
             # 仅当输入为正整数时才更新
             if new_max_iter > 0:
@@ -204,18 +287,17 @@ def configure_settings(config: CLIConfig) -> None:
                 console.print(f"[green]OKUpdated Max Iterations to {new_max_iter}[/green]")
             else:
                 console.print("[red]X The maximum number of iterations must be greater than 0[/red]")
-    except ValueError:
-        # 捕获非数字输入的异常
-        console.print("[red]X Invalid number[/red]")
+        else:
+            console.print("[red]X Invalid number[/red]")
 
     # 4. 修改自动批准计划（支持y/yes/是或n/no/否）
     auto_approve_input = input(f"Auto Approve (y/n) [{'y' if config.auto_approve else 'n'}]: ").strip().lower()
-    if auto_approve_input in ['y', 'yes', '是']:
+    if auto_approve_input in _YES:
         if not config.auto_approve:
             config.auto_approve = True
             config_changed = True
         console.print("[green]OK auto approve has been enabled[/green]")
-    elif auto_approve_input in ['n', 'no', '否']:
+    elif auto_approve_input in _NO:
         if config.auto_approve:
             config.auto_approve = False
             config_changed = True
@@ -225,14 +307,15 @@ def configure_settings(config: CLIConfig) -> None:
     output_dir_input = input(f"Output Dir [{config.output_dir}]: ").strip()
     if output_dir_input:
         config.output_dir = output_dir_input
+        config._resolved_output_dir = None  # 目录已变更，下次保存报告时重新创建
         config_changed = True
         console.print(f"[green]OK Update Output Dir to {output_dir_input}[/green]")
 
     # 6. 修改输出格式（仅支持markdown/html，输入md会自动转为markdown）
     output_format_input = input(f"Output format (markdown/html) [{config.output_format}]: ").strip().lower()
-    if output_format_input in ['markdown', 'md', 'html']:
+    if output_format_input in _FMT:
         # 规范化格式名称：md → markdown
-        normalized_format = 'markdown' if output_format_input in ['markdown', 'md'] else 'html'
+        normalized_format = 'html' if output_format_input == 'html' else 'markdown'
         if normalized_format != config.output_format:
             config.output_format = normalized_format
             config_changed = True
@@ -242,12 +325,12 @@ def configure_settings(config: CLIConfig) -> None:
 
     # 7. 修改显示步骤（支持y/yes/是或n/no/否）
     show_steps_input = input(f"Show Steps (y/n) [{'y' if config.show_steps else 'n'}]: ").strip().lower()
-    if show_steps_input in ['y', 'yes', '是']:
+    if show_steps_input in _YES:
         if not config.show_steps:
             config.show_steps = True
             config_changed = True
         console.print("[green]OK show steps has been enabled[/green]")
-    elif show_steps_input in ['n', 'no', '否']:
+    elif show_steps_input in _NO:
         if config.show_steps:
             config.show_steps = False
             config_changed = True
@@ -258,7 +341,7 @@ def configure_settings(config: CLIConfig) -> None:
         console.print()  # 空行分隔
         save_choice = input("Do you want to save it as a permanent configuration?？(y/n) [y]: ").strip().lower()
         # 默认为保存（直接回车等同于y）
-        if save_choice in ['', 'y', 'yes', '是']:
+        if not save_choice or save_choice in _YES:
             save_config_to_file(config)
 
     print_separator("-")  # 打印分隔线
@@ -274,52 +357,53 @@ def human_approval_callback(state: Dict[str, Any]) -> Tuple[bool, str]:
     Returns:
         (approved: bool, feedback: str) - 是否批准和用户反馈
     """
-    console.print("\n")  # 空行分隔
-    print_separator("=")  # 打印粗分隔线
-    # 黄色加粗标题：提示用户进行决策
-    console.print("[bold yellow]Waiting for your decision[/bold yellow]\n")
-
-    # 青色提示：显示3个操作选项
-    console.print("[cyan]You can choose: [/cyan]")
-    console.print("  [green]1.[/green] Approve the plan - start implementing the research")
-    console.print("  [green]2.[/green] Reject the plan - Provide feedback to reformulate it")
-    console.print("  [green]3.[/green] Cancel Task - Exit Research")
-    console.print()  # 空行分隔
+    # 循环直到用户做出有效选择（无效输入不再递归，栈深度保持不变）
+    while True:
+        console.print("\n")  # 空行分隔
+        print_separator("=")  # 打印粗分隔线
+        # 黄色加粗标题：提示用户进行决策
+        console.print("[bold yellow]Waiting for your decision[/bold yellow]\n")
+
+        # 青色提示：显示3个操作选项
+        console.print("[cyan]You can choose: [/cyan]")
+        console.print("  [green]1.[/green] Approve the plan - start implementing the research")
+        console.print("  [green]2.[/green] Reject the plan - Provide feedback to reformulate it")
+        console.print("  [green]3.[/green] Cancel Task - Exit Research")
+        console.print()  # 空行分隔
 
-    # 获取用户输入的选择（1-3）
-    choice = input("Please select an operation (1-3): ").strip()
+        # 获取用户输入的选择（1-3）
+        choice = input("Please select an operation (1-3): ").strip()
 
-    # 选择1：批准计划
-    if choice == "1":
-        console.print("[green]OK 计划已批准，开始研究...[/green]\n")
-        print_separator("=")
-        return True, None  # 返回批准状态和空反馈
+        # 选择1：批准计划
+        if choice == "1":
+            console.print("[green]OK 计划已批准，开始研究...[/green]\n")
+            print_separator("=")
+            return True, None  # 返回批准状态和空反馈
 
-    # 选择2：拒绝计划并提供反馈
-    elif choice == "2":
-        console.print("\n[yellow]The plan has been approved; start the research.[/yellow]")
-        console.print("[dim]Tip: You can request to add/remove certain research directions, adjust priorities, etc.[/dim]\n")
+        # 选择2：拒绝计划并提供反馈
+        elif choice == "2":
+            console.print("\n[yellow]The plan has been approved; start the research.[/yellow]")
+            console.print("[dim]Tip: You can request to add/remove certain research directions, adjust priorities, etc.[/dim]\n")
 
-        feedback = input("> ").strip()  # 获取用户反馈
+            feedback = input("> ").strip()  # 获取用户反馈
 
-        # 如果用户未提供反馈，使用默认提示
-        if not feedback:
-            console.print("[yellow]No feedback was provided, so the plan will be regenerated....[/yellow]")
-            feedback = "Please re-optimize the research plan"
+            # 如果用户未提供反馈，使用默认提示
+            if not feedback:
+                console.print("[yellow]No feedback was provided, so the plan will be regenerated....[/yellow]")
+                feedback = "Please re-optimize the research plan"
 
-        console.print(f"\n[cyan]Feedback has been received, and the plan is being reformulated....[/cyan]\n")
-        print_separator("=")
-        return False, feedback  # 返回拒绝状态和用户反馈
+            console.print(f"\n[cyan]Feedback has been received, and the plan is being reformulated....[/cyan]\n")
+            print_separator("=")
+            return False, feedback  # 返回拒绝状态和用户反馈
 
-    # 选择3：取消任务
-    elif choice == "3":
-        console.print("\n[yellow]The task has been cancelled[/yellow]")
-        raise KeyboardInterrupt("The user cancels the task")  # 抛出中断异常终止工作流
+        # 选择3：取消任务
+        elif choice == "3":
+            console.print("\n[yellow]The task has been cancelled[/yellow]")
+            raise KeyboardInterrupt("The user cancels the task")  # 抛出中断异常终止工作流
 
-    # 无效选择：递归调用自身要求用户重新选择
-    else:
-        console.print("[red]Invalid selection, please make a new decision.[/red]")
-        return human_approval_callback(state)
+        # 无效选择：回到循环开头要求用户重新选择
+        else:
+            console.print("[red]Invalid selection, please make a new decision.[/red]")
 
 
 # 定义执行研究任务的主函数
@@ -337,17 +421,23 @@ def execute_research(config: CLIConfig, query: str = None) -> None:
         console.print("[red]X Research questions cannot be empty[/red]")
         return
 
-    try:
-        # 设置日志记录器
-        logger = setup_logger()
+    # 设置日志记录器（放在try之外：except分支中使用logger时它一定已绑定）
+    logger = _logger()
 
-        # 从环境变量加载配置
+    try:
+        # 延迟导入：只有真正执行研究时才加载LLM SDK、LangGraph和各智能体
+        from llm.factory import LLMFactory
+        from agents.coordinator import Coordinator
+        from agents.planner import Planner
+        from agents.researcher import Researcher
+        from agents.rapporteur import Rapporteur
+        from workflow.graph import ResearchWorkflow
+
+        # 从环境变量加载配置（直接传入CLI选择的提供商，只加载一次）
         console.print("\n[dim]Loading configuration...[/dim]")
-        env_cfg = load_config_from_env()
+        env_cfg = load_config_from_env(provider=config.provider)
 
         # 使用CLI配置覆盖环境变量配置
-        os.environ['LLM_PROVIDER'] = config.provider
-        env_cfg = load_config_from_env()  # 重新加载配置
         env_cfg.llm.model = config.model
         env_cfg.workflow.max_iterations = config.max_iterations
         env_cfg.workflow.auto_approve_plan = config.auto_approve
@@ -393,18 +483,23 @@ def execute_research(config: CLIConfig, query: str = None) -> None:
 
         # 遍历工作流执行过程中的状态更新
         for state_update in stream_iter:
+            # 本次状态更新的所有输出先收集起来，迭代结束时一次性打印（只获取一次Rich锁、一次刷新stdout）
+            # 调试行用Text对象，不经过markup解析；其余字符串仍按markup渲染
+            out: list = []
+
             # 如果开启了详细步骤显示，打印状态更新类型
             if config.show_steps:
-                console.print(f"[dim]state_update type: {type(state_update)}[/dim]")
+                out.append(Text(f"state_update type: {type(state_update)}", style="dim"))
 
             # 遍历状态更新中的每个节点及其状态
             for node_name, state in state_update.items():
                 # 如果开启了详细步骤显示，打印节点名称和状态类型
                 if config.show_steps:
-                    console.print(f"[dim]node: {node_name}, state type: {type(state)}[/dim]")
+                    out.append(Text(f"node: {node_name}, state type: {type(state)}", style="dim"))
 
                 # 处理字典和元组两种状态格式
-                if isinstance(state, tuple):
+                # 精确类型比较（单次指针比较），LangGraph中断事件产出的是普通tuple
+                if type(state) is tuple:
                     # LangGraph可能返回(values, next_node)元组
                     if len(state) >= 1:
                         current_state = state[0] if isinstance(state[0], dict) else state
@@ -413,62 +508,68 @@ def execute_research(config: CLIConfig, query: str = None) -> None:
                 else:
                     current_state = state
 
-                # 确保当前状态是字典格式
-                if not isinstance(current_state, dict):
+                # 确保当前状态是字典格式（普通dict走快速路径；dict子类如AddableValuesDict仍然接受）
+                if type(current_state) is not dict and not isinstance(current_state, dict):
                     if config.show_steps:
-                        console.print(f"[yellow]Warning: state is not dict: {type(current_state)}[/yellow]")
+                        out.append(Text(f"Warning: state is not dict: {type(current_state)}", style="yellow"))
                     continue
 
-                # 获取当前步骤名称
+                # 一次性取出后续分支要用的字段，避免对同一个字典重复get
                 step = current_state.get('current_step', 'unknown')
+                simple_response = current_state.get('simple_response')
+                research_plan = current_state.get('research_plan')
 
                 # 如果开启了详细步骤显示，打印当前步骤
                 if config.show_steps:
-                    console.print(f"[magenta]step: {step}[/magenta]")
+                    out.append(Text(f"step: {step}", style="magenta"))
 
                 # 处理简单响应（如问候或不适当的查询）
-                if current_state.get('simple_response'):
-                    console.print(f"\n{current_state['simple_response']}\n")
-                    current_state = current_state  # 保存状态供后续使用
+                if simple_response:
+                    out.append(f"\n{simple_response}\n")
                     continue
 
                 # 根据当前步骤显示相应的状态信息
                 if step == 'planning':
-                    console.print("[cyan]Creating a research plan...[/cyan]")
-                    if current_state.get('research_plan'):
-                        plan_display = planner.format_plan_for_display(current_state['research_plan'])
-                        console.print(Panel(plan_display, title="Research Plan", border_style="blue"))
+                    out.append("[cyan]Creating a research plan...[/cyan]")
+                    if research_plan:
+                        plan_display = planner.format_plan_for_display(research_plan)
+                        out.append(Panel(plan_display, title="Research Plan", border_style="blue"))
 
                 elif step == 'awaiting_approval':
                     if config.auto_approve:
-                        console.print("[green]OK Plan Auto Approved[/green]")
+                        out.append("[green]OK Plan Auto Approved[/green]")
                     # 交互式批准由stream_interactive中的回调函数处理
 
                 elif step == 'researching':
-                    task = current_state.get('current_task', {})
+                    task = current_state.get('current_task') or {}
                     iteration = current_state.get('iteration_count', 0)
-                    console.print(f"[cyan]researching on {task.get('description', 'unknown task') if task else 'unknown task'}[/cyan]")
-                    console.print(f"[dim]iteration {iteration}/{config.max_iterations}[/dim]")
+                    out.append(f"[cyan]researching on {task.get('description', 'unknown task')}[/cyan]")
+                    out.append(f"[dim]iteration {iteration}/{config.max_iterations}[/dim]")
 
                 elif step == 'generating_report':
-                    console.print("[cyan]Generating the final report...[/cyan]")
+                    out.append("[cyan]Generating the final report...[/cyan]")
+
+            # 在请求下一个状态更新（可能触发人工审核回调）之前输出，保证显示顺序不变
+            if out:
+                console.print(*out, sep="\n")
 
         # 工作流执行结束后处理最终结果
         if current_state and current_state.get('final_report'):
             report = current_state['final_report']
 
-            # 在控制台显示最终报告
-            console.print("\n")
-            console.print(Panel(
-                Markdown(report),
-                title="Research Report",
-                border_style="green"
-            ))
+            # 在控制台显示最终报告（仅交互式终端；输出被重定向时跳过Markdown渲染）
+            if console.is_terminal:
+                from rich.markdown import Markdown
+                console.print("\n")
+                console.print(Panel(
+                    Markdown(report),
+                    title="Research Report",
+                    border_style="green"
+                ))
 
             # 保存报告到文件
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_dir = Path(config.output_dir)
-            output_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = time.strftime('%Y%m%d_%H%M%S')
+            output_dir = ensure_output_dir(config)
 
             # 根据输出格式确定文件扩展名
             file_extension = 'html' if current_state.get('output_format') == 'html' else 'md'
@@ -491,7 +592,8 @@ def execute_research(config: CLIConfig, query: str = None) -> None:
         print_separator("-")
     # 处理其他所有异常
     except Exception as e:
-        console.print(f"\n[red]X Error occured{e}[/red]")
+        # 异常文本可能含有"[...]"（如工具名），转义后再嵌入markup，避免被当成样式标签解析
+        console.print(f"\n[red]X Error occured{escape(str(e))}[/red]")
         logger.exception("Research error")
         print_separator("-")
 
@@ -545,16 +647,17 @@ def interactive_mode(config: CLIConfig) -> int:
                 # 选择4：查看当前配置
                 elif choice == "4":
                     print_separator("-")  # 打印分隔线
-                    console.print("[bold cyan]current configuration[/bold cyan]\n")
-                    # 黄色显示各配置项的当前值（包含提供商、模型、迭代次数等）
-                    console.print(f"  Provider: [yellow]{config.provider}[/yellow]")
-                    console.print(f"  Models: [yellow]{config.model}[/yellow]")
-                    console.print(f"  Max Iterations: [yellow]{config.max_iterations}[/yellow]")
-                    console.print(f"  Auto Approve: [yellow]{'yes' if config.auto_approve else 'no'}[/yellow]")
-                    console.print(f"  Output Dir: [yellow]{config.output_dir}[/yellow]")
-                    console.print(f"  Output Format: [yellow]{config.output_format.upper()}[/yellow]")
-                    console.print(f"  Show Steps: [yellow]{'yes' if config.show_steps else 'no'}[/yellow]")
-                    console.print()  # 空行分隔
+                    # 黄色显示各配置项的当前值（包含提供商、模型、迭代次数等），拼成一段后一次输出
+                    console.print(
+                        "[bold cyan]current configuration[/bold cyan]\n\n"
+                        f"  Provider: [yellow]{config.provider}[/yellow]\n"
+                        f"  Models: [yellow]{config.model}[/yellow]\n"
+                        f"  Max Iterations: [yellow]{config.max_iterations}[/yellow]\n"
+                        f"  Auto Approve: [yellow]{'yes' if config.auto_approve else 'no'}[/yellow]\n"
+                        f"  Output Dir: [yellow]{config.output_dir}[/yellow]\n"
+                        f"  Output Format: [yellow]{config.output_format.upper()}[/yellow]\n"
+                        f"  Show Steps: [yellow]{'yes' if config.show_steps else 'no'}[/yellow]\n"  # 末尾换行即空行分隔
+                    )
                     print_separator("-")  # 打印分隔线
 
                 # 选择5：退出程序
@@ -576,11 +679,11 @@ def interactive_mode(config: CLIConfig) -> int:
                 return 0  # 正常退出
             # 捕获菜单操作中的其他异常
             except Exception as e:
-                console.print(f"\n[red]X An error occurred: {e}[/red]\n")
+                console.print(f"\n[red]X An error occurred: {escape(str(e))}[/red]\n")
 
     # 捕获交互式模式初始化或循环外的系统级异常
     except Exception as e:
-        console.print(f"\n[red]X System error:  {e}[/red]\n")
+        console.print(f"\n[red]X System error:  {escape(str(e))}[/red]\n")
         return 1  # 返回1表示异常退出
 
 
@@ -618,7 +721,7 @@ def parse_args(argv: Any) -> argparse.Namespace:
     parser.add_argument(
         "--provider",
         default=saved_config.get("provider", "deepseek"),
-        choices=["deepseek", "openai", "claude", "gemini"],  # 仅允许预定义选项
+        choices=_PROVIDER_CHOICES,  # 仅允许预定义选项
         help="LLM provider (default: deepseek)"
     )
 
@@ -703,13 +806,7 @@ def main(argv: Any = None) -> int:
 
     # 若未指定模型名称，根据提供商自动填充默认模型
     if not args.model:
-        model_defaults = {
-            'deepseek': 'deepseek-chat',
-            'openai': 'gpt-4',
-            'claude': 'claude-3-5-sonnet-20241022',
-            'gemini': 'gemini-pro'
-        }
-        args.model = model_defaults.get(args.provider, 'deepseek-chat')
+        args.model = _PROVIDERS[args.provider].default_model
 
     # 创建CLIConfig实例：将解析后的参数整理为统一的配置对象
     config = CLIConfig(
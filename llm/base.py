@@ -5,8 +5,9 @@ Defining the abstract base class for all LLM providers.
 """
 
 # 从abc模块导入ABC（抽象基类的基类）和abstractmethod（用于定义抽象方法）
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, Iterator
+from typing import Optional, Dict, Any, AsyncIterator, Iterator, List, Tuple
 
 class BaseLLM(ABC):
     """
@@ -20,12 +21,14 @@ class BaseLLM(ABC):
         self.config = kwargs
 
     @abstractmethod
-    def generate(self, prompt: str, **kwargs) -> str:
+    def generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> str:
         """
         Generate text according to the prompt
 
         Args:
             prompt
+            cache_prefix: leading part of the prompt that is static across calls
+                          and may be cached by the provider (optional)
             **kwargs: additional generating parameters（eg. temperature、max_tokens等）
 
         Returns:
@@ -47,6 +50,77 @@ class BaseLLM(ABC):
         """
         pass
 
+    async def agenerate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> str:
+        """
+        Asynchronously generate text according to the prompt.
+
+        The default implementation runs generate() in a worker thread;
+        providers with an async client should override it.
+
+        Args:
+            prompt
+            cache_prefix: leading part of the prompt that is static across calls (optional)
+            **kwargs: additional generating parameters
+
+        Returns:
+            text response
+        """
+        return await asyncio.to_thread(self.generate, prompt, cache_prefix=cache_prefix, **kwargs)
+
+    def batch_generate(self, prompts: List[str], **kwargs) -> List[str]:
+        """
+        Generate responses for many independent prompts.
+
+        The default implementation awaits agenerate() for all prompts
+        concurrently; providers with a bulk endpoint may override it.
+        Must be called from synchronous code (it runs its own event loop).
+
+        Args:
+            prompts: Input prompts
+            **kwargs: additional generating parameters applied to every prompt
+
+        Returns:
+            Responses in the same order as prompts
+        """
+        async def gather_all() -> List[str]:
+            return list(await asyncio.gather(*(self.agenerate(prompt, **kwargs) for prompt in prompts)))
+        return asyncio.run(gather_all()) if prompts else []
+
+    async def astream_generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """
+        Asynchronous streaming text generation.
+
+        The default implementation pulls chunks from stream_generate() in a
+        worker thread, so the event loop is never blocked on the network.
+
+        Args:
+            prompt
+            cache_prefix: leading part of the prompt that is static across calls (optional)
+            **kwargs: additional generating parameters
+
+        Yields:
+            Text chunks generated during the generation process
+        """
+        # 同步生成器的创建和每次next()都放到线程中执行
+        chunks = await asyncio.to_thread(self.stream_generate, prompt, cache_prefix=cache_prefix, **kwargs)
+        done = object()
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, done)
+            if chunk is done:
+                break
+            yield chunk
+
+    @staticmethod
+    def _split_cache_prefix(prompt: str, cache_prefix: Optional[str]) -> Tuple[Optional[str], str]:
+        """
+        Split the prompt into (cacheable prefix, remaining text).
+
+        Returns (None, prompt) when no usable prefix is given.
+        """
+        if cache_prefix and prompt.startswith(cache_prefix):
+            return cache_prefix, prompt[len(cache_prefix):]
+        return None, prompt
+
     def __repr__(self) -> str:
          """The string representation of an LLM instance."""
          return f"{self.__class__.__name__}(model={self.model})"
\ No newline at end of file
@@ -0,0 +1,243 @@
+"""
+LLM Response Cache
+
+A persistent, content-hash keyed cache for deterministic LLM calls.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from .base import BaseLLM
+
+DEFAULT_CACHE_PATH = Path.home() / ".pda" / "llm_cache.sqlite"
+# 进程内LRU层的容量（在SQLite之前命中，免去加锁查询）
+_MEMO_SIZE = 1024
+# 提示词模板头部的时间戳行（精确到秒），计算缓存键前归一化，否则同一提示词每秒都是新键
+_TIME_LINE_RE = re.compile(r'^CURRENT_TIME: [^\n]*$', re.MULTILINE)
+
+
+class CachedLLM(BaseLLM):
+    """
+    Wraps another LLM and stores responses of low-temperature calls in SQLite.
+
+    Calls whose temperature is above max_temperature (or unset) are creative
+    and always go to the provider; streaming calls are never cached. The
+    CURRENT_TIME line of the prompt is ignored when keying, so the same
+    prompt hits across calls and runs. Hits are served from an in-process
+    LRU before SQLite, and identical async calls that are already in flight
+    share one provider request.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLLM,
+        cache_path: Optional[str] = None,
+        max_temperature: float = 0.3
+    ):
+        """
+        Initialize the cached LLM.
+
+        Args:
+            llm: Wrapped LLM instance
+            cache_path: SQLite file path (default: ~/.pda/llm_cache.sqlite)
+            max_temperature: Highest temperature that is still treated as deterministic
+        """
+        super().__init__(llm.api_key, llm.model)
+        self.llm = llm
+        self.config = llm.config
+        self.max_temperature = max_temperature
+        self._lock = threading.Lock()
+        self._conn = self._connect(Path(cache_path) if cache_path else DEFAULT_CACHE_PATH)
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        # 进行中的异步调用：(事件循环, 缓存键) -> Future，同一循环内的相同请求只发一次
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+    @staticmethod
+    def _connect(path: Path) -> Optional[sqlite3.Connection]:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB)")
+            conn.commit()
+            return conn
+        except (OSError, sqlite3.Error):
+            # 缓存不可用时退化为直接调用，不影响主流程
+            return None
+
+    def _cache_key(self, prompt: str, params: dict) -> Optional[str]:
+        temperature = params.get('temperature')
+        if temperature is None or temperature > self.max_temperature:
+            return None
+        normalized = _TIME_LINE_RE.sub('CURRENT_TIME:', prompt)
+        digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+        extra = json.dumps(params, sort_keys=True, default=str)
+        return f"{self.llm.__class__.__name__}:{self.llm.model}:{digest}:{extra}"
+
+    def _remember(self, key: str, text: str) -> None:
+        # 调用方需持有self._lock
+        self._memo[key] = text
+        self._memo.move_to_end(key)
+        if len(self._memo) > _MEMO_SIZE:
+            self._memo.popitem(last=False)
+
+    def _lookup(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        with self._lock:
+            text = self._memo.get(key)
+            if text is not None:
+                self._memo.move_to_end(key)
+                return text
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def _store(self, key: Optional[str], text: Optional[str]) -> None:
+        if key is None or text is None:
+            return
+        with self._lock:
+            self._remember(key, text)
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", (key, text))
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> str:
+        """
+        Generate text, serving deterministic calls from the cache.
+
+        Args:
+            prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (passed through)
+            **kwargs: Additional generating parameters
+
+        Returns:
+            Generated text
+        """
+        key = self._cache_key(prompt, {**self.config, **kwargs})
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        text = self.llm.generate(prompt, cache_prefix=cache_prefix, **kwargs)
+        self._store(key, text)
+        return text
+
+    async def agenerate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> str:
+        """
+        Asynchronously generate text, serving deterministic calls from the cache.
+
+        Args:
+            prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (passed through)
+            **kwargs: Additional generating parameters
+
+        Returns:
+            Generated text
+        """
+        key = self._cache_key(prompt, {**self.config, **kwargs})
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        if key is None:
+            return await self.llm.agenerate(prompt, cache_prefix=cache_prefix, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        slot = (loop, key)
+        pending = self._inflight.get(slot)
+        if pending is not None:
+            try:
+                # shield：等待方被取消时不影响发起请求的一方
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # 发起方被取消，由当前调用自己请求
+
+        future = loop.create_future()
+        self._inflight[slot] = future
+        try:
+            text = await self.llm.agenerate(prompt, cache_prefix=cache_prefix, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 标记异常已读取，没有等待方时不产生告警
+            raise
+        else:
+            self._store(key, text)
+            future.set_result(text)
+            return text
+        finally:
+            del self._inflight[slot]
+
+    def batch_generate(self, prompts: List[str], **kwargs) -> List[str]:
+        """
+        Generate many responses, sending only cache misses to the wrapped LLM.
+
+        Args:
+            prompts: Input prompts
+            **kwargs: Additional generating parameters applied to every prompt
+
+        Returns:
+            Responses in the same order as prompts
+        """
+        params = {**self.config, **kwargs}
+        keys = [self._cache_key(prompt, params) for prompt in prompts]
+        outputs = [self._lookup(key) for key in keys]
+        missing = [i for i, text in enumerate(outputs) if text is None]
+        if missing:
+            # 未命中的提示词整体交给被包装的LLM（可能走提供商的批处理接口）
+            texts = self.llm.batch_generate([prompts[i] for i in missing], **kwargs)
+            for i, text in zip(missing, texts):
+                self._store(keys[i], text)
+                outputs[i] = text
+        return outputs
+
+    def stream_generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """
+        Stream text from the wrapped LLM (not cached).
+
+        Args:
+            prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (passed through)
+            **kwargs: Additional generating parameters
+
+        Yields:
+            Text chunks
+        """
+        yield from self.llm.stream_generate(prompt, cache_prefix=cache_prefix, **kwargs)
+
+    async def astream_generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """
+        Asynchronously stream text from the wrapped LLM (not cached).
+
+        Args:
+            prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (passed through)
+            **kwargs: Additional generating parameters
+
+        Yields:
+            Text chunks
+        """
+        async for chunk in self.llm.astream_generate(prompt, cache_prefix=cache_prefix, **kwargs):
+            yield chunk
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"CachedLLM({self.llm!r})"
@@ -2,7 +2,7 @@
 Claude LLM Implementation
 """
 
-from typing import Iterator
+from typing import Iterator, List, Dict, Optional
 from anthropic import Anthropic
 from .base import BaseLLM
 
@@ -26,12 +26,33 @@ class ClaudeLLM(BaseLLM):
         super().__init__(api_key, model, **kwargs)
         self.client = Anthropic(api_key=api_key)
 
-    def generate(self, prompt: str, **kwargs) -> str:
+    def _build_content(self, prompt: str, cache_prefix: Optional[str]) -> List[Dict]:
+        """
+        Build the user message content, marking the static prefix as cacheable.
+
+        Args:
+            prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (optional)
+
+        Returns:
+            List of content blocks
+        """
+        prefix, rest = self._split_cache_prefix(prompt, cache_prefix)
+        if prefix is None:
+            return [{"type": "text", "text": prompt}]
+
+        content = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+        if rest:
+            content.append({"type": "text", "text": rest})
+        return content
+
+    def generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> str:
         """
         Generate text using Claude API.
 
         Args:
             prompt: Input prompt
+            cache_prefix: Static leading part of the prompt to cache (optional)
             **kwargs: Additional parameters (temperature, max_tokens, etc.)
 
         Returns:
@@ -46,17 +67,18 @@ class ClaudeLLM(BaseLLM):
 
         response = self.client.messages.create(
             model=self.model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": self._build_content(prompt, cache_prefix)}],
             **params
         )
         return response.content[0].text
 
-    def stream_generate(self, prompt: str, **kwargs) -> Iterator[str]:
+    def stream_generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> Iterator[str]:
         """
         Stream generate text using Claude API.
 
         Args:
             prompt: Input prompt
+            cache_prefix: Static leading part of the prompt to cache (optional)
             **kwargs: Additional parameters
 
         Yields:
@@ -71,7 +93,7 @@ class ClaudeLLM(BaseLLM):
 
         with self.client.messages.stream(
             model=self.model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": self._build_content(prompt, cache_prefix)}],
             **params
         ) as stream:
             for text in stream.text_stream:
@@ -4,10 +4,31 @@ DeepSeek LLM Implementation which uses OPENAI-compatible API
 Thus we can use the OpenAI client.
 """
 
-from typing import Iterator
-from openai import OpenAI
+import asyncio
+import random
+from typing import AsyncIterator, Iterator, Optional
+from openai import APIConnectionError, AsyncOpenAI, OpenAI, RateLimitError
 from .base import BaseLLM
 
+# 异步调用的默认并发上限与重试策略（指数退避+抖动，上限30秒）
+_DEFAULT_MAX_CONCURRENCY = 8
+_MAX_ATTEMPTS = 5
+_BACKOFF_INITIAL = 1.0
+_BACKOFF_MAX = 30.0
+# 限流/连接失败可重试；其余错误（如参数错误、鉴权失败）直接抛出
+_RETRYABLE = (RateLimitError, APIConnectionError)
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before the next attempt, honouring Retry-After when present."""
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), _BACKOFF_MAX)
+        except ValueError:
+            pass  # HTTP日期格式的Retry-After退回到指数退避
+    return min(_BACKOFF_MAX, _BACKOFF_INITIAL * 2 ** attempt) + random.uniform(0, _BACKOFF_INITIAL)
+
 class DeepSeekLLM(BaseLLM):
     """
     The specific implementation class of the DeepSeek large language model.
@@ -21,19 +42,55 @@ class DeepSeekLLM(BaseLLM):
             base_url: str = "https://api.deepseek.com",
             **kwargs
     ):
+        # max_concurrency只用于限制本地并发，不能作为参数发给API
+        self.max_concurrency = kwargs.pop('max_concurrency', _DEFAULT_MAX_CONCURRENCY)
         # 调用父类BaseLLM的初始化方法，传入API密钥、模型名和额外配置
         super().__init__(api_key, model, **kwargs)
+        self.base_url = base_url
         self.client = OpenAI(
             api_key=api_key,
             base_url=base_url
         )
+        # 异步客户端：底层连接池绑定到事件循环，首次在某个循环中使用时再创建
+        self._aclient: Optional[AsyncOpenAI] = None
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    def _async_client(self) -> AsyncOpenAI:
+        """Return the AsyncOpenAI client bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        # 每次asyncio.run()都会新建事件循环，旧循环上的连接和信号量不能复用
+        if self._aclient is None or self._aclient_loop is not loop:
+            # 重试由_acreate统一处理，关闭SDK自带的重试，避免重试次数叠加
+            self._aclient = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+            self._aclient_loop = loop
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        return self._aclient
 
-    def generate(self, prompt, **kwargs) -> str:
+    async def _acreate(self, **request):
+        """
+        Create a chat completion under the concurrency limit, retrying on
+        rate limits and connection errors with exponential backoff.
+        """
+        client = self._async_client()
+        for attempt in range(_MAX_ATTEMPTS):
+            try:
+                # 只在请求期间占用并发名额，退避等待时释放给其他请求
+                async with self._sem:
+                    return await client.chat.completions.create(**request)
+            except _RETRYABLE as e:
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(_retry_delay(e, attempt))
+
+    def generate(self, prompt, cache_prefix: Optional[str] = None, **kwargs) -> str:
         """
         Generate complete text (non-streaming) via the DeepSeek API。
+        DeepSeek caches repeated prompt prefixes on disk automatically.
 
         Args:
             prompt
+            cache_prefix: static leading part of the prompt (optional)
             **kwargs
         Returns:
             Generated text
@@ -46,8 +103,10 @@ class DeepSeekLLM(BaseLLM):
         )
 
         return response.choices[0].message.content
-    def stream_generate(self, prompt, **kwargs) -> Iterator[str]:
+    def stream_generate(self, prompt, cache_prefix: Optional[str] = None, **kwargs) -> Iterator[str]:
         params = {**self.config, **kwargs}
+        # 必须显式开启stream，否则API返回完整响应对象而不是分块迭代器
+        params['stream'] = True
         stream = self.client.chat.completions.create(
             model=self.model,
             messages = [{"role" : "user", "content": prompt}],
@@ -55,7 +114,61 @@ class DeepSeekLLM(BaseLLM):
         )
 
         for chunk in stream:
-            if chunk.choices[0].data.content is not None:
-                yield chunk.choices[0].delta.content
+            # 部分分块（如用量统计）不含choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta is not None and delta.content:
+                yield delta.content
                 #delta.content: 当前片段的 实际文本内容（如果模型还在生成中，content 是文本片段；如果生成结束，content 会是 None）。
-                #yield: 创建 生成器（Generator） , “返回一个片段，暂停函数执行，下次调用时从暂停处继续”。
\ No newline at end of file
+                #yield: 创建 生成器（Generator） , “返回一个片段，暂停函数执行，下次调用时从暂停处继续”。
+
+    async def agenerate(self, prompt, cache_prefix: Optional[str] = None, **kwargs) -> str:
+        """
+        Asynchronously generate complete text via the DeepSeek API.
+
+        Many prompts can be awaited together under asyncio.gather without
+        tying up a thread per request.
+
+        Args:
+            prompt
+            cache_prefix: static leading part of the prompt (optional)
+            **kwargs
+        Returns:
+            Generated text
+        """
+        params = {**self.config, **kwargs}
+        response = await self._acreate(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        )
+
+        return response.choices[0].message.content
+
+    async def astream_generate(self, prompt, cache_prefix: Optional[str] = None, **kwargs) -> AsyncIterator[str]:
+        """
+        Asynchronously stream text via the DeepSeek API.
+
+        Args:
+            prompt
+            cache_prefix: static leading part of the prompt (optional)
+            **kwargs
+        Yields:
+            Text chunks
+        """
+        params = {**self.config, **kwargs}
+        params['stream'] = True
+        # 流的建立受并发上限和重试保护；建立后逐块读取
+        stream = await self._acreate(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            **params
+        )
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta is not None and delta.content:
+                yield delta.content
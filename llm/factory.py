@@ -2,11 +2,23 @@
 LLM Factory pattern for llm instances
 
 """
+# 导入importlib，用于按模块路径延迟导入LLM实现类
+import importlib
+# 导入threading，用于保证并发首次使用时只导入一次
+import threading
 # 从typing模块导入Optional，用于标注可选类型的参数（如model参数可传None）
 from typing import Optional
 # 从当前目录的base模块导入BaseLLM抽象基类，确保工厂创建的LLM实例都遵循统一接口
 from .base import BaseLLM
 
+# 提供商名称 -> (模块路径, 类名)：新增提供商只需在这里加一行
+_PROVIDER_MODULES = {
+    'openai': ('.openai_llm', 'OpenAILLM'),
+    'claude': ('.claude_llm', 'ClaudeLLM'),
+    'gemini': ('.gemini_llm', 'GeminiLLM'),
+    'deepseek': ('.deepseek_llm', 'DeepSeekLLM'),
+}
+
 class LLMFactory:
     """
     A factory class 
@@ -19,6 +31,8 @@ class LLMFactory:
     """
     # class level private dict，用于存储已注册的LLM提供商：key是提供商名称（小写），value是对应的LLM类
     _providers = {}
+    # 保护延迟导入与注册，避免多线程首次使用时重复导入
+    _load_lock = threading.Lock()
 
     @classmethod
     def register_provider(cls, name: str, provider_class):
@@ -37,7 +51,7 @@ class LLMFactory:
             cls._lazy_load_provider(provider)
 
         if provider not in cls._providers:
-            available = ','.join(cls._providers.key())
+            available = ','.join(sorted({*cls._providers, *_PROVIDER_MODULES}))
             raise ValueError(
                 f"Unsupported LLM provider: {provider}. "
                 f"Available providers: {available}"
@@ -51,25 +65,22 @@ class LLMFactory:
         
     @classmethod
     def _lazy_load_provider(cls, provider: str): #Import only when necessary to reduce resource consumption during initialization
-        try:
-            if provider =="openai":
-                from .openai_llm import OpenAILLM
-                cls.register_provider('openai', OpenAILLM)
-            elif provider == 'claude':
-                # 导入Claude的LLM类（假设文件名为claude_llm.py）
-                from .claude_llm import ClaudeLLM
-                cls.register_provider('claude', ClaudeLLM)
-            elif provider == 'gemini':
-                # 导入Gemini的LLM类（假设文件名为gemini_llm.py）
-                from .gemini_llm import GeminiLLM
-                cls.register_provider('gemini', GeminiLLM)
-            elif provider == 'deepseek':
-                # 导入DeepSeek的LLM类（对应之前实现的DeepSeekLLM，文件名为deepseek_llm.py）
-                from .deepseek_llm import DeepSeekLLM
-                cls.register_provider('deepseek', DeepSeekLLM)
-        except ImportError as e:
-            # Provider module not available
-            pass
+        entry = _PROVIDER_MODULES.get(provider)
+        if entry is None:
+            return
+        module_name, class_name = entry
+        with cls._load_lock:
+            if provider in cls._providers:
+                return
+            try:
+                module = importlib.import_module(module_name, __package__)
+            except ImportError as e:
+                # 提供商的SDK未安装：给出明确提示，而不是报"不支持的提供商"
+                raise ImportError(
+                    f"LLM provider '{provider}' could not be loaded from {module_name}: {e}. "
+                    f"Install the provider's SDK (see requirements.txt)."
+                ) from e
+            cls.register_provider(provider, getattr(module, class_name))
 
     @classmethod
     def list_providers(cls) -> list[str]:
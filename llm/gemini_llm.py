@@ -2,7 +2,7 @@
 Gemini LLM Implementation
 """
 
-from typing import Iterator
+from typing import Iterator, Optional
 import google.generativeai as genai
 from .base import BaseLLM
 
@@ -27,12 +27,13 @@ class GeminiLLM(BaseLLM):
         genai.configure(api_key=api_key)
         self.client = genai.GenerativeModel(model)
 
-    def generate(self, prompt: str, **kwargs) -> str:
+    def generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> str:
         """
         Generate text using Gemini API.
 
         Args:
             prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (unused by Gemini)
             **kwargs: Additional parameters (temperature, max_output_tokens, etc.)
 
         Returns:
@@ -44,12 +45,13 @@ class GeminiLLM(BaseLLM):
         response = self.client.generate_content(prompt, **params)
         return response.text
 
-    def stream_generate(self, prompt: str, **kwargs) -> Iterator[str]:
+    def stream_generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> Iterator[str]:
         """
         Stream generate text using Gemini API.
 
         Args:
             prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (unused by Gemini)
             **kwargs: Additional parameters
 
         Yields:
@@ -2,10 +2,19 @@
 OpenAI LLM Implementation
 """
 
-from typing import Iterator
+import json
+import time
+from typing import Iterator, List, Optional
 from openai import OpenAI
 from .base import BaseLLM
 
+# 达到该数量的提示词才走Batch API（异步离线处理，约半价，但完成时间以分钟计）
+_BATCH_MIN_PROMPTS = 50
+# 轮询批处理状态的退避间隔（秒）
+_BATCH_POLL_INITIAL = 5.0
+_BATCH_POLL_MAX = 60.0
+_BATCH_FAILED = frozenset({'failed', 'expired', 'cancelled'})
+
 
 class OpenAILLM(BaseLLM):
     """
@@ -26,12 +35,16 @@ class OpenAILLM(BaseLLM):
         super().__init__(api_key, model, **kwargs)
         self.client = OpenAI(api_key=api_key)
 
-    def generate(self, prompt: str, **kwargs) -> str:
+    def generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> str:
         """
         Generate text using OpenAI API.
 
+        OpenAI caches identical prompt prefixes automatically, so cache_prefix
+        only needs the prompt to be sent unchanged.
+
         Args:
             prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (optional)
             **kwargs: Additional parameters (temperature, max_tokens, etc.)
 
         Returns:
@@ -47,12 +60,13 @@ class OpenAILLM(BaseLLM):
         )
         return response.choices[0].message.content
 
-    def stream_generate(self, prompt: str, **kwargs) -> Iterator[str]:
+    def stream_generate(self, prompt: str, cache_prefix: Optional[str] = None, **kwargs) -> Iterator[str]:
         """
         Stream generate text using OpenAI API.
 
         Args:
             prompt: Input prompt
+            cache_prefix: Static leading part of the prompt (optional)
             **kwargs: Additional parameters
 
         Yields:
@@ -71,3 +85,68 @@ class OpenAILLM(BaseLLM):
         for chunk in stream:
             if chunk.choices[0].delta.content is not None:
                 yield chunk.choices[0].delta.content
+
+    def batch_generate(self, prompts: List[str], **kwargs) -> List[str]:
+        """
+        Generate responses for many prompts, using the Batch API for bulk jobs.
+
+        Jobs with fewer than _BATCH_MIN_PROMPTS prompts run concurrently
+        through the regular endpoint. Larger jobs are uploaded as one JSONL
+        batch and polled until complete; any prompt the batch did not answer
+        is retried through the regular endpoint.
+
+        Args:
+            prompts: Input prompts
+            **kwargs: Additional parameters applied to every prompt
+
+        Returns:
+            Responses in the same order as prompts
+        """
+        if len(prompts) < _BATCH_MIN_PROMPTS:
+            return super().batch_generate(prompts, **kwargs)
+
+        params = {**self.config, **kwargs}
+        payload = ''.join(
+            json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, "messages": [{"role": "user", "content": prompt}], **params}
+            }, ensure_ascii=False) + "\n"
+            for i, prompt in enumerate(prompts)
+        )
+        input_file = self.client.files.create(
+            file=("batch.jsonl", payload.encode("utf-8")),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+
+        # 指数退避轮询，直到批处理结束
+        delay = _BATCH_POLL_INITIAL
+        while batch.status != 'completed':
+            if batch.status in _BATCH_FAILED:
+                raise RuntimeError(f"OpenAI batch {batch.id} ended with status '{batch.status}'")
+            time.sleep(delay)
+            delay = min(delay * 2, _BATCH_POLL_MAX)
+            batch = self.client.batches.retrieve(batch.id)
+
+        outputs: List[Optional[str]] = [None] * len(prompts)
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line:
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                if response.get('status_code') == 200:
+                    outputs[int(record['custom_id'])] = response['body']['choices'][0]['message']['content']
+
+        # 批处理中失败的单条请求改走普通接口补齐
+        missing = [i for i, text in enumerate(outputs) if text is None]
+        if missing:
+            for i, text in zip(missing, super().batch_generate([prompts[i] for i in missing], **kwargs)):
+                outputs[i] = text
+        return outputs
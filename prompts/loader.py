@@ -1,13 +1,57 @@
 # 导入操作系统相关功能（用于路径处理）
 import os
+# 导入正则模块（用于定位模板中的Jinja标签）
+import re
+# 导入time模块（用于获取当前时间戳）
+import time
+# 导入lru_cache（用于缓存字符串模板的编译结果）
+from functools import lru_cache
 # 导入Path类（用于更便捷的文件路径操作）
 from pathlib import Path
 # 导入类型注解（Dict字典类型、Any任意类型）
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 # 导入datetime类（用于生成当前时间）
 from datetime import datetime
 # 导入Jinja2相关模块（用于模板加载和渲染，Jinja2是Python常用的模板引擎）
-from jinja2 import Environment, FileSystemLoader, Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+# 匹配Jinja变量/语句标签
+_TAG_RE = re.compile(r'\{\{.*?\}\}|\{%.*?%\}', re.DOTALL)
+# 模板开头的时间戳头部（---/CURRENT_TIME/---），模板原文与渲染结果都能匹配
+_TIME_HEADER_RE = re.compile(r'---\n\s*CURRENT_TIME:[^\n]*\n---\n+')
+# 模板字节码的跨进程缓存目录（可用PDA_JINJA_CACHE_DIR覆盖）
+_BYTECODE_CACHE_DIR = os.getenv("PDA_JINJA_CACHE_DIR") or os.path.expanduser("~/.cache/pda/jinja")
+
+def _bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    # 缓存目录不可写时退化为不缓存字节码，不影响模板加载
+    try:
+        os.makedirs(_BYTECODE_CACHE_DIR, exist_ok=True)
+    except OSError:
+        return None
+    return FileSystemBytecodeCache(directory=_BYTECODE_CACHE_DIR)
+
+# 当前时间字符串缓存：(整秒时间戳, 格式化结果)，同一秒内的渲染复用同一个字符串
+_ts_cache = (0, "")
+
+def _now_str() -> str:
+    global _ts_cache
+    sec = int(time.time())
+    cached_sec, text = _ts_cache
+    if sec != cached_sec:
+        # 整体替换元组，多线程下读到的秒数与字符串始终配对
+        text = datetime.fromtimestamp(sec).strftime('%Y-%m-%d %H:%M:%S')
+        _ts_cache = (sec, text)
+    return text
+
+@lru_cache(maxsize=128)
+def _read_prompt_file(path: str) -> str:
+    # 同一提示词文件只读取解码一次（读取失败抛出的异常不会被缓存）
+    return Path(path).read_text(encoding='utf-8', errors='strict')
+
+@lru_cache(maxsize=256)
+def _compile_string(template_str: str) -> Template:
+    # 同一字符串模板只编译一次（以字符串本身为键，不会因哈希碰撞取错模板）
+    return Template(template_str)
 
 class PromptLoader:
     def __init__(self, prompts_dir: str = None):
@@ -19,13 +63,61 @@ class PromptLoader:
             loader = FileSystemLoader(str(self.prompts_dir)),
             trim_blocks=True,
             lstrip_blocks=True,
-            keep_trailing_newline=True
+            keep_trailing_newline=True,
+            # 模板文件在运行期间不会变化：关闭mtime检查（省去每次get_template的stat），且不淘汰已编译模板
+            auto_reload=False,
+            cache_size=-1,
+            # 编译后的字节码落盘，后续进程加载同一模板时跳过解析和编译
+            bytecode_cache=_bytecode_cache()
         )
+        # 按模板名缓存编译后的Template对象，避免每次调用都重新查找/解析模板文件
+        self._templates: Dict[str, Template] = {}
+        # 按模板名缓存"静态前缀"模板（模板中第一个调用方变量之前的部分）
+        self._prefix_templates: Dict[str, Template] = {}
+        # 按模板名缓存不含任何Jinja标签的提示词原文（None表示需要渲染）
+        self._static: Dict[str, Optional[str]] = {}
+
+    def reload(self) -> None:
+        """
+        Drop every compiled template so edited prompt files are picked up.
+
+        Templates are never re-checked on disk (auto_reload is off), so
+        development workflows call this after changing a prompt.
+        """
+        if self.env.cache is not None:
+            self.env.cache.clear()
+        self._templates.clear()
+        self._prefix_templates.clear()
+        self._static.clear()
+        _read_prompt_file.cache_clear()
+
+    def _get_template(self, prompt_name: str) -> Template:
+        template = self._templates.get(prompt_name)
+        if template is None:
+            template = self.env.get_template(f"{prompt_name}.md")
+            self._templates[prompt_name] = template
+        return template
+
+    def _get_static(self, prompt_name: str) -> Optional[str]:
+        if prompt_name not in self._static:
+            try:
+                source = self.load_raw(prompt_name)
+            except (FileNotFoundError, UnicodeDecodeError):
+                source = None
+            # 没有变量/语句/注释标签时，Jinja渲染结果与原文完全相同，可直接返回原文
+            if source is not None and ('{{' in source or '{%' in source or '{#' in source):
+                source = None
+            self._static[prompt_name] = source
+        return self._static[prompt_name]
+
     def load(self, prompt_name: str, **variables: Any) -> str:
+        static = self._get_static(prompt_name)
+        if static is not None:
+            return static
         if 'CURRENT_TIME' not in variables:
-            variables['CURRENT_TIME'] = datetime.now().strftime('%Y-%m-%D %H:%M:%S')
+            variables['CURRENT_TIME'] = _now_str()
         try:
-            template = self.env.get_template(f"{prompt_name}.md")
+            template = self._get_template(prompt_name)
             rendered = template.render(**variables)
             return rendered
         except Exception as e:
@@ -33,21 +125,65 @@ class PromptLoader:
                 f"Could not load prompt '{prompt_name}' from {self.prompts_dir}: {e}"
             )
         
+    def _get_prefix_template(self, prompt_name: str) -> Template:
+        template = self._prefix_templates.get(prompt_name)
+        if template is None:
+            source = self.load_raw(prompt_name)
+            # 时间戳头部每秒都会变化，不计入静态前缀
+            header = _TIME_HEADER_RE.match(source)
+            if header:
+                source = source[header.end():]
+            match = _TAG_RE.search(source)
+            template = self.env.from_string(source[:match.start()] if match else source)
+            self._prefix_templates[prompt_name] = template
+        return template
+
+    def load_split(self, prompt_name: str, **variables: Any) -> Tuple[str, str]:
+        """
+        Load a prompt split into a static prefix and a dynamic suffix.
+
+        The prefix is the rendered template text before the first caller
+        supplied variable, so it is byte-identical across calls and can be
+        marked as cacheable by the LLM provider. The CURRENT_TIME header is
+        moved to the start of the suffix: prefix + suffix equals
+        load(prompt_name, **variables) with the header placed after the
+        static instructions.
+        """
+        if 'CURRENT_TIME' not in variables:
+            variables['CURRENT_TIME'] = _now_str()
+        rendered = self.load(prompt_name, **variables)
+        header = _TIME_HEADER_RE.match(rendered)
+        if header:
+            time_header, rendered = header.group(), rendered[header.end():]
+        else:
+            time_header = ''
+        try:
+            prefix = self._get_prefix_template(prompt_name).render(**variables)
+        except Exception:
+            prefix = ''
+        if not rendered.startswith(prefix):
+            # trim_blocks/lstrip_blocks可能让截断处的空白与完整渲染不同，取公共前缀
+            prefix = os.path.commonprefix([prefix, rendered])
+        if time_header:
+            # 前缀截到整行，时间戳头部插入在行首，不与截断处的文本粘连
+            prefix = prefix[:prefix.rfind('\n') + 1]
+        return prefix, time_header + rendered[len(prefix):]
+
     def load_raw(self, prompt_name: str) -> str:
         prompt_path = self.prompts_dir / f"{prompt_name}.md"
-        if not prompt_path.exists():
+        try:
+            return _read_prompt_file(str(prompt_path))
+        except FileNotFoundError:
             raise FileNotFoundError(
                 f"Prompt file not found: {prompt_path}"
             )
-        with open(prompt_path, 'r', encoding='utf-8') as f:
-            return f.read()
         
     def render_string(self, template_str: str, **variables: Any) ->str:
         if 'CURRENT_TIME' not in variables:
-            variables['CURRENT_TIME'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            variables['CURRENT_TIME'] = _now_str()
 
-        # 创建Jinja2 Template对象（基于传入的字符串模板）
-        template = Template(template_str)
+        # 获取Jinja2 Template对象（基于传入的字符串模板，编译结果按字符串缓存）
+        template = _compile_string(template_str)
         # 渲染模板并返回结果
         return template.render(**variables)
     
@@ -2,15 +2,87 @@
 arXiv Search Tool
 
 """
-from typing import List, Dict, Optional
+import asyncio
+import os
+import threading
+from functools import lru_cache
+from operator import attrgetter
+from typing import Dict, Iterator, List, Optional
 # 导入arxiv库，用于调用arXiv的API接口（获取学术论文数据）
 import arxiv
+# 导入httpx用于并发下载PDF
+import httpx
 # 从datetime模块导入datetime类，用于生成时间戳
 from datetime import datetime
+# 导入瞬时错误判断：标记可重试的失败结果
+from .errors import is_transient_error
+
+# 取作者姓名（C实现的attrgetter配合map，省去列表推导式的Python帧）
+_author_name = attrgetter('name')
+# 并发下载PDF的上限（遵守arXiv的访问频率要求）
+_PDF_CONCURRENCY = 8
+_PDF_CHUNK_SIZE = 1 << 16
+
+# 进程级共享的arXiv客户端：所有ArxivSearch实例共用同一个限速器，避免每次构造
+_ARXIV_CLIENT: Optional[arxiv.Client] = None
+_ARXIV_CLIENT_LOCK = threading.Lock()
+
+def _get_arxiv_client() -> arxiv.Client:
+    global _ARXIV_CLIENT
+    if _ARXIV_CLIENT is None:
+        with _ARXIV_CLIENT_LOCK:
+            if _ARXIV_CLIENT is None:
+                # 每页最多100条，请求间隔3秒（arXiv API使用规范），失败重试3次
+                _ARXIV_CLIENT = arxiv.Client(page_size=100, delay_seconds=3, num_retries=3)
+    return _ARXIV_CLIENT
 
 class ArxivSearch:
     def __init__(self):
-        self.client = arxiv.Client()
+        self.client = _get_arxiv_client()
+        # 按论文ID缓存查询结果；查询失败会抛出异常，lru_cache不会缓存失败结果
+        self._fetch_paper = lru_cache(maxsize=512)(self._fetch_paper_uncached)
+
+    def iter_search(
+            self,
+            query: str,
+            max_results: int = 5,
+            sort_by: arxiv.SortCriterion = arxiv.SortCriterion.Relevance,
+            sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending
+    ) -> Iterator[Dict]:
+        """
+        Yield formatted papers as arXiv's feed pages arrive.
+
+        Unlike search(), errors propagate to the caller, so consumers can
+        start processing the first papers before the last page is fetched.
+        """
+        search = arxiv.Search(
+            query=query,
+            max_results=max_results,
+            sort_by=sort_by,
+            sort_order=sort_order
+        )
+
+        for paper in self.client.results(search):
+            # 每个属性只读取一次
+            published = paper.published
+            updated = paper.updated
+            yield {
+                'title': paper.title,  # 论文标题
+                'url': paper.entry_id,  # 论文在arXiv的唯一链接（entry ID）
+                'snippet': paper.summary,  # 论文摘要（作为结果预览片段）
+                'relevance_score': None,  # 相关性分数（arXiv API不提供该字段，故设为None）
+                'metadata': {  # 论文元数据（详细信息）
+                    'authors': list(map(_author_name, paper.authors)),  # 作者列表（提取每个作者的姓名）
+                    'published': published.isoformat() if published else None,  # 发表时间（转为ISO格式字符串，无则为None）
+                    'updated': updated.isoformat() if updated else None,  # 更新时间（同上）
+                    'categories': paper.categories,  # 论文所属分类（如cs.AI表示计算机科学-人工智能）
+                    'primary_category': paper.primary_category,  # 主要分类
+                    'pdf_url': paper.pdf_url,  # 论文PDF的直接下载链接
+                    'doi': paper.doi,  # DOI编号（数字对象标识符，部分论文有）
+                    'journal_ref': paper.journal_ref,  # 期刊引用信息（如发表在某期刊的卷期页）
+                    'comment': paper.comment  # 论文备注（如页数、会议信息等）
+                }
+            }
 
     def search(
             self,
@@ -20,33 +92,7 @@ class ArxivSearch:
             sort_order: arxiv.SortOrder = arxiv.SortOrder.Descending
     ) -> Dict:
         try:
-            serach = arxiv.Search(
-                query=query,
-                max_results=max_results,
-                sort_by=sort_by,
-                sort_order=sort_order
-            )
-
-            results = [] #store the papers data
-
-            for paper in self.client.results(serach):
-                results.append({
-                    'title': paper.title,  # 论文标题
-                    'url': paper.entry_id,  # 论文在arXiv的唯一链接（entry ID）
-                    'snippet': paper.summary,  # 论文摘要（作为结果预览片段）
-                    'relevance_score': None,  # 相关性分数（arXiv API不提供该字段，故设为None）
-                    'metadata': {  # 论文元数据（详细信息）
-                        'authors': [author.name for author in paper.authors],  # 作者列表（提取每个作者的姓名）
-                        'published': paper.published.isoformat() if paper.published else None,  # 发表时间（转为ISO格式字符串，无则为None）
-                        'updated': paper.updated.isoformat() if paper.updated else None,  # 更新时间（同上）
-                        'categories': paper.categories,  # 论文所属分类（如cs.AI表示计算机科学-人工智能）
-                        'primary_category': paper.primary_category,  # 主要分类
-                        'pdf_url': paper.pdf_url,  # 论文PDF的直接下载链接
-                        'doi': paper.doi,  # DOI编号（数字对象标识符，部分论文有）
-                        'journal_ref': paper.journal_ref,  # 期刊引用信息（如发表在某期刊的卷期页）
-                        'comment': paper.comment  # 论文备注（如页数、会议信息等）
-                    }
-                })
+            results = list(self.iter_search(query, max_results, sort_by, sort_order)) #store the papers data
 
             return {
                 'query': query,  # 原始搜索关键词（便于追溯）
@@ -62,26 +108,31 @@ class ArxivSearch:
                 'source': 'arxiv',
                 'results': [],  # empty result list
                 'timestamp': datetime.now().isoformat(),
-                'error': str(e)  # 
+                'error': str(e),  # 
+                'transient': is_transient_error(e)  # 超时/连接失败，可重试
             }
         
     def get_paper_by_id(self, paper_id: str) -> Optional[Dict]:
         try:
-            search= arxiv.Search(id_list=[paper_id])
-            paper = next(self.client.results(search))
-
-            return{
-                'title': paper.title,
-                'url': paper.entry_id,
-                'summary': paper.summary,  # 完整摘要（区别于search方法的snippet，此处无截断）
-                'authors': [author.name for author in paper.authors],
-                'published': paper.published.isoformat() if paper.published else None,
-                'pdf_url': paper.pdf_url,
-                'categories': paper.categories
-            }
-                
+            paper = self._fetch_paper(paper_id)
         except Exception as e:
             return None
+        # 返回副本：调用方修改结果不会污染缓存
+        return {**paper, 'authors': list(paper['authors']), 'categories': list(paper['categories'])}
+
+    def _fetch_paper_uncached(self, paper_id: str) -> Dict:
+        search= arxiv.Search(id_list=[paper_id])
+        paper = next(self.client.results(search))
+
+        return{
+            'title': paper.title,
+            'url': paper.entry_id,
+            'summary': paper.summary,  # 完整摘要（区别于search方法的snippet，此处无截断）
+            'authors': list(map(_author_name, paper.authors)),
+            'published': paper.published.isoformat() if paper.published else None,
+            'pdf_url': paper.pdf_url,
+            'categories': paper.categories
+        }
         
     def download_pdf(self, paper_id: str, dirpath: str = "./") -> Optional[str]:
         try:
@@ -92,3 +143,65 @@ class ArxivSearch:
             return filepath
         except Exception as e:
             return None
+
+    async def adownload_pdfs(self, paper_ids: List[str], dirpath: str = "./") -> List[Optional[str]]:
+        """
+        Download several papers' PDFs concurrently.
+
+        The PDF URLs are resolved with one arXiv API call for all IDs, then
+        up to _PDF_CONCURRENCY downloads run at once.
+
+        Args:
+            paper_ids: arXiv IDs (with or without version suffix)
+            dirpath: Directory to write the PDFs into
+
+        Returns:
+            File paths in the same order as paper_ids (None where a paper
+            could not be resolved or downloaded)
+        """
+        if not paper_ids:
+            return []
+        try:
+            # 一次API调用批量解析所有ID（arxiv客户端是同步的，放到线程中执行）
+            search = arxiv.Search(id_list=list(paper_ids), max_results=len(paper_ids))
+            papers = await asyncio.to_thread(lambda: list(self.client.results(search)))
+        except Exception as e:
+            return [None] * len(paper_ids)
+
+        # 按带版本号和不带版本号的短ID建立索引，兼容两种输入
+        by_id = {}
+        for paper in papers:
+            short_id = paper.get_short_id()
+            by_id[short_id] = paper
+            by_id.setdefault(short_id.rsplit('v', 1)[0], paper)
+
+        os.makedirs(dirpath, exist_ok=True)
+        semaphore = asyncio.Semaphore(_PDF_CONCURRENCY)
+
+        async def fetch(client: httpx.AsyncClient, paper_id: str) -> Optional[str]:
+            paper = by_id.get(paper_id)
+            if paper is None or not paper.pdf_url:
+                return None
+            filepath = os.path.join(dirpath, f"{paper.get_short_id().replace('/', '_')}.pdf")
+            try:
+                async with semaphore:
+                    async with client.stream("GET", paper.pdf_url) as response:
+                        response.raise_for_status()
+                        with open(filepath, 'wb') as f:
+                            async for chunk in response.aiter_bytes(_PDF_CHUNK_SIZE):
+                                f.write(chunk)
+                return filepath
+            except Exception as e:
+                # 下载失败时删除写了一半的文件
+                try:
+                    os.remove(filepath)
+                except OSError:
+                    pass
+                return None
+
+        async with httpx.AsyncClient(follow_redirects=True, timeout=httpx.Timeout(60.0, connect=10.0)) as client:
+            # 重复的ID只下载一次（避免并发写同一个文件），结果再按输入顺序展开
+            unique_ids = list(dict.fromkeys(paper_ids))
+            paths = await asyncio.gather(*(fetch(client, paper_id) for paper_id in unique_ids))
+        done = dict(zip(unique_ids, paths))
+        return [done[paper_id] for paper_id in paper_ids]
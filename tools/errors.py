@@ -0,0 +1,33 @@
+"""
+Search Tool Errors
+
+Classification of exceptions raised while calling search backends.
+"""
+from typing import Tuple, Type
+
+# 瞬时网络错误：超时和连接失败，重试一次通常即可成功
+_TRANSIENT: Tuple[Type[BaseException], ...] = (TimeoutError, ConnectionError)
+
+try:
+    import requests
+    _TRANSIENT += (requests.Timeout, requests.ConnectionError)
+except ImportError:
+    pass
+
+try:
+    import httpx
+    _TRANSIENT += (httpx.TimeoutException, httpx.NetworkError)
+except ImportError:
+    pass
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Check whether an exception is a transient network error worth retrying.
+
+    Args:
+        error: Exception raised by a search backend
+
+    Returns:
+        True for timeouts and connection failures
+    """
+    return isinstance(error, _TRANSIENT)
@@ -1,8 +1,20 @@
+import asyncio
 from typing import List, Dict, Optional, Any
 # 导入datetime用于生成时间戳
 from datetime import datetime
 # 导入httpx用于异步HTTP请求
 import httpx
+# 导入瞬时错误判断：标记可重试的失败结果
+from .errors import is_transient_error
+# 导入JSON解析（orjson可用时走C实现，直接解析响应字节）
+from utils.json_utils import loads
+
+try:
+    # HTTP/2需要可选依赖h2；未安装时连接池仍然可用，只是走HTTP/1.1
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
 
 class MCPClient:
     def __init__(self, server_url: str, api_key: Optional[str] = None):
@@ -11,6 +23,36 @@ class MCPClient:
         self.headers = {}
         if api_key:
             self.headers['Authorization'] = f'Bearer {api_key}'
+        # 跨调用复用的连接池（keep-alive），绑定到首次使用它的事件循环
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _shared_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        # AsyncClient不能跨事件循环使用：循环变化或已关闭时重新创建
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            # base_url和认证头绑定在客户端上，各请求只需给出相对路径
+            self._client = httpx.AsyncClient(
+                base_url=self.server_url,
+                headers=self.headers,
+                http2=_HTTP2,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+                timeout=httpx.Timeout(30.0, connect=5.0)
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    async def __aenter__(self) -> "MCPClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
 
     async def search(
             self,
@@ -18,40 +60,60 @@ class MCPClient:
             tool_name: str = "web_search",
             **kwargs
     ) -> Dict:
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.server_url}/tools/{tool_name}",
-                    json={
-                        "query":query,
-                        **kwargs
-                    },
-                    headers=self.headers
-                )
-                response.raise_for_status()
+        return await self._search_with(self._shared_client(), query, tool_name, **kwargs)
 
-                data = response.json()
+    async def batch_search(
+            self,
+            queries: List[str],
+            tool_name: str = "web_search",
+            **kwargs
+    ) -> List[Dict]:
+        # 所有查询共用同一连接池，并发执行
+        client = self._shared_client()
+        return list(await asyncio.gather(
+            *(self._search_with(client, query, tool_name, **kwargs) for query in queries)
+        ))
 
-                results = []
+    async def _search_with(
+            self,
+            client: httpx.AsyncClient,
+            query: str,
+            tool_name: str,
+            **kwargs
+    ) -> Dict:
+        try:
+            response = await client.post(
+                f"/tools/{tool_name}",
+                json={
+                    "query":query,
+                    **kwargs
+                }
+            )
+            response.raise_for_status()
 
-                for item in data.get('results', []):
-                    results.append({
-                        'title': item.get('title', ''),
-                        'url': item.get('url', ''),
-                        # 优先使用snippet，如果不存在则使用content
-                        'snippet': item.get('snippet', item.get('content', '')),
-                        'relevance_score': item.get('score'),
-                        'metadata': item.get('metadata', {})
-                    })
+            # 直接解析响应字节，省去先解码为str再交给标准库json的一步
+            data = loads(await response.aread())
 
-                return {
-                    'query': query,
-                    'source': 'mcp',
-                    'tool': tool_name,
-                    'results': results,
-                    'timestamp': datetime.now().isoformat(),
-                    'total_results': len(results)
+            results = [
+                {
+                    'title': item.get('title', ''),
+                    'url': item.get('url', ''),
+                    # 优先使用snippet，如果不存在（或为空）则使用content
+                    'snippet': item.get('snippet') or item.get('content', ''),
+                    'relevance_score': item.get('score'),
+                    'metadata': item.get('metadata') or {}
                 }
+                for item in data.get('results', ())
+            ]
+
+            return {
+                'query': query,
+                'source': 'mcp',
+                'tool': tool_name,
+                'results': results,
+                'timestamp': datetime.now().isoformat(),
+                'total_results': len(results)
+            }
         except Exception as e:
             # 异常处理：返回包含错误信息的字典
             return {
@@ -60,17 +122,16 @@ class MCPClient:
                 'tool': tool_name,
                 'results': [],
                 'timestamp': datetime.now().isoformat(),
-                'error': str(e)
+                'error': str(e),
+                'transient': is_transient_error(e)  # 超时/连接失败，可重试
             }
     async def list_tools(self) -> List[Dict]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.server_url}/tools",
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                return response.json().get('tools', [])
+            response = await self._shared_client().get(
+                "/tools"
+            )
+            response.raise_for_status()
+            return response.json().get('tools', [])
             
         except Exception as e:
             return []
@@ -80,14 +141,12 @@ class MCPClient:
             parameters: Dict[str, Any]
     ) -> Dict:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.server_url}/tools/{tool_name}",
-                    json=parameters,
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self._shared_client().post(
+                f"/tools/{tool_name}",
+                json=parameters
+            )
+            response.raise_for_status()
+            return response.json()
             
         except Exception as e:
             return {
@@ -1,12 +1,28 @@
+import threading
 from typing import List, Dict, Optional
 # 从tavily库导入TavilyClient类，用于调用Tavily的Web搜索API
 from tavily import TavilyClient
 # 从datetime模块导入datetime类，用于生成搜索时间戳
 from datetime import datetime
+# 导入瞬时错误判断：标记可重试的失败结果
+from .errors import is_transient_error
+
+# 按API密钥共享的TavilyClient（进程级单例，多个TavilySearch实例复用同一个客户端）
+_CLIENTS: Dict[str, TavilyClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+def _get_tavily_client(api_key: str) -> TavilyClient:
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        with _CLIENTS_LOCK:
+            client = _CLIENTS.get(api_key)
+            if client is None:
+                client = _CLIENTS[api_key] = TavilyClient(api_key=api_key)
+    return client
 
 class TavilySearch:
     def __init__(self, api_key: str):
-        self.client = TavilyClient(api_key=api_key)
+        self.client = _get_tavily_client(api_key)
     def search(
             self,
             query: str,
@@ -24,10 +40,9 @@ class TavilySearch:
                 exclude_domains=exclude_domains   # 排除域名            
             )
 
-            results = []
-
-            for item in response.get('results', []):
-                results.append({
+            # 列表推导式一次构建结果列表（省去逐条append的方法查找）
+            results = [
+                {
                     'title': item.get('title', ''),  # 结果标题（如网页标题、文章标题）
                     'url': item.get('url', ''),      # 结果对应的网页URL
                     'snippet': item.get('content', ''),  # 结果摘要（网页内容片段，便于快速预览）
@@ -36,7 +51,9 @@ class TavilySearch:
                         'published_date': item.get('published_date'),  # 内容发布时间（如"2024-05-20"，部分结果有）
                         'raw_content': item.get('raw_content')        # 原始内容（完整网页文本，部分结果有）
                     }
-                })
+                }
+                for item in response.get('results', ())
+            ]
             return{
                 'query': query,          # 原始搜索关键词（便于追溯搜索意图）
                 'source': 'tavily',      # 数据来源（明确是Tavily搜索）
@@ -51,7 +68,8 @@ class TavilySearch:
                 'source': 'tavily',
                 'results': [],  # 结果列表为空（无有效结果）
                 'timestamp': datetime.now().isoformat(),
-                'error': str(e)  # 错误详情（转为字符串，如"Invalid API key"）
+                'error': str(e),  # 错误详情（转为字符串，如"Invalid API key"）
+                'transient': is_transient_error(e)  # 超时/连接失败，可重试
             }
     def get_search_context(
         self,
@@ -0,0 +1,29 @@
+"""
+Async helpers shared by the agents and the workflow nodes.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional
+
+
+async def run_in_executor(executor: Optional[Executor], fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a blocking call on an executor and await its result.
+
+    Like asyncio.to_thread, the caller's context variables (e.g. the
+    LangGraph run config) are copied into the worker thread.
+
+    Args:
+        executor: Thread pool to run fn on (None: the event loop's default executor)
+        fn: Blocking callable
+        *args: Positional arguments for fn
+
+    Returns:
+        fn's return value
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(ctx.run, fn, *args))
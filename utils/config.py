@@ -2,9 +2,11 @@
 Configuration Management
 
 """
+import json
 import os
-from typing import Optional, Dict, Any
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple
+from dotenv import find_dotenv, load_dotenv
 from pydantic import BaseModel, Field
 
 class LLMConfig(BaseModel):
@@ -29,40 +31,73 @@ class Config(BaseModel):
     search: SearchConfig
     workflow: WorkflowConfig
 
-def load_config_from_env() -> Config:
+API_KEY_ENV_MAP = {
+    "openai":"OPENAI_API_KEY",
+    "claude": "ANTHROPIC_API_KEY",
+    "gemini": "GOOGLE_API_KEY",
+    "deepseek": "DEEPSEEK_API_KEY"
+}
+
+# load_config_from_env读取的全部环境变量（作为配置缓存的键；LLM_PROVIDER必须排在首位）
+_CONFIG_ENV_VARS = (
+    "LLM_PROVIDER", "LLM_MODEL", "LLM_TEMPERATURE", "LLM_MAX_TOKENS",
+    "TAVILY_API_KEY", "MCP_SERVER_URL", "MCP_API_KEY",
+    "MAX_ITERATIONS", "AUTO_APPROVE_PLAN", "OUTPUT_DIR",
+    *API_KEY_ENV_MAP.values()
+)
+
+@lru_cache(maxsize=1)
+def _load_dotenv_cached(path: str, mtime_ns: int) -> None:
+    load_dotenv(path)
+
+def _load_dotenv() -> None:
+    # 同一个.env文件未修改时只读取一次
+    path = find_dotenv()
+    if path:
+        try:
+            _load_dotenv_cached(path, os.stat(path).st_mtime_ns)
+        except OSError:
+            pass
+
+def load_config_from_env(provider: Optional[str] = None) -> Config:
     #load from .env
-    load_dotenv()
-    llm_provider = os.getenv("LLM_PROVIDER", "deepseek").lower()
-    api_key_map = {
-        "openai":"OPENAI_API_KEY",
-        "claude": "ANTHROPIC_API_KEY",
-        "gemini": "GOOGLE_API_KEY",
-        "deepseek": "DEEPSEEK_API_KEY"
-    }
-
-    api_key_env = api_key_map.get(llm_provider, "OPENAI_API_KEY")
-    llm_api_key = os.getenv(api_key_env)
+    _load_dotenv()
+    snapshot = tuple(os.environ.get(name) for name in _CONFIG_ENV_VARS)
+    # 调用方显式指定提供商时覆盖LLM_PROVIDER（无需写入os.environ再重新加载）
+    if provider is not None:
+        snapshot = (provider,) + snapshot[1:]
+    # 返回深拷贝：调用方可能直接修改配置字段
+    return _build_config_from_env(snapshot).model_copy(deep=True)
+
+@lru_cache(maxsize=4)
+def _build_config_from_env(snapshot: Tuple[Optional[str], ...]) -> Config:
+    # 相关环境变量不变时复用已解析的配置；只从快照中取值，保证与缓存键一致
+    env = {name: value for name, value in zip(_CONFIG_ENV_VARS, snapshot) if value is not None}
+    llm_provider = env.get("LLM_PROVIDER", "deepseek").lower()
+
+    api_key_env = API_KEY_ENV_MAP.get(llm_provider, "OPENAI_API_KEY")
+    llm_api_key = env.get(api_key_env)
     if not llm_api_key:
         raise ValueError(f"API key not found for{llm_provider}. Please set{api_key_env} in .env file")
     
     llm_config = LLMConfig(
         provider=llm_provider,
-        model=os.getenv("LLM_MODEL"),
+        model=env.get("LLM_MODEL"),
         api_key=llm_api_key,
-        temperature=float(os.getenv("LLM_TEMPERATURE", "0.7")),
-        max_tokens=int(os.getenv("LLM_MAX_TOKENS")) if os.getenv("LLM_MAX_TOKENS") else None
+        temperature=float(env.get("LLM_TEMPERATURE", "0.7")),
+        max_tokens=int(env.get("LLM_MAX_TOKENS")) if env.get("LLM_MAX_TOKENS") else None
      )
 
     search_config = SearchConfig(
-        tavily_api_key=os.getenv("TAVILY_API_KEY"),
-        mcp_server_url=os.getenv("MCP_SERVER_URL"),
-        mcp_api_key=os.getenv("MCP_API_KEY")
+        tavily_api_key=env.get("TAVILY_API_KEY"),
+        mcp_server_url=env.get("MCP_SERVER_URL"),
+        mcp_api_key=env.get("MCP_API_KEY")
     )
 
     workflow_config = WorkflowConfig(
-        max_iterations=int(os.getenv("MAX_ITERATIONS", "5")),
-        auto_approve_plan=os.getenv("AUTO_APPROVE_PLAN", "false").lower() == "true",
-        output_dir=os.getenv("OUTPUT_DIR", "./outputs")
+        max_iterations=int(env.get("MAX_ITERATIONS", "5")),
+        auto_approve_plan=env.get("AUTO_APPROVE_PLAN", "false").lower() == "true",
+        output_dir=env.get("OUTPUT_DIR", "./outputs")
     )
 
     return Config(
@@ -81,7 +116,6 @@ def save_config_to_file(config: Config, filepath: str) -> bool:
         return False
     
 def load_config_from_file(filepath: str) -> Config:
-    import json
     with open(filepath, 'r') as f:
         data = json.load(f)
     return Config(**data)
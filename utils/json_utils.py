@@ -0,0 +1,82 @@
+"""
+JSON Utility
+
+Helpers for pulling JSON objects out of LLM responses.
+
+"""
+import json
+import re
+from typing import Any, Dict, Optional, Union
+
+try:
+    # orjson是C实现的JSON解析器，可用时优先使用
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    _loads = json.loads
+
+# 一次扫描定位最外层的 {...} 片段（贪婪匹配：从第一个"{"到最后一个"}"）
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON document, using orjson when available.
+
+    Args:
+        data: JSON text or UTF-8 encoded bytes (e.g. a raw HTTP body)
+
+    Returns:
+        Parsed object
+    """
+    return _loads(data)
+
+def extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract the outermost JSON object from a text response.
+
+    Args:
+        text: Raw LLM response, possibly with extra text around the JSON
+
+    Returns:
+        Parsed dict, or None if no valid JSON object was found
+    """
+    if not text:
+        return None
+    match = _JSON_RE.search(text)
+    if not match:
+        return None
+    try:
+        data = _loads(match.group())
+    except ValueError:
+        # json.JSONDecodeError与orjson.JSONDecodeError均为ValueError子类
+        return None
+    return data if isinstance(data, dict) else None
+
+def dumps_indent(obj: Any) -> str:
+    """
+    Serialize an object to a 2-space indented JSON string.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        Indented JSON text
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+def dumps_indent_bytes(obj: Any) -> bytes:
+    """
+    Serialize an object to 2-space indented UTF-8 JSON bytes.
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        Indented JSON encoded as UTF-8, ready to write to a binary file
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
@@ -5,23 +5,55 @@ This is the logging module for the application
 
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from rich.logging import RichHandler
 from rich.console import Console
 
+# 日志记录不使用线程/进程信息：跳过每条记录上的相关系统调用
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+# 模块级共享的格式化器（控制台与文件共用，只构造一次）
+_FORMATTER = logging.Formatter(
+    "{asctime} {levelname} {name}: {message}",
+    style="{",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+# 文件日志的后台写线程：每个logger名称一个，重新setup某个logger时只停止它自己的
+_file_listeners: Dict[str, logging.handlers.QueueListener] = {}
+
+def _stop_file_listener(name: str) -> None:
+    listener = _file_listeners.pop(name, None)
+    if listener is not None:
+        # stop()会先把队列中剩余的记录写完
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+def _stop_all_file_listeners() -> None:
+    for name in list(_file_listeners):
+        _stop_file_listener(name)
+
+atexit.register(_stop_all_file_listeners)
+
 def setup_logger(
         name: str = "Personal_Deepresearch_Agent",
         level: int = logging.INFO,
         log_file: Optional[str] = None,
         use_rich: bool = True
 ) -> logging.Logger:
-    
     logger = logging.getLogger(name)
     logger.setLevel(level)
     logger.handlers = []
+    _stop_file_listener(name)
 
     if use_rich:
         console_handler = RichHandler(
@@ -36,11 +68,7 @@ def setup_logger(
     console_handler.setLevel(level)
 
     if not use_rich:
-        formatter = logging.Formatter(
-            datefmt="%Y-%m-%D %H:%M:%S"
-        )
-
-        console_handler.setFormatter(formatter)
+        console_handler.setFormatter(_FORMATTER)
 
     logger.addHandler(console_handler)
     if log_file:
@@ -48,11 +76,16 @@ def setup_logger(
         log_path.parent.mkdir(parents=True, exist_ok=True)
         file_handler = logging.FileHandler(log_file, encoding="utf-8")
         file_handler.setLevel(level)
-        file_formatter = logging.Formatter(
-            datefmt="%Y-%m-%D %H:%M:%S"
-        )
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(_FORMATTER)
+        # 磁盘写入放到后台线程：调用方的logger.xxx()只需入队
+        # （控制台RichHandler仍在调用线程输出：QueueHandler会清掉exc_info，影响rich_tracebacks）
+        log_queue: queue.Queue = queue.Queue(-1)
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setLevel(level)
+        logger.addHandler(queue_handler)
+        listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        _file_listeners[name] = listener
 
     return logger
 
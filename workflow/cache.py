@@ -0,0 +1,212 @@
+"""
+Workflow Result Cache
+
+A persistent, fingerprint keyed cache for whole node results (research
+plans and final reports), so repeated runs of the same query skip the
+LLM calls of the planner and rapporteur nodes, and an overflow store
+that keeps the in-state research results bounded.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+from utils.json_utils import loads
+
+DEFAULT_RESULT_CACHE_PATH = Path.home() / ".pda" / "result_cache.sqlite"
+
+
+class ResultCache:
+    """
+    SQLite-backed key/value store for JSON-serializable node results.
+
+    Entries older than ttl seconds are treated as misses. If the database
+    cannot be opened, every lookup misses and writes are dropped.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, ttl: Optional[float] = None):
+        """
+        Initialize the result cache.
+
+        Args:
+            cache_path: SQLite file path (default: ~/.pda/result_cache.sqlite)
+            ttl: Entry lifetime in seconds (None: entries never expire)
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = self._connect(Path(cache_path) if cache_path else DEFAULT_RESULT_CACHE_PATH)
+
+    @staticmethod
+    def _connect(path: Path) -> Optional[sqlite3.Connection]:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB, created REAL)")
+            conn.commit()
+            return conn
+        except (OSError, sqlite3.Error):
+            # 缓存不可用时退化为直接调用，不影响主流程
+            return None
+
+    @staticmethod
+    def key(kind: str, *parts: Any) -> str:
+        """
+        Build a cache key from a result kind and its inputs.
+
+        Args:
+            kind: Result kind (e.g. "plan" or "report")
+            *parts: JSON-serializable inputs the result depends on
+
+        Returns:
+            Cache key
+        """
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+        return f"{kind}:{digest}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on miss or expiry."""
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        if self.ttl is not None and time.time() - created > self.ttl:
+            return None
+        try:
+            return loads(value)
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key."""
+        if self._conn is None or value is None:
+            return
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                    (key, data, time.time())
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+
+DEFAULT_SPILL_PATH = Path.home() / ".pda" / "result_spill.sqlite"
+# 溢出结果的保留时长：出错、被取消或被放弃的运行不会走到报告生成，超时后清理
+DEFAULT_SPILL_TTL = 24 * 3600
+
+
+class ResultSpill:
+    """
+    SQLite-backed overflow store for research results.
+
+    Keeps the in-state result list bounded during long runs: results that
+    do not fit are parked here under the run's spill ID, together with
+    their position in the full result list, and loaded back when the
+    report is generated. Rows of runs that never reach the report are
+    swept once they are older than ttl seconds.
+    """
+
+    def __init__(self, spill_path: Optional[str] = None, ttl: Optional[float] = DEFAULT_SPILL_TTL):
+        """
+        Initialize the spill store.
+
+        Args:
+            spill_path: SQLite file path (default: ~/.pda/result_spill.sqlite)
+            ttl: Lifetime in seconds of spilled rows (None: never swept)
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = self._connect(Path(spill_path) if spill_path else DEFAULT_SPILL_PATH)
+        self.sweep()
+
+    @staticmethod
+    def _connect(path: Path) -> Optional[sqlite3.Connection]:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS spilled_results ("
+                "run_id TEXT, position INTEGER, task_id INTEGER, value BLOB, created REAL, "
+                "PRIMARY KEY (run_id, position))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS spilled_created ON spilled_results (created)")
+            conn.commit()
+            return conn
+        except (OSError, sqlite3.Error):
+            return None
+
+    @property
+    def available(self) -> bool:
+        """Whether results can be spilled (the database could be opened)."""
+        return self._conn is not None
+
+    def put(self, run_id: str, results: List[Tuple[int, dict]]) -> bool:
+        """
+        Spill results for a run.
+
+        Args:
+            run_id: Spill ID of the run
+            results: (position in the full result list, result) pairs
+
+        Returns:
+            True if the results were stored (the caller may drop them)
+        """
+        if self._conn is None:
+            return False
+        now = time.time()
+        rows = [
+            (run_id, position, r.get('task_id'), json.dumps(r, ensure_ascii=False, default=str), now)
+            for position, r in results
+        ]
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO spilled_results (run_id, position, task_id, value, created) "
+                    "VALUES (?, ?, ?, ?, ?)", rows
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                return False
+        return True
+
+    def load(self, run_id: str) -> List[Tuple[int, dict]]:
+        """Return the run's spilled (position, result) pairs ordered by position."""
+        if self._conn is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, value FROM spilled_results WHERE run_id = ? ORDER BY position", (run_id,)
+            ).fetchall()
+        return [(position, loads(value)) for position, value in rows]
+
+    def clear(self, run_id: str) -> None:
+        """Delete the run's spilled results (and sweep expired rows of other runs)."""
+        self._execute("DELETE FROM spilled_results WHERE run_id = ?", (run_id,))
+        # 长时间运行的进程只在打开时清扫一次不够，每次运行结束时顺带清扫
+        self.sweep()
+
+    def sweep(self) -> None:
+        """Delete spilled results older than ttl seconds (runs that never finished)."""
+        if self.ttl is not None:
+            self._execute("DELETE FROM spilled_results WHERE created < ?", (time.time() - self.ttl,))
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        if self._conn is None:
+            return
+        with self._lock:
+            try:
+                self._conn.execute(sql, params)
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
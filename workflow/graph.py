@@ -3,15 +3,36 @@ Research Workflow Graph
 
 This module creates and manages the LangGraph workflow for the research system.
 """
+import asyncio
+import inspect
+import os
+import uuid
+import functools
+from concurrent.futures import Executor
 # 从typing模块导入Optional类型：用于标记可选参数
-from typing import Optional
+from typing import Any, AsyncIterator, List, Optional
+
+# 可选加速：fast-langgraph用Rust实现替换LangGraph的apply_writes等控制面热点，
+# 必须在导入langgraph之前打补丁；未安装或PDA_FAST_LG=0时保持原生实现
+if os.getenv("PDA_FAST_LG", "1") != "0":
+    try:
+        import fast_langgraph
+        fast_langgraph.shim.patch_langgraph()
+        if os.getenv("PDA_FAST_LG_DEBUG"):
+            fast_langgraph.shim.print_status()
+    except (ImportError, AttributeError):
+        pass
 # 从langgraph.graph导入核心组件：StateGraph（工作流图）、END（结束节点）、START（开始节点）
 from langgraph.graph import StateGraph, END, START
 # 从langgraph.checkpoint.memory导入MemorySaver：用于工作流状态的内存存储（检查点）
 from langgraph.checkpoint.memory import MemorySaver
+# 从langchain_core导入RunnableLambda：同时登记节点的同步与异步实现（invoke/ainvoke各取所需）
+from langchain_core.runnables import RunnableLambda
 # 从当前目录导入ResearchState（研究状态类）和WorkflowNodes（工作流节点类）
 from .state import ResearchState
-from .nodes import WorkflowNodes
+from .nodes import WorkflowNodes, _SIMPLE_TYPES, _node_executor
+from .cache import ResultCache
+from .serde import StateSerializer
 # 从agents模块导入所有智能体类（协调者、规划者、研究者、报告生成者）
 from agents.coordinator import Coordinator
 from agents.planner import Planner
@@ -22,7 +43,11 @@ def create_research_graph(
     coordinator: Coordinator,
     planner: Planner,
     researcher: Researcher,
-    rapporteur: Rapporteur
+    rapporteur: Rapporteur,
+    checkpointer: Optional[Any] = None,
+    cache: Optional[ResultCache] = None,
+    interactive: bool = True,
+    executor: Optional[Executor] = None
 ):
     """
     Create the research workflow graph.
@@ -32,20 +57,29 @@ def create_research_graph(
         planner: Planner agent instance
         researcher: Researcher agent instance
         rapporteur: Rapporteur agent instance
+        checkpointer: LangGraph checkpoint saver (default: a new MemorySaver using
+            StateSerializer)
+        cache: Result cache for plans and reports (None disables caching)
+        interactive: Interrupt before human review and checkpoint every step;
+            when False the graph runs straight through without a checkpointer
+            (the plan must be auto-approved)
+        executor: Thread pool for blocking calls in async nodes (default: the
+            process-wide workflow node pool)
 
     Returns:
         Compiled LangGraph workflow
     """
     # Create workflow nodes
-    nodes = WorkflowNodes(coordinator, planner, researcher, rapporteur)
+    nodes = WorkflowNodes(coordinator, planner, researcher, rapporteur, cache=cache, executor=executor)
     # Initialize state graph
     workflow = StateGraph(dict)
     # Add nodes to the graph
-    workflow.add_node("coordinator", nodes.coordinator_node)  # 协调者节点：工作流入口
-    workflow.add_node("planner", nodes.planner_node)          # 规划者节点：创建/修改研究计划
-    workflow.add_node("human_review", nodes.human_review_node)# 人工审核节点：等待用户批准计划
-    workflow.add_node("researcher", nodes.researcher_node)    # 研究者节点：执行信息检索任务
-    workflow.add_node("rapporteur", nodes.rapporteur_node)    # 报告生成者节点：生成最终报告
+    # 每个节点同时提供同步和异步实现：invoke/stream走同步路径，ainvoke/astream走异步路径
+    workflow.add_node("coordinator", RunnableLambda(nodes.coordinator_node, afunc=nodes.acoordinator_node))  # 协调者节点：工作流入口
+    workflow.add_node("planner", RunnableLambda(nodes.planner_node, afunc=nodes.aplanner_node))              # 规划者节点：创建/修改研究计划
+    workflow.add_node("human_review", RunnableLambda(nodes.human_review_node, afunc=nodes.ahuman_review_node))# 人工审核节点：等待用户批准计划
+    workflow.add_node("researcher", RunnableLambda(nodes.researcher_node, afunc=nodes.aresearcher_node))     # 研究者节点：执行信息检索任务
+    workflow.add_node("rapporteur", RunnableLambda(nodes.rapporteur_node, afunc=nodes.arapporteur_node))     # 报告生成者节点：生成最终报告
     # Add edges from START instead of using set_entry_point
     # Coordinator -> conditional edge (simple query ends, research continues)
     workflow.add_edge(START, "coordinator")
@@ -71,7 +105,8 @@ def create_research_graph(
     # Researcher -> conditional edge
     workflow.add_conditional_edges(
         "researcher",                   # 源节点：研究者节点
-        nodes.should_generate_report,    # 条件判断函数：是否需要生成报告
+        # 条件判断函数：是否需要生成报告（可能调用LLM，异步路径下放到线程中执行）
+        RunnableLambda(nodes.should_generate_report, afunc=nodes.ashould_generate_report),
         {                               # 条件结果映射：
             "researcher": "researcher", # 结果为"researcher"→继续执行研究（需更多信息）
             "rapporteur": "rapporteur"  # 结果为"rapporteur"→跳转到报告生成者节点（信息充分）
@@ -79,9 +114,15 @@ def create_research_graph(
     )
     # Rapporteur -> END
     workflow.add_edge("rapporteur", END)
+    if not interactive:
+        # 无需人工审核：不设中断也不挂检查点，省去每个超步的状态序列化
+        return workflow.compile()
     # Compile the graph with checkpointer
     # Add interrupt before human_review for human-in-the-loop
-    checkpointer = MemorySaver()  # 创建内存检查点实例（保存工作流状态）
+    # 未注入检查点实现时使用内存检查点（可替换为持久化实现，或在测试中注入进程内实例）
+    if checkpointer is None:
+        # 研究状态以orjson编码（见StateSerializer），每个超步的检查点写入更快
+        checkpointer = MemorySaver(serde=StateSerializer())
     return workflow.compile(
         checkpointer=checkpointer,       # 传入检查点：支持状态持久化
         interrupt_before=["human_review"]# 在"human_review"节点前中断：等待人工输入
@@ -98,7 +139,11 @@ class ResearchWorkflow:
         coordinator: Coordinator,
         planner: Planner,
         researcher: Researcher,
-        rapporteur: Rapporteur
+        rapporteur: Rapporteur,
+        checkpointer: Optional[Any] = None,
+        cache_ttl: Optional[float] = None,
+        cache_path: Optional[str] = None,
+        executor: Optional[Executor] = None
     ):
         """
         Initialize the research workflow.
@@ -108,16 +153,128 @@ class ResearchWorkflow:
             planner: Planner agent
             researcher: Researcher agent
             rapporteur: Rapporteur agent
+            checkpointer: LangGraph checkpoint saver (default: a new MemorySaver using
+                StateSerializer)
+            cache_ttl: Lifetime in seconds of cached plans and reports; plan/report
+                caching is enabled only when this is set
+            cache_path: SQLite file for the result cache (default: ~/.pda/result_cache.sqlite)
+            executor: Thread pool for blocking calls on the async paths (default:
+                a process-wide pool reserved for workflow nodes, kept apart from
+                the interpreter's default executor); not shut down by the workflow
         """
         # 保存4个智能体实例到类属性
         self.coordinator = coordinator
         self.planner = planner
         self.researcher = researcher
         self.rapporteur = rapporteur
-        # 调用create_research_graph函数创建并保存编译后的工作流图
+        # visualize()生成的Mermaid字符串缓存
+        self._mermaid: Optional[str] = None
+        self._executor = executor
+        # 仅在指定cache_ttl时启用计划/报告缓存（默认每次运行都重新生成）
+        self.cache = ResultCache(cache_path, ttl=cache_ttl) if cache_ttl else None
+        # 图在每个工作流实例中只编译一次，多次运行复用；不跨实例共享，
+        # 工作流释放后智能体（LLM客户端、MCP事件循环线程等）随之释放
         self.graph = create_research_graph(
-            coordinator, planner, researcher, rapporteur
+            coordinator, planner, researcher, rapporteur,
+            checkpointer=checkpointer, cache=self.cache, executor=executor
         )
+        # 无中断、无检查点的直通图，首次自动批准运行时编译
+        self._direct: Optional[Any] = None
+
+    @staticmethod
+    def _thread_config(thread_id: Optional[str]) -> tuple:
+        """
+        Build the checkpointer config for one run.
+
+        Returns:
+            (config, owned) where owned is True if the thread ID was generated
+            here, i.e. no caller can resume or inspect the thread afterwards
+        """
+        # 每次运行使用独立的线程ID：并发/先后运行互不共享检查点
+        owned = thread_id is None
+        config = {"configurable": {"thread_id": uuid.uuid4().hex if owned else thread_id}}
+        return config, owned
+
+    def _prepare(
+        self,
+        query: str,
+        max_iterations: Optional[int],
+        auto_approve: bool,
+        output_format: str,
+        thread_id: Optional[str] = None
+    ) -> tuple:
+        """
+        Build the initial state and checkpointer config shared by all entry points.
+
+        Returns:
+            (initial_state, config, owned), see _thread_config for owned
+        """
+        initial_state = self.coordinator.initialize_research(query, auto_approve=auto_approve, output_format=output_format)
+        # 若指定了最大迭代次数，覆盖默认值
+        initial_state['max_iterations'] = max_iterations or initial_state['max_iterations']
+        config, owned = self._thread_config(thread_id)
+        return initial_state, config, owned
+
+    async def _aprepare(self, *args) -> tuple:
+        # initialize_research会调用LLM分类查询，放到节点线程池中执行，避免阻塞事件循环（批量运行时尤为重要）
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor or _node_executor(), functools.partial(self._prepare, *args))
+
+    def _release_thread(self, config: dict, owned: bool) -> None:
+        # 自动生成的线程在运行结束（无待执行节点）后释放其检查点，避免MemorySaver无限增长；
+        # 停在人工审核中断处的线程保留，调用方传入的线程ID也保留
+        delete = getattr(self.graph.checkpointer, 'delete_thread', None)
+        if not owned or delete is None:
+            return
+        try:
+            if not self.graph.get_state(config).next:
+                delete(config["configurable"]["thread_id"])
+        except Exception:
+            pass
+
+    async def _arelease_thread(self, config: dict, owned: bool) -> None:
+        delete = getattr(self.graph.checkpointer, 'adelete_thread', None)
+        if not owned or delete is None:
+            return
+        try:
+            if not (await self.graph.aget_state(config)).next:
+                await delete(config["configurable"]["thread_id"])
+        except Exception:
+            pass
+
+    @staticmethod
+    def _simple_result(initial_state: dict) -> Optional[dict]:
+        """
+        Return the final state of a simple query, or None for research queries.
+
+        initialize_research already answered greetings and inappropriate
+        queries, and the graph would only pass them from coordinator to END.
+        """
+        if initial_state.get('query_type') in _SIMPLE_TYPES:
+            return {**initial_state, 'current_step': 'completed'}
+        return None
+
+    def _patch_state(self, config: dict, values: dict, **patch: Any) -> None:
+        """
+        Write a patched copy of an already loaded state back to the checkpoint.
+
+        The graph state is a single dict channel, so update_state replaces
+        the whole value; reusing the snapshot values that were read anyway
+        keeps an interrupt to one checkpoint load and one store.
+        """
+        self.graph.update_state(config, {**values, **patch})
+
+    async def _apatch_state(self, config: dict, values: dict, **patch: Any) -> None:
+        await self.graph.aupdate_state(config, {**values, **patch})
+
+    def _get_direct_graph(self):
+        # 自动批准且无需在运行后查看/恢复线程时使用的图（无中断、无检查点）
+        if self._direct is None:
+            self._direct = create_research_graph(
+                self.coordinator, self.planner, self.researcher, self.rapporteur,
+                cache=self.cache, interactive=False, executor=self._executor
+            )
+        return self._direct
 
     # 定义工作流运行方法：同步执行工作流，返回最终研究状态
     def run(
@@ -125,7 +282,8 @@ class ResearchWorkflow:
         query: str,
         max_iterations: Optional[int] = None,
         auto_approve: bool = False,
-        output_format: str = "markdown"
+        output_format: str = "markdown",
+        thread_id: Optional[str] = None
     ) -> dict:
         """
         Run the research workflow.
@@ -135,22 +293,28 @@ class ResearchWorkflow:
             max_iterations: Maximum number of research iterations
             auto_approve: Whether to auto-approve the research plan
             output_format: Output format for the final report ("markdown" or "html")
+            thread_id: Checkpointer thread ID (default: a new unique ID whose
+                checkpoints are released once the run completes)
 
         Returns:
             Final research state
         """
-        # 代码功能注释：第一步——初始化研究状态（调用协调者的initialize_research方法）
+        # 代码功能注释：第一步——初始化研究状态和线程配置（调用协调者的initialize_research方法）
         # Initialize state
-        initial_state = self.coordinator.initialize_research(query, auto_approve=auto_approve, output_format=output_format)
+        initial_state, config, owned = self._prepare(query, max_iterations, auto_approve, output_format, thread_id)
+
+        # 简单查询已由协调者直接回复，无需运行工作流图
+        simple = self._simple_result(initial_state)
+        if simple is not None:
+            return simple
 
-        # 若指定了最大迭代次数，更新初始状态
-        if max_iterations:
-            initial_state['max_iterations'] = max_iterations
+        # 自动批准且未指定线程ID：不会中断，也无需保留检查点，直接走无检查点的图
+        if auto_approve and owned:
+            return self._get_direct_graph().invoke(initial_state)
 
         # 代码功能注释：第二步——执行工作流（传入初始状态和线程配置，确保检查点隔离）
-        # Run the graph with thread configuration for checkpointer
-        config = {"configurable": {"thread_id": "1"}}  # 线程ID：用于区分不同工作流实例的状态
         final_state = self.graph.invoke(initial_state, config=config)  # 同步调用工作流
+        self._release_thread(config, owned)
 
         # 返回工作流结束后的最终状态
         return final_state
@@ -161,7 +325,8 @@ class ResearchWorkflow:
         query: str,
         max_iterations: Optional[int] = None,
         auto_approve: bool = False,
-        output_format: str = "markdown"
+        output_format: str = "markdown",
+        thread_id: Optional[str] = None
     ):
         """
         Stream the research workflow execution.
@@ -171,23 +336,27 @@ class ResearchWorkflow:
             max_iterations: Maximum number of research iterations
             auto_approve: Whether to auto-approve the research plan
             output_format: Output format for the final report ("markdown" or "html")
+            thread_id: Checkpointer thread ID (default: a new unique ID whose
+                checkpoints are released once the run completes)
 
         Yields:
             State updates during execution
         """
-        # 代码功能注释：第一步——初始化研究状态（同run方法）
+        # 代码功能注释：第一步——初始化研究状态和线程配置（同run方法）
         # Initialize state
-        initial_state = self.coordinator.initialize_research(query, auto_approve=auto_approve, output_format=output_format)
+        initial_state, config, owned = self._prepare(query, max_iterations, auto_approve, output_format, thread_id)
 
-        # 若指定了最大迭代次数，更新初始状态
-        if max_iterations:
-            initial_state['max_iterations'] = max_iterations
+        # 简单查询已由协调者直接回复：按协调者节点的输出格式产出一次后结束，无需运行工作流图
+        simple = self._simple_result(initial_state)
+        if simple is not None:
+            yield {"coordinator": simple}
+            return
 
-        # 代码功能注释：第二步——流式执行工作流（逐个生成节点执行后的状态）
-        # Stream the graph execution with thread configuration for checkpointer
-        config = {"configurable": {"thread_id": "1"}}
-        for output in self.graph.stream(initial_state, config=config):  # 流式调用工作流
-            yield output  # 逐个返回状态更新
+        try:
+            for output in self.graph.stream(initial_state, config=config):  # 流式调用工作流
+                yield output  # 逐个返回状态更新
+        finally:
+            self._release_thread(config, owned)
 
     # 定义交互式流式输出方法：支持人工审核回调，实现人机交互
     def stream_interactive(
@@ -196,7 +365,8 @@ class ResearchWorkflow:
         max_iterations: Optional[int] = None,
         auto_approve: bool = False,
         human_approval_callback = None,
-        output_format: str = "markdown"
+        output_format: str = "markdown",
+        thread_id: Optional[str] = None
     ):
         """
         Stream the research workflow execution with interactive human approval.
@@ -208,73 +378,291 @@ class ResearchWorkflow:
             human_approval_callback: Callback function for human approval
                                    Should return (approved: bool, feedback: str)
             output_format: Output format for the final report ("markdown" or "html")
+            thread_id: Checkpointer thread ID (default: a new unique ID whose
+                checkpoints are released once the run completes)
 
         Yields:
             State updates during execution
         """
-        # 代码功能注释：第一步——初始化研究状态（同run方法）
+        # 代码功能注释：第一步——初始化研究状态和线程配置（同run方法）
         # Initialize state
-        initial_state = self.coordinator.initialize_research(query, auto_approve=auto_approve, output_format=output_format)
+        initial_state, config, owned = self._prepare(query, max_iterations, auto_approve, output_format, thread_id)
 
-        # 若指定了最大迭代次数，更新初始状态
-        if max_iterations:
-            initial_state['max_iterations'] = max_iterations
+        # 简单查询已由协调者直接回复：按协调者节点的输出格式产出一次后结束，无需运行工作流图
+        simple = self._simple_result(initial_state)
+        if simple is not None:
+            yield {"coordinator": simple}
+            return
 
-        # 设置工作流配置（线程ID确保状态隔离）
-        config = {"configurable": {"thread_id": "1"}}
-
-        # 标记是否已处理人工审核（避免重复处理）
-        approval_handled = False
-
-        # 代码功能注释：第二步——流式执行工作流，监测中断点（人工审核前）
-        # Stream execution
-        for output in self.graph.stream(initial_state, config=config):
-            # 先返回当前输出（节点执行后的状态）
-            yield output
+        try:
+            # 代码功能注释：第二步——用同一个循环驱动工作流：首轮传入初始状态，
+            # 每次人工审核写回结果后传入None从检查点继续，直到不再中断
+            # Stream execution
+            current_input = initial_state
+            while True:
+                interrupted = False
+                for output in self.graph.stream(current_input, config=config):
+                    # 先返回当前输出（节点执行后的状态）
+                    yield output
+                    # 代码功能注释：第三步——检查是否触发中断（人工审核节点前）
+                    # Check if we hit an interrupt
+                    if "__interrupt__" in output:
+                        interrupted = True
+                if not interrupted:
+                    break
 
-            # 代码功能注释：第三步——检查是否触发中断（人工审核节点前）
-            # Check if we hit an interrupt
-            if "__interrupt__" in output and not approval_handled:
                 # 获取当前工作流的状态快照（从检查点中读取）
                 current_snapshot = self.graph.get_state(config)
                 current_state = current_snapshot.values
 
                 # 代码功能注释：第四步——确认当前状态需要人工审核（存在研究计划）
                 # Check if this state needs approval (we interrupt after planning, before human_review)
-                if isinstance(current_state, dict) and current_state.get('research_plan'):
-                    # 若启用自动批准，直接标记计划为已批准
-                    if auto_approve:
-                        current_state['plan_approved'] = True
-                        current_state['user_feedback'] = None
-                        self.graph.update_state(config, current_state)  # 更新工作流状态
-                    # 若未启用自动批准且有审核回调函数，调用回调获取用户输入
-                    elif human_approval_callback and not current_state.get('plan_approved', False):
-                        # 设置当前步骤为"等待批准"（用于前端显示）
-                        current_state['current_step'] = 'awaiting_approval'
-
-                        # 调用审核回调函数，获取用户的批准结果和反馈
-                        approved, feedback = human_approval_callback(current_state)
-
-                        # 代码功能注释：第五步——根据用户反馈更新状态
-                        # Update the state
-                        if approved:
-                            current_state['plan_approved'] = True
-                            current_state['user_feedback'] = None  # 无反馈（计划通过）
-                        else:
-                            current_state['plan_approved'] = False
-                            current_state['user_feedback'] = feedback  # 保存用户反馈（用于修改计划）
-
-                        # 将更新后的状态写回工作流（检查点）
-                        self.graph.update_state(config, current_state)
-
-                # 标记人工审核已处理（避免重复进入）
-                approval_handled = True
-
-                # 代码功能注释：第六步——继续执行工作流剩余部分（从审核后节点开始）
-                # Continue from this point
-                for continue_output in self.graph.stream(None, config=config):
-                    yield continue_output
-                return  # 处理完审核后退出，避免重复循环
+                if not (isinstance(current_state, dict) and current_state.get('research_plan')):
+                    break
+                # 若启用自动批准，直接标记计划为已批准
+                if auto_approve:
+                    patch = {'plan_approved': True, 'user_feedback': None}
+                # 若未启用自动批准且有审核回调函数，调用回调获取用户输入
+                elif human_approval_callback and not current_state.get('plan_approved', False):
+                    # 设置当前步骤为"等待批准"（用于前端显示）
+                    current_state = {**current_state, 'current_step': 'awaiting_approval'}
+
+                    # 调用审核回调函数，获取用户的批准结果和反馈
+                    approved, feedback = human_approval_callback(current_state)
+
+                    # 代码功能注释：第五步——根据用户反馈更新状态
+                    # Update the state
+                    if approved:
+                        patch = {'plan_approved': True, 'user_feedback': None}  # 无反馈（计划通过）
+                    else:
+                        patch = {'plan_approved': False, 'user_feedback': feedback}  # 保存用户反馈（用于修改计划）
+                elif not current_state.get('plan_approved', False):
+                    # 无法获得审核结果：停在中断处，线程保留供调用方处理
+                    break
+                else:
+                    patch = {}
+
+                # 将更新后的状态写回工作流（检查点，一次读取+一次写入），下一轮从审核节点继续
+                self._patch_state(config, current_state, **patch)
+                current_input = None
+        finally:
+            self._release_thread(config, owned)
+
+    async def arun(
+        self,
+        query: str,
+        max_iterations: Optional[int] = None,
+        auto_approve: bool = False,
+        output_format: str = "markdown",
+        thread_id: Optional[str] = None
+    ) -> dict:
+        """
+        Run the research workflow asynchronously.
+
+        Args:
+            query: Research query
+            max_iterations: Maximum number of research iterations
+            auto_approve: Whether to auto-approve the research plan
+            output_format: Output format for the final report ("markdown" or "html")
+            thread_id: Checkpointer thread ID (default: a new unique ID whose
+                checkpoints are released once the run completes)
+
+        Returns:
+            Final research state
+        """
+        initial_state, config, owned = await self._aprepare(query, max_iterations, auto_approve, output_format, thread_id)
+
+        simple = self._simple_result(initial_state)
+        if simple is not None:
+            return simple
+
+        if auto_approve and owned:
+            return await self._get_direct_graph().ainvoke(initial_state)
+
+        final_state = await self.graph.ainvoke(initial_state, config=config)
+        await self._arelease_thread(config, owned)
+        return final_state
+
+    async def astream(
+        self,
+        query: str,
+        max_iterations: Optional[int] = None,
+        auto_approve: bool = False,
+        output_format: str = "markdown",
+        thread_id: Optional[str] = None,
+        stream_report: bool = False
+    ) -> AsyncIterator[dict]:
+        """
+        Stream the research workflow execution asynchronously.
+
+        Args:
+            query: Research query
+            max_iterations: Maximum number of research iterations
+            auto_approve: Whether to auto-approve the research plan
+            output_format: Output format for the final report ("markdown" or "html")
+            thread_id: Checkpointer thread ID (default: a new unique ID whose
+                checkpoints are released once the run completes)
+            stream_report: Also yield {"report_chunk": {"section": ..., "chunk": ...}}
+                updates while the final report is being generated
+
+        Yields:
+            State updates during execution
+        """
+        initial_state, config, owned = await self._aprepare(query, max_iterations, auto_approve, output_format, thread_id)
+
+        simple = self._simple_result(initial_state)
+        if simple is not None:
+            yield {"coordinator": simple}
+            return
+
+        try:
+            if not stream_report:
+                async for output in self.graph.astream(initial_state, config=config):
+                    yield output
+                return
+            # 同时订阅节点更新与自定义流（rapporteur推送的报告片段）
+            initial_state['_stream_report'] = True
+            async for mode, output in self.graph.astream(
+                initial_state, config=config, stream_mode=["updates", "custom"]
+            ):
+                yield output if mode == "updates" else {"report_chunk": output}
+        finally:
+            await self._arelease_thread(config, owned)
+
+    async def astream_interactive(
+        self,
+        query: str,
+        max_iterations: Optional[int] = None,
+        auto_approve: bool = False,
+        human_approval_callback = None,
+        output_format: str = "markdown",
+        thread_id: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Async variant of stream_interactive.
+
+        Args:
+            query: Research query
+            max_iterations: Maximum number of research iterations
+            auto_approve: Whether to auto-approve the research plan
+            human_approval_callback: Callback function for human approval, plain
+                                   or async; should return (approved: bool, feedback: str)
+            output_format: Output format for the final report ("markdown" or "html")
+            thread_id: Checkpointer thread ID (default: a new unique ID whose
+                checkpoints are released once the run completes)
+
+        Yields:
+            State updates during execution
+        """
+        initial_state, config, owned = await self._aprepare(query, max_iterations, auto_approve, output_format, thread_id)
+
+        simple = self._simple_result(initial_state)
+        if simple is not None:
+            yield {"coordinator": simple}
+            return
+
+        try:
+            current_input = initial_state
+            while True:
+                interrupted = False
+                async for output in self.graph.astream(current_input, config=config):
+                    yield output
+                    if "__interrupt__" in output:
+                        interrupted = True
+                if not interrupted:
+                    break
+
+                current_snapshot = await self.graph.aget_state(config)
+                current_state = current_snapshot.values
+
+                if not (isinstance(current_state, dict) and current_state.get('research_plan')):
+                    break
+                if auto_approve:
+                    patch = {'plan_approved': True, 'user_feedback': None}
+                elif human_approval_callback and not current_state.get('plan_approved', False):
+                    current_state = {**current_state, 'current_step': 'awaiting_approval'}
+
+                    # 回调可以是普通函数，也可以是协程函数
+                    decision = human_approval_callback(current_state)
+                    if inspect.isawaitable(decision):
+                        decision = await decision
+                    approved, feedback = decision
+
+                    if approved:
+                        patch = {'plan_approved': True, 'user_feedback': None}
+                    else:
+                        patch = {'plan_approved': False, 'user_feedback': feedback}
+                elif not current_state.get('plan_approved', False):
+                    break
+                else:
+                    patch = {}
+
+                await self._apatch_state(config, current_state, **patch)
+                current_input = None
+        finally:
+            await self._arelease_thread(config, owned)
+
+    async def arun_batch(
+        self,
+        queries: List[str],
+        max_concurrency: int = 8,
+        max_iterations: Optional[int] = None,
+        auto_approve: bool = True,
+        output_format: str = "markdown"
+    ) -> List[dict]:
+        """
+        Run the research workflow for several queries concurrently.
+
+        The runs share no state. With auto_approve, every query runs straight
+        through on the checkpointer-free graph; otherwise each query runs on
+        its own checkpointer thread and stops at the review interrupt.
+
+        Args:
+            queries: Research queries
+            max_concurrency: Maximum number of queries in flight at once
+            max_iterations: Maximum number of research iterations per query
+            auto_approve: Whether to auto-approve every research plan
+            output_format: Output format for the final reports ("markdown" or "html")
+
+        Returns:
+            Final research states in the same order as queries
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        # 每次批量调用使用独立的线程ID前缀，避免与之前的批次或run/stream的检查点冲突
+        batch_id = uuid.uuid4().hex[:8]
+
+        async def one(index: int, query: str) -> dict:
+            async with semaphore:
+                initial_state, config, _ = await self._aprepare(
+                    query, max_iterations, auto_approve, output_format, f"batch-{batch_id}-{index}"
+                )
+                simple = self._simple_result(initial_state)
+                if simple is not None:
+                    return simple
+                if auto_approve:
+                    # 计划自动批准（human_review_node读取state['auto_approve']），无需中断与检查点
+                    return await self._get_direct_graph().ainvoke(initial_state)
+                # 停在人工审核中断处，线程保留供调用方审核后恢复
+                return await self.graph.ainvoke(initial_state, config=config)
+
+        return list(await asyncio.gather(*(one(i, q) for i, q in enumerate(queries))))
+
+    def run_batch(self, queries: List[str], **kwargs) -> List[dict]:
+        """
+        Run the research workflow for several queries concurrently.
+
+        Synchronous wrapper around arun_batch; must not be called from a
+        running event loop.
+
+        Args:
+            queries: Research queries
+            **kwargs: Options passed to arun_batch
+
+        Returns:
+            Final research states in the same order as queries
+        """
+        return asyncio.run(self.arun_batch(queries, **kwargs))
+
     # 定义获取工作流 schema 的方法：返回工作流的节点和边结构（便于文档或前端展示）
     def get_workflow_schema(self) -> dict:
         """
@@ -326,9 +714,10 @@ class ResearchWorkflow:
         try:
             # 代码功能注释：尝试生成Mermaid格式的可视化图
             # Try to get graph visualization
-            from langgraph.graph import Graph  # 导入Graph类用于绘图
-
-            mermaid = self.graph.get_graph().draw_mermaid()  # 生成Mermaid字符串
+            # 图结构编译后不再变化，Mermaid字符串只生成一次
+            mermaid = self._mermaid
+            if mermaid is None:
+                mermaid = self._mermaid = self.graph.get_graph().draw_mermaid()  # 生成Mermaid字符串
 
             # 若指定输出路径，将Mermaid图保存到文件
             if output_path:
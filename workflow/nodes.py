@@ -1,10 +1,64 @@
+# 导入heapq模块：按原始位置归并保留的与溢出的研究结果
+import heapq
+# 导入os模块：按CPU核数确定线程池大小
+import os
+# 导入threading模块：保护跨线程共享的充分性判断缓存
+import threading
+# 导入uuid模块：为溢出存储和研究步骤生成唯一标识
+import uuid
+# 从collections导入OrderedDict：实现有界的LRU缓存
+from collections import OrderedDict
+# 导入itemgetter：取(位置, 结果)中的位置作为归并键
+from operator import itemgetter
+# 从concurrent.futures导入线程池：异步节点专用的阻塞调用线程池
+from concurrent.futures import Executor, ThreadPoolExecutor
 # 从typing模块导入字典和任意类型的注解，用于定义节点函数的输入输出类型
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 # 从agents模块中导入四个核心智能体类：协调者、规划者、研究者、报告生成者
 from agents.coordinator import Coordinator
 from agents.planner import Planner
 from agents.researcher import Researcher
 from agents.rapporteur import Rapporteur
+# 异步节点中将阻塞的智能体调用放到节点线程池中执行（保留调用方的上下文变量）
+from utils.async_utils import run_in_executor
+try:
+    # 自定义流输出（stream_mode="custom"）：报告片段随生成推送给调用方
+    from langgraph.config import get_stream_writer
+except ImportError:
+    get_stream_writer = None
+# 节点级结果缓存：相同输入的计划/报告直接复用，跳过LLM调用
+from .cache import ResultCache, ResultSpill
+
+# 无需研究的简单查询类型（frozenset，O(1)成员判断，避免每次创建列表）
+_SIMPLE_TYPES = frozenset({'GREETING', 'INAPPROPRIATE'})
+# 上下文充分性判断结果的缓存容量
+_SUFFICIENCY_MEMO_SIZE = 256
+# 状态中保留的研究结果上限：超出部分按相关性溢出到磁盘，生成报告前再取回
+_MAX_STATE_RESULTS = 64
+
+# 异步节点专用线程池（进程级，首次使用时创建）：与解释器默认线程池隔离，
+# 避免与其他asyncio.to_thread使用方争抢线程导致的排队阻塞
+_NODE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_NODE_EXECUTOR_LOCK = threading.Lock()
+
+def _node_executor() -> ThreadPoolExecutor:
+    global _NODE_EXECUTOR
+    if _NODE_EXECUTOR is None:
+        with _NODE_EXECUTOR_LOCK:
+            if _NODE_EXECUTOR is None:
+                _NODE_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=max(8, 4 * (os.cpu_count() or 1)), thread_name_prefix='pda-node'
+                )
+    return _NODE_EXECUTOR
+
+def _result_relevance(result: Dict[str, Any]) -> float:
+    # 一次搜索结果的相关性取其条目中的最高分（无分数按0计）
+    return max((item.get('relevance_score') or 0.0 for item in result.get('results', ())), default=0.0)
+
+def _llm_identity(llm: Any) -> str:
+    # 结果缓存键中的模型标识：(提供商类名, 模型名)；CachedLLM包装时取被包装的LLM
+    inner = getattr(llm, 'llm', llm)
+    return f"{inner.__class__.__name__}:{getattr(inner, 'model', '')}"
 
 class WorkflowNodes:
     """
@@ -16,7 +70,11 @@ class WorkflowNodes:
         coordinator: Coordinator,
         planner: Planner,
         researcher: Researcher,
-        rapporteur: Rapporteur
+        rapporteur: Rapporteur,
+        cache: Optional[ResultCache] = None,
+        max_state_results: Optional[int] = _MAX_STATE_RESULTS,
+        spill: Optional[ResultSpill] = None,
+        executor: Optional[Executor] = None
     ):
         """
         Initialize workflow nodes.
@@ -26,11 +84,145 @@ class WorkflowNodes:
             planner: Planner agent instance
             researcher: Researcher agent instance
             rapporteur: Rapporteur agent instance
+            cache: Result cache for plans and reports (None disables caching)
+            max_state_results: Maximum number of search results kept in the
+                state; the rest is spilled to disk (None keeps everything)
+            spill: Overflow store (default: a ResultSpill opened on first overflow)
+            executor: Thread pool for the blocking agent calls of the async
+                nodes (default: a process-wide pool reserved for workflow nodes)
         """
         self.coordinator = coordinator
         self.planner = planner
         self.researcher = researcher
         self.rapporteur = rapporteur
+        self.cache = cache
+        # 上下文充分性判断缓存：研究步骤标识 -> 判断结果；
+        # 状态未变化时条件边被重复求值（如从检查点恢复）不会重复调用LLM
+        self._sufficiency_memo: "OrderedDict[str, bool]" = OrderedDict()
+        self._sufficiency_lock = threading.Lock()
+        self.max_state_results = max_state_results
+        self._spill = spill
+        self._spill_lock = threading.Lock()
+        self.executor = executor
+
+    async def run_blocking(self, fn, *args):
+        """
+        Run a blocking call on the node thread pool and await its result.
+
+        Args:
+            fn: Blocking callable
+            *args: Positional arguments for fn
+
+        Returns:
+            fn's return value
+        """
+        # 与asyncio.to_thread相同，复制上下文以保留LangGraph的运行配置
+        return await run_in_executor(self.executor or _node_executor(), fn, *args)
+
+    def _get_spill(self) -> ResultSpill:
+        if self._spill is None:
+            with self._spill_lock:
+                if self._spill is None:
+                    self._spill = ResultSpill()
+        return self._spill
+
+    @staticmethod
+    def _result_positions(state: Dict[str, Any], results: list) -> list:
+        # 状态中每条结果在完整（未溢出）结果列表中的位置：溢出前就是下标，
+        # 溢出后已有结果的位置记录在_result_positions中，之后追加的结果依次编号
+        positions = state.get('_result_positions')
+        if positions is None:
+            return list(range(len(results)))
+        start = len(positions) + state.get('_spilled_count', 0)
+        return positions + list(range(start, start + len(results) - len(positions)))
+
+    def _bound_results(self, state: Dict[str, Any]) -> None:
+        """
+        Keep at most max_state_results search results in the state.
+
+        The most relevant results stay (in their original order); the rest
+        is written to the spill store with its original position, so every
+        checkpoint stays bounded and the full order can be restored.
+        """
+        limit = self.max_state_results
+        results = state.get('research_results') or []
+        if limit is None or len(results) <= limit:
+            return
+        spill = self._get_spill()
+        if not spill.available:
+            # 无法落盘时保留全部结果，不丢数据
+            return
+        positions = self._result_positions(state, results)
+        # 按相关性选出保留的下标（sorted稳定，同分时先到的结果优先），保留项维持原有顺序
+        ranked = sorted(range(len(results)), key=lambda i: -_result_relevance(results[i]))
+        keep = set(ranked[:limit])
+        overflow = [(positions[i], r) for i, r in enumerate(results) if i not in keep]
+        run_id = state.get('_spill_id') or uuid.uuid4().hex
+        if not spill.put(run_id, overflow):
+            return
+        state['_spill_id'] = run_id
+        state['research_results'] = [r for i, r in enumerate(results) if i in keep]
+        state['_result_positions'] = [positions[i] for i in range(len(results)) if i in keep]
+        # 记录溢出的数量，供上下文充分性判断计入
+        state['_spilled_count'] = state.get('_spilled_count', 0) + len(overflow)
+        state['_spilled_items'] = state.get('_spilled_items', 0) + sum(len(r.get('results', ())) for _, r in overflow)
+
+    def _restore_results(self, state: Dict[str, Any]) -> None:
+        """Load spilled results back into the state, in their original order."""
+        run_id = state.get('_spill_id')
+        if not run_id:
+            return
+        spill = self._get_spill()
+        results = list(state.get('research_results') or [])
+        kept = zip(self._result_positions(state, results), results)
+        # 保留的结果与溢出的结果都按位置有序，归并还原为未溢出时的顺序
+        state['research_results'] = [r for _, r in heapq.merge(kept, spill.load(run_id), key=itemgetter(0))]
+        spill.clear(run_id)
+        state['_spill_id'] = None
+        state['_result_positions'] = None
+        state['_spilled_count'] = 0
+        state['_spilled_items'] = 0
+
+    def _plan_cache_key(self, state: Dict[str, Any]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        # 计划取决于查询、输出格式、用户反馈与所用模型（切换提供商/模型后不复用其他模型生成的计划）
+        return self.cache.key(
+            'plan', state['query'], state.get('output_format', 'markdown'), state.get('user_feedback') or '',
+            _llm_identity(self.planner.llm)
+        )
+
+    def _load_cached_plan(self, state: Dict[str, Any], key: Optional[str]) -> bool:
+        plan = self.cache.get(key) if key else None
+        if not isinstance(plan, dict):
+            return False
+        # 与create_research_plan写入的字段保持一致
+        state['research_plan'] = plan
+        state['_plan_json'] = None
+        state['_task_order'] = None
+        state['max_iterations'] = plan.get('estimated_iterations', 3)
+        return True
+
+    def _report_cache_key(self, state: Dict[str, Any]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        # 报告取决于查询、输出格式、所用模型与研究结果；结果中的时间戳不参与报告生成，不计入指纹
+        results = [
+            {k: v for k, v in r.items() if k != 'timestamp'}
+            for r in state.get('research_results', [])
+        ]
+        return self.cache.key(
+            'report', state['query'], state.get('output_format', 'markdown'),
+            _llm_identity(self.rapporteur.llm), results
+        )
+
+    def _load_cached_report(self, state: Dict[str, Any], key: Optional[str]) -> bool:
+        report = self.cache.get(key) if key else None
+        if not isinstance(report, str):
+            return False
+        state['final_report'] = report
+        state['current_step'] = 'completed'
+        return True
 
     def coordinator_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -42,7 +234,7 @@ class WorkflowNodes:
         Returns:
             Updated state
         """
-        if state.get('query_type') in ['GREETING', 'INAPPROPRIATE']:
+        if state.get('query_type') in _SIMPLE_TYPES:
             # 简单查询已在initialize_research中处理，标记步骤为完成
             state['current_step'] = 'completed'
             return state
@@ -64,12 +256,19 @@ class WorkflowNodes:
         # 标记当前步骤为规划中
         state['current_step'] = 'planning'
 
+        # 每个字段只读取一次
+        feedback = state.get('user_feedback')
+        has_plan = bool(state.get('research_plan'))
         # 如果有用户反馈且已有研究计划，修改计划
-        if state.get('user_feedback') and state.get('research_plan'):
-            state = self.planner.modify_plan(state, state['user_feedback'])
-        # 否则创建新计划
-        elif not state.get('research_plan'):
-            state = self.planner.create_research_plan(state)
+        if feedback and has_plan:
+            state = self.planner.modify_plan(state, feedback)
+        # 否则创建新计划（优先复用缓存中相同输入的计划）
+        elif not has_plan:
+            key = self._plan_cache_key(state)
+            if not self._load_cached_plan(state, key):
+                state = self.planner.create_research_plan(state)
+                if key:
+                    self.cache.set(key, state['research_plan'])
 
         return state
     def human_review_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
@@ -105,15 +304,21 @@ class WorkflowNodes:
         # 标记当前步骤为研究中
         state['current_step'] = 'researching'
 
-        # 从计划中获取下一个任务
-        next_task = self.planner.get_next_task(state)
+        # 从计划中取出所有可执行的任务（每个任务计一次迭代，不超过剩余迭代次数）
+        # 子任务各自携带搜索关键词和数据源，彼此独立，可在同一节点内并发执行
+        iteration = state['iteration_count']
+        remaining = max(state['max_iterations'] - iteration, 1)
+        tasks = self.planner.get_next_batch(state, remaining)
 
-        if next_task:
+        if tasks:
             # 先增加迭代次数，再执行任务
-            state['iteration_count'] += 1  # 迭代次数加1
-            # 执行任务
-            state = self.researcher.execute_task(state, next_task)
-            state['current_task'] = next_task  # 记录当前执行的任务
+            state['iteration_count'] = iteration + len(tasks)
+            # 并发执行本批任务
+            state = self.researcher.execute_tasks(state, tasks)
+            self._bound_results(state)
+            state['current_task'] = tasks[-1]  # 记录本批最后执行的任务
+            # 研究状态已推进：换一个新的标识，之前的充分性判断随之失效
+            state['_research_step'] = uuid.uuid4().hex
         else:
             # 没有更多任务，标记无需继续研究
             state['needs_more_research'] = False
@@ -132,10 +337,84 @@ class WorkflowNodes:
         """
         # 标记当前步骤为生成报告中
         state['current_step'] = 'generating_report'
-        # 调用rapporteur生成报告并更新状态
-        state = self.rapporteur.generate_report(state)
+        # 取回溢出到磁盘的研究结果，报告基于全部结果生成
+        self._restore_results(state)
+        # 调用rapporteur生成报告并更新状态（优先复用缓存中相同输入的报告）
+        key = self._report_cache_key(state)
+        if not self._load_cached_report(state, key):
+            state = self.rapporteur.generate_report(state)
+            if key:
+                self.cache.set(key, state.get('final_report'))
         return state
     
+    # 异步节点：与同步节点逻辑相同，阻塞的LLM/搜索调用在节点专用线程池中执行，
+    # 供graph.ainvoke/astream使用，等待网络往返期间不阻塞事件循环
+    async def acoordinator_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of coordinator_node."""
+        if state.get('query_type') in _SIMPLE_TYPES:
+            state['current_step'] = 'completed'
+            return state
+
+        state['current_step'] = 'coordinating'
+        return await self.coordinator.adelegate_to_planner(state)
+
+    async def aplanner_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of planner_node."""
+        state['current_step'] = 'planning'
+
+        feedback = state.get('user_feedback')
+        has_plan = bool(state.get('research_plan'))
+        if feedback and has_plan:
+            state = await self.run_blocking(self.planner.modify_plan, state, feedback)
+        elif not has_plan:
+            key = self._plan_cache_key(state)
+            if not self._load_cached_plan(state, key):
+                state = await self.run_blocking(self.planner.create_research_plan, state)
+                if key:
+                    self.cache.set(key, state['research_plan'])
+
+        return state
+
+    async def ahuman_review_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of human_review_node."""
+        return self.human_review_node(state)
+
+    async def aresearcher_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of researcher_node."""
+        state['current_step'] = 'researching'
+
+        iteration = state['iteration_count']
+        remaining = max(state['max_iterations'] - iteration, 1)
+        tasks = self.planner.get_next_batch(state, remaining)
+
+        if tasks:
+            state['iteration_count'] = iteration + len(tasks)
+            state = await self.run_blocking(self.researcher.execute_tasks, state, tasks)
+            self._bound_results(state)
+            state['current_task'] = tasks[-1]
+            state['_research_step'] = uuid.uuid4().hex
+        else:
+            state['needs_more_research'] = False
+
+        return state
+
+    async def arapporteur_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of rapporteur_node."""
+        state['current_step'] = 'generating_report'
+        self._restore_results(state)
+        key = self._report_cache_key(state)
+        if not self._load_cached_report(state, key):
+            if state.get('_stream_report') and get_stream_writer is not None:
+                # 调用方请求流式报告：逐片段写入自定义流，报告生成完毕后state中已是完整报告
+                writer = get_stream_writer()
+                async for section, chunk in self.rapporteur.agenerate_report_stream(state, self.executor or _node_executor()):
+                    writer({'section': section, 'chunk': chunk})
+            else:
+                state = await self.run_blocking(self.rapporteur.generate_report, state)
+            if key:
+                self.cache.set(key, state.get('final_report'))
+        return state
+
     def should_continue_to_planner(self, state: Dict[str, Any]) -> str:
         """
         Conditional edge function - determines if we continue to planner or end.
@@ -147,7 +426,7 @@ class WorkflowNodes:
             Next node name: "planner" for research queries, "end" for simple queries
         """
         # 如果是简单查询（问候或不适当内容），结束工作流
-        if state.get('query_type') in ['GREETING', 'INAPPROPRIATE']:
+        if state.get('query_type') in _SIMPLE_TYPES:
             return "end"
 
         # 否则，继续到planner节点进行研究
@@ -184,16 +463,37 @@ class WorkflowNodes:
         if state['iteration_count'] >= state['max_iterations']:
             return "rapporteur"
 
-        # 检查上下文是否充分
-        if self.planner.evaluate_context_sufficiency(state):
+        # 先检查是否有更多任务（本地O(N)扫描）：没有待执行任务时无论上下文是否充分都生成报告，
+        # 无需再调用LLM判断充分性
+        if not self.planner.get_next_task(state):
             return "rapporteur"
 
-        # 检查是否有更多任务
-        next_task = self.planner.get_next_task(state)
-        if next_task:
-            return "researcher"
-        else:
+        # 检查上下文是否充分
+        if self._is_context_sufficient(state):
             return "rapporteur"
+        return "researcher"
+
+    def _is_context_sufficient(self, state: Dict[str, Any]) -> bool:
+        # 以researcher节点每步生成的唯一标识为键：只在同一次运行的同一研究步骤内复用，
+        # 不同运行（即使查询、迭代次数和结果数相同）不会共享判断结果
+        key = state.get('_research_step')
+        if key is None:
+            return self.planner.evaluate_context_sufficiency(state)
+        with self._sufficiency_lock:
+            verdict = self._sufficiency_memo.get(key)
+            if verdict is not None:
+                self._sufficiency_memo.move_to_end(key)
+                return verdict
+        verdict = self.planner.evaluate_context_sufficiency(state)
+        with self._sufficiency_lock:
+            self._sufficiency_memo[key] = verdict
+            if len(self._sufficiency_memo) > _SUFFICIENCY_MEMO_SIZE:
+                self._sufficiency_memo.popitem(last=False)
+        return verdict
+
+    async def ashould_generate_report(self, state: Dict[str, Any]) -> str:
+        """Async variant of should_generate_report (may call the LLM)."""
+        return await self.run_blocking(self.should_generate_report, state)
         
 def create_node_functions(
     coordinator: Coordinator,
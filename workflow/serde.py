@@ -0,0 +1,41 @@
+"""
+Checkpoint Serializer
+
+Serializes the research state with orjson when a checkpoint is written.
+"""
+from typing import Any, Tuple
+# 默认的LangGraph序列化器：处理状态以外的检查点数据及非JSON类型
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    # orjson为可选依赖：不可用时完全使用默认序列化器
+    import orjson
+except ImportError:
+    orjson = None
+
+# 标记由orjson编码的数据
+_ORJSON_TYPE = "orjson"
+
+
+class StateSerializer(JsonPlusSerializer):
+    """
+    Checkpoint serializer with an orjson fast path for the research state.
+
+    The research state is a plain dict of JSON types (strings, numbers,
+    lists, dicts with string keys), so it is encoded with orjson. Anything
+    else, and any state orjson rejects, goes through JsonPlusSerializer.
+    """
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        # 只对研究状态走快速路径：其余检查点数据可能含元组等orjson会改变类型的值
+        if orjson is not None and type(obj) is dict and 'research_results' in obj:
+            try:
+                return _ORJSON_TYPE, orjson.dumps(obj)
+            except TypeError:
+                pass
+        return super().dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        if data[0] == _ORJSON_TYPE:
+            return orjson.loads(data[1])
+        return super().loads_typed(data)